@@ -1,25 +1,39 @@
 from typing import Optional, Tuple
 
-from fastapi.security.http import HTTPBearer
+from fastapi.security.http import HTTPAuthorizationCredentials, HTTPBearer
 from starlette.authentication import (
     AuthCredentials,
     AuthenticationBackend,
     AuthenticationError,
 )
-from starlette.requests import HTTPConnection
+from starlette.requests import HTTPConnection, Request
 
 from server.config.di import resolve
 from server.domain.auth.repositories import AccountRepository
 
+from ..middleware import authenticate
 from ..models import ApiUser
 
 
+class AuthenticatingHTTPBearer(HTTPBearer):
+    """
+    Declare the 'Bearer' security scheme, and authenticate requests when used as a
+    dependency, see `AuthMiddleware`.
+    """
+
+    async def __call__(
+        self, request: Request
+    ) -> Optional[HTTPAuthorizationCredentials]:
+        await authenticate(request)
+        return await super().__call__(request)
+
+
 class TokenAuthBackend(AuthenticationBackend):
     """
     Authenticate users based on their API token: 'Authorization: Bearer <api_token>'
     """
 
-    security = HTTPBearer(scheme_name="Bearer", auto_error=False)
+    security = AuthenticatingHTTPBearer(scheme_name="Bearer", auto_error=False)
 
     async def authenticate(
         self, conn: HTTPConnection
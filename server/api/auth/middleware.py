@@ -1,9 +1,80 @@
-from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.authentication import (
+    AuthCredentials,
+    AuthenticationBackend,
+    AuthenticationError,
+    BaseUser,
+)
+from starlette.exceptions import HTTPException
 from starlette.requests import HTTPConnection
-from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from .models import ApiUser
 
-class AuthMiddleware(AuthenticationMiddleware):
-    @staticmethod
-    def default_on_error(conn: HTTPConnection, exc: Exception) -> Response:
-        return JSONResponse({"detail": "Invalid credentials"}, status_code=401)
+
+class AuthMiddleware:
+    """
+    Authenticate requests lazily, i.e. only once `authenticate()` runs, e.g. as
+    part of the `IsAuthenticated()` permission.
+
+    Public routes such as catalog exports then never look up the account of API
+    tokens sent along with requests.
+    """
+
+    def __init__(self, app: ASGIApp, backend: AuthenticationBackend) -> None:
+        self.app = app
+        self.backend = backend
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            scope["auth"] = AuthCredentials()
+            scope["user"] = PendingUser(self.backend)
+
+        await self.app(scope, receive, send)
+
+
+class PendingUser(BaseUser):
+    """
+    Placeholder for `request.user` until the request has been authenticated.
+    """
+
+    def __init__(self, backend: AuthenticationBackend) -> None:
+        self.backend = backend
+
+    def _error(self) -> RuntimeError:
+        return RuntimeError(
+            "Cannot access the user, as the request has not been authenticated. "
+            "Hint: did you forget to use IsAuthenticated()?"
+        )
+
+    @property
+    def is_authenticated(self) -> bool:
+        raise self._error()
+
+    @property
+    def display_name(self) -> str:
+        raise self._error()
+
+    @property
+    def account(self) -> None:
+        raise self._error()
+
+
+async def authenticate(conn: HTTPConnection) -> None:
+    """
+    Authenticate the request with the backend of `AuthMiddleware`, if it hasn't
+    been already.
+    """
+    user = conn.scope.get("user")
+
+    if not isinstance(user, PendingUser):
+        return
+
+    try:
+        result = await user.backend.authenticate(conn)
+    except AuthenticationError:
+        raise HTTPException(401, detail="Invalid credentials")
+
+    if result is None:
+        result = AuthCredentials(), ApiUser(None)
+
+    conn.scope["auth"], conn.scope["user"] = result
@@ -101,7 +101,8 @@ class IsAuthenticated(BasePermission):
     def __call__(
         self,
         request: APIRequest,
-        _: SecurityBase = Depends(auth_backend.security),  # For OpenAPI docs.
+        # Authenticates the request, and declares the scheme in OpenAPI docs.
+        _: SecurityBase = Depends(auth_backend.security),
     ) -> None:
         super().__call__(request)
 
@@ -1,10 +1,74 @@
 import csv
 import io
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List
 
-from server.application.catalogs.views import CatalogExportView
+from server.application.catalogs.views import CatalogExportView, DatasetExportView
+from server.domain.catalogs.entities import ExportFormat
 
+# Number of rows rendered at once by `iter_export()`.
+EXPORT_CHUNK_ROWS = 500
 
-def to_csv(export: CatalogExportView) -> str:
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.JSONL: "application/x-ndjson",
+    ExportFormat.JSONLD: "application/ld+json",
+}
+
+DCAT_CONTEXT = {
+    "dcat": "http://www.w3.org/ns/dcat#",
+    "dct": "http://purl.org/dc/terms/",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "vcard": "http://www.w3.org/2006/vcard/ns#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _extra_field_values(
+    export: CatalogExportView, dataset: DatasetExportView
+) -> Dict[str, str]:
+    extra_field_value_by_id = {
+        extra_field_value.extra_field_id: extra_field_value.value
+        for extra_field_value in dataset.extra_field_values
+    }
+
+    return {
+        extra_field.name: extra_field_value_by_id[extra_field.id]
+        for extra_field in export.catalog.extra_fields
+        if extra_field.id in extra_field_value_by_id
+    }
+
+
+async def _iter_chunks(rows: AsyncIterator[str], chunk_rows: int) -> AsyncIterator[str]:
+    # Rendered rows are buffered, so that chunks sent to clients are reasonably
+    # sized.
+    buffer: List[str] = []
+    num_rows = 0
+
+    async for row in rows:
+        buffer.append(row)
+        num_rows += 1
+
+        if num_rows % chunk_rows == 0:
+            yield "".join(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def _flush(f: io.StringIO) -> str:
+    chunk = f.getvalue()
+    f.seek(0)
+    f.truncate()
+    return chunk
+
+
+async def _iter_csv_rows(export: CatalogExportView) -> AsyncIterator[str]:
     fieldnames = [
         "titre",
         "description",
@@ -24,10 +88,11 @@ def to_csv(export: CatalogExportView) -> str:
     fieldnames.extend(extra_field.name for extra_field in export.catalog.extra_fields)
 
     f = io.StringIO()
-    writer = csv.DictWriter(f, fieldnames=fieldnames)
+    writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
     writer.writeheader()
+    header = _flush(f)
 
-    for dataset in export.datasets:
+    async for dataset in export.datasets:
         row = {
             "titre": dataset.title,
             "description": dataset.description,
@@ -48,16 +113,134 @@ def to_csv(export: CatalogExportView) -> str:
             "url": dataset.url or "",
             "licence": dataset.license or "",
             "mots_cles": ", ".join(tag.name for tag in dataset.tags),
+            **_extra_field_values(export, dataset),
         }
 
-        extra_field_value_by_id = {
-            extra_field_value.extra_field_id: extra_field_value.value
-            for extra_field_value in dataset.extra_field_values
+        writer.writerow(row)
+
+        yield header + _flush(f)
+        header = ""
+
+    if header:
+        # Empty catalog.
+        yield header
+
+
+async def _iter_jsonl_rows(export: CatalogExportView) -> AsyncIterator[str]:
+    async for dataset in export.datasets:
+        freq = dataset.update_frequency
+        last_updated_at = dataset.last_updated_at
+
+        row = {
+            "title": dataset.title,
+            "description": dataset.description,
+            "service": dataset.service,
+            "geographical_coverage": dataset.geographical_coverage,
+            "formats": [fmt.name for fmt in dataset.formats],
+            "technical_source": dataset.technical_source,
+            "producer_email": dataset.producer_email,
+            "contact_emails": dataset.contact_emails,
+            "update_frequency": freq.value if freq is not None else None,
+            "last_updated_at": (
+                last_updated_at.isoformat() if last_updated_at is not None else None
+            ),
+            "url": dataset.url,
+            "license": dataset.license,
+            "tags": [tag.name for tag in dataset.tags],
+            "extra_fields": _extra_field_values(export, dataset),
         }
 
-        for extra_field in export.catalog.extra_fields:
-            row[extra_field.name] = extra_field_value_by_id.get(extra_field.id, "")
+        yield _dumps(row) + "\n"
+
+
+def _make_dcat_dataset(dataset: DatasetExportView) -> dict:
+    # See: https://www.w3.org/TR/vocab-dcat-2/#Class:Dataset
+    emails = [dataset.producer_email] if dataset.producer_email is not None else []
+    emails.extend(dataset.contact_emails)
+
+    node: Dict[str, Any] = {
+        "@type": "dcat:Dataset",
+        "dct:title": dataset.title,
+        "dct:description": dataset.description,
+        "dct:creator": {"@type": "foaf:Organization", "foaf:name": dataset.service},
+        "dct:spatial": dataset.geographical_coverage,
+        "dcat:keyword": [tag.name for tag in dataset.tags],
+        "dcat:distribution": [
+            {"@type": "dcat:Distribution", "dct:format": fmt.name}
+            for fmt in dataset.formats
+        ],
+        "dcat:contactPoint": [
+            {"@type": "vcard:Kind", "vcard:hasEmail": {"@id": f"mailto:{email}"}}
+            for email in emails
+        ],
+    }
+
+    if dataset.technical_source is not None:
+        node["dct:source"] = dataset.technical_source
+
+    if dataset.update_frequency is not None:
+        node["dct:accrualPeriodicity"] = dataset.update_frequency.value
+
+    if dataset.last_updated_at is not None:
+        node["dct:modified"] = {
+            "@value": dataset.last_updated_at.isoformat(),
+            "@type": "xsd:dateTime",
+        }
+
+    if dataset.url is not None:
+        node["dcat:landingPage"] = {"@id": dataset.url}
+
+    if dataset.license is not None:
+        node["dct:license"] = dataset.license
+
+    return node
+
+
+async def _iter_jsonld_rows(export: CatalogExportView) -> AsyncIterator[str]:
+    # A single document, with datasets rendered one at a time.
+    organization = export.catalog.organization
+    catalog = {
+        "@context": DCAT_CONTEXT,
+        "@type": "dcat:Catalog",
+        "dct:publisher": {
+            "@type": "foaf:Organization",
+            "foaf:name": organization.name,
+            "dct:identifier": organization.siret,
+        },
+    }
+
+    # Open the catalog object, leaving room for the list of datasets.
+    prefix = _dumps(catalog)[:-1] + ',"dcat:dataset":['
+    separator = ""
+
+    async for dataset in export.datasets:
+        yield prefix + separator + _dumps(_make_dcat_dataset(dataset))
+        prefix = ""
+        separator = ","
+
+    yield prefix + "]}"
+
+
+_ROWS: Dict[ExportFormat, Callable[[CatalogExportView], AsyncIterator[str]]] = {
+    ExportFormat.CSV: _iter_csv_rows,
+    ExportFormat.JSONL: _iter_jsonl_rows,
+    ExportFormat.JSONLD: _iter_jsonld_rows,
+}
+
+
+def iter_export(
+    export: CatalogExportView, fmt: ExportFormat, chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> AsyncIterator[str]:
+    """
+    Render a catalog export in the given format, in chunks of `chunk_rows` rows.
+    """
+    return _iter_chunks(_ROWS[fmt](export), chunk_rows)
 
-        writer.writerow(row)
 
-    return f.getvalue()
+def iter_csv(
+    export: CatalogExportView, chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> AsyncIterator[str]:
+    """
+    Render a catalog export as CSV, in chunks of `chunk_rows` rows.
+    """
+    return iter_export(export, ExportFormat.CSV, chunk_rows)
@@ -1,11 +1,14 @@
 # flake8: noqa E501
 
-from typing import List
+import tempfile
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+from server.api.utils.encodings import negotiate_encoding
+from server.api.utils.etags import etag_matches, not_modified_since
 from server.application.catalogs.commands import CreateCatalog
 from server.application.catalogs.queries import (
     GetAllCatalogs,
@@ -14,18 +17,26 @@ from server.application.catalogs.queries import (
 )
 from server.application.catalogs.views import CatalogView
 from server.config.di import resolve
+from server.domain.catalogs.entities import ExportFormat
 from server.domain.catalogs.exceptions import CatalogAlreadyExists, CatalogDoesNotExist
 from server.domain.organizations.exceptions import OrganizationDoesNotExist
 from server.domain.organizations.types import Siret
-from server.infrastructure.catalogs.caching import ExportCache
+from server.infrastructure.catalogs.caching import ContentEncoding, ExportCache
 from server.seedwork.application.messages import MessageBus
 
 from ..auth.permissions import HasAPIKey, IsAuthenticated
-from .rendering import to_csv
+from .rendering import MEDIA_TYPES, iter_export
 from .schemas import CatalogCreate
 
 router = APIRouter(prefix="/catalogs", tags=["catalogs"])
 
+# Exports being generated are kept in memory up to this size, and written to a
+# temporary file beyond.
+EXPORT_SPOOL_MAX_SIZE = 1024 * 1024
+
+# Size of chunks in which generated exports are sent.
+EXPORT_SEND_CHUNK_SIZE = 64 * 1024
+
 
 @router.post(
     "/",
@@ -72,35 +83,140 @@ async def get_catalogs() -> List[CatalogView]:
     return await bus.execute(GetAllCatalogs())
 
 
-@router.get("/{siret}/export.csv")
-async def export_catalog(siret: Siret) -> Response:
-    """
-    This route will generate CSV export of all dataset published without publication restriction
-
-    The generated export uses a 24h cache. That means that changes made to a dataset might be only taken into account 24 hours later
-    """
+async def _export_catalog(
+    siret: Siret,
+    fmt: ExportFormat,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    accept_encoding: Optional[str],
+) -> Response:
     export_cache = resolve(ExportCache)
+    bus = resolve(MessageBus)
 
-    content = export_cache.get(siret)
+    # Compressed variants are stored along with exports, see `ExportCache`.
+    # Prefer brotli, which compresses better.
+    encoding = ContentEncoding(
+        negotiate_encoding(accept_encoding, ["br", "gzip", "identity"])
+    )
+
+    async def build() -> bytes:
+        export = await bus.execute(GetCatalogExport(siret=siret))
+        return b"".join([chunk.encode() async for chunk in iter_export(export, fmt)])
+
+    entry = await export_cache.get(siret, fmt, revalidate=build, encoding=encoding)
+
+    if entry is None:
+        # Wait for concurrent requests which are already generating the export.
+        entry = await export_cache.claim(siret, fmt, encoding=encoding)
+
+    if entry is not None:
+        headers = export_cache.hit_headers(entry)
+
+        # 'If-Modified-Since' must be ignored when 'If-None-Match' is present.
+        if (
+            etag_matches(if_none_match, entry.etag)
+            if if_none_match is not None
+            else not_modified_since(if_modified_since, entry.last_modified)
+        ):
+            return Response(status_code=304, headers=headers)
+
+        if entry.encoding != ContentEncoding.IDENTITY:
+            headers["Content-Encoding"] = entry.encoding.value
 
-    if content is not None:
         return Response(
-            content,
-            headers={"content-type": "text/csv", **export_cache.hit_headers},
+            entry.content,
+            headers={"content-type": MEDIA_TYPES[fmt], **headers},
         )
 
-    bus = resolve(MessageBus)
+    last_modified = export_cache.now()
 
     try:
+        generation = await export_cache.get_generation(siret)
         export = await bus.execute(GetCatalogExport(siret=siret))
     except CatalogDoesNotExist as exc:
+        export_cache.release(siret, fmt)
         raise HTTPException(404, detail=str(exc))
+    except BaseException:
+        export_cache.release(siret, fmt)
+        raise
+
+    async def stream() -> AsyncIterator[bytes]:
+        # Generate the whole export before sending it, so that the database
+        # connection is released without waiting for slow clients.
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE) as f:
+            try:
+                async for chunk in iter_export(export, fmt):
+                    f.write(chunk.encode())
+
+                if f.tell() <= export_cache.max_entry_bytes:
+                    f.seek(0)
+                    await export_cache.set(
+                        siret, f.read(), last_modified, generation, fmt=fmt
+                    )
+            finally:
+                # No-op if the export was stored.
+                export_cache.release(siret, fmt)
+
+            f.seek(0)
+
+            while data := f.read(EXPORT_SEND_CHUNK_SIZE):
+                yield data
+
+    return StreamingResponse(
+        stream(),
+        headers={
+            "content-type": MEDIA_TYPES[fmt],
+            **export_cache.miss_headers(last_modified),
+        },
+    )
+
 
-    content = to_csv(export)
+@router.get("/{siret}/export.csv")
+async def export_catalog(
+    siret: Siret,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+) -> Response:
+    """
+    This route will generate CSV export of all dataset published without publication restriction
+
+    The generated export is cached until datasets of the catalog change. Clients should revalidate their copy using the 'ETag' or 'Last-Modified' headers of the response
+
+    The export is served compressed with brotli or gzip, according to the 'Accept-Encoding' header, once it has been cached
+    """
+    return await _export_catalog(
+        siret, ExportFormat.CSV, if_none_match, if_modified_since, accept_encoding
+    )
 
-    export_cache.set(siret, content)
 
-    return Response(
-        content,
-        headers={"content-type": "text/csv", **export_cache.miss_headers},
+@router.get("/{siret}/export.jsonl")
+async def export_catalog_jsonl(
+    siret: Siret,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+) -> Response:
+    """
+    Same as the CSV export, as JSON Lines: one JSON object per dataset, with formats, tags and extra fields kept structured
+    """
+    return await _export_catalog(
+        siret, ExportFormat.JSONL, if_none_match, if_modified_since, accept_encoding
+    )
+
+
+@router.get("/{siret}/export.jsonld")
+async def export_catalog_jsonld(
+    siret: Siret,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+) -> Response:
+    """
+    Same as the CSV export, as a DCAT catalog in JSON-LD, for harvesters such as data.gouv.fr
+
+    See: https://www.w3.org/TR/vocab-dcat-2/
+    """
+    return await _export_catalog(
+        siret, ExportFormat.JSONLD, if_none_match, if_modified_since, accept_encoding
     )
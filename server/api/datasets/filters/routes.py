@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 
 from server.api.auth.permissions import IsAuthenticated
+from server.api.utils.etags import etag_matches
 from server.application.datasets.queries import GetDatasetFilters
 from server.application.datasets.views import DatasetFiltersView
 from server.config.di import resolve
+from server.infrastructure.database import Database
+from server.infrastructure.datasets.caching import DatasetFiltersCache
 from server.seedwork.application.messages import MessageBus
 
 from .schemas import DatasetFiltersParams
@@ -18,8 +25,35 @@ router = APIRouter(prefix="/filters")
 )
 async def get_dataset_filters(
     params: DatasetFiltersParams = Depends(),
-) -> DatasetFiltersView:
-    bus = resolve(MessageBus)
-    return await bus.execute(
-        GetDatasetFilters(organization_siret=params.organization_siret)
-    )
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    Filters are cached until datasets, tags, formats or catalogs change. Clients
+    should revalidate their copy using the 'ETag' of the response.
+    """
+    filters_cache = resolve(DatasetFiltersCache)
+
+    entry = filters_cache.get(params.organization_siret)
+
+    if entry is None:
+        generation = filters_cache.generation
+
+        bus = resolve(MessageBus)
+
+        # Filters are cached until the next write, see `Database.primary_reads()`.
+        with resolve(Database).primary_reads():
+            filters = await bus.execute(
+                GetDatasetFilters(organization_siret=params.organization_siret)
+            )
+
+        content = JSONResponse(jsonable_encoder(filters)).body
+        entry = filters_cache.set(params.organization_siret, content, generation)
+
+    # Responses depend on the account being authenticated, so they must not be
+    # stored by shared caches.
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(entry.content, media_type="application/json", headers=headers)
@@ -2,7 +2,7 @@ import json
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from fastapi.exceptions import HTTPException
 from starlette.responses import Response
 
@@ -16,12 +16,21 @@ from server.application.datasets.exceptions import (
     CannotSeeDataset,
     CannotUpdateDataset,
 )
-from server.application.datasets.queries import GetAllDatasets, GetDatasetByID
-from server.application.datasets.views import DatasetView
+from server.application.datasets.queries import (
+    GetAllDatasets,
+    GetDatasetByID,
+    GetDatasetSuggestions,
+)
+from server.application.datasets.views import (
+    DatasetListView,
+    DatasetSuggestionView,
+    DatasetView,
+)
 from server.config.di import resolve
 from server.domain.auth.entities import UserRole
 from server.domain.catalogs.exceptions import CatalogDoesNotExist
-from server.domain.common.pagination import Page, Pagination
+from server.domain.common.exceptions import InvalidCursor
+from server.domain.common.pagination import Page
 from server.domain.common.types import ID
 from server.domain.datasets.exceptions import DatasetDoesNotExist
 from server.domain.datasets.specifications import DatasetSpec
@@ -43,15 +52,21 @@ router.include_router(filters.router)
 @router.get(
     "/",
     dependencies=[Depends(IsAuthenticated())],
-    response_model=Pagination[DatasetView],
+    response_model=DatasetListView,
+    responses={400: {}},
 )
 async def list_datasets(
     request: "APIRequest",
     params: DatasetListParams = Depends(),
-) -> Pagination[DatasetView]:
+) -> DatasetListView:
     bus = resolve(MessageBus)
 
-    page = Page(number=params.page_number, size=params.page_size)
+    page = Page(
+        number=params.page_number,
+        size=params.page_size,
+        cursor=params.cursor,
+        count_strategy=params.count_strategy,
+    )
 
     extra_field_values: Optional[List[ExtraFieldValue]] = None
 
@@ -73,8 +88,28 @@ async def list_datasets(
             extra_field_values=extra_field_values,
         ),
         account=request.user.account,
+        facets=params.facets or [],
     )
 
+    try:
+        return await bus.execute(query)
+    except InvalidCursor as exc:
+        raise HTTPException(400, detail=str(exc))
+
+
+@router.get(
+    "/suggest/",
+    dependencies=[Depends(IsAuthenticated())],
+    response_model=List[DatasetSuggestionView],
+)
+async def suggest_datasets(
+    request: "APIRequest",
+    q: str = Query(..., max_length=200),
+) -> List[DatasetSuggestionView]:
+    bus = resolve(MessageBus)
+
+    query = GetDatasetSuggestions(q=q, account=request.user.account)
+
     return await bus.execute(query)
 
 
@@ -9,8 +9,10 @@ from server.application.datasets.validation import (
     CreateDatasetValidationMixin,
     UpdateDatasetValidationMixin,
 )
+from server.domain.common.pagination import CountStrategy
 from server.domain.common.types import ID
 from server.domain.datasets.entities import PublicationRestriction, UpdateFrequency
+from server.domain.datasets.specifications import DatasetFacet
 from server.domain.organizations.types import Siret
 
 
@@ -20,6 +22,8 @@ class DatasetListParams:
         q: Optional[str] = None,
         page_number: int = 1,
         page_size: int = 10,
+        cursor: Optional[str] = Query(None),
+        count_strategy: CountStrategy = Query(CountStrategy.EXACT),
         organization_siret: Optional[Siret] = Query(None),
         geographical_coverage: Optional[List[str]] = Query(None),
         service: Optional[List[str]] = Query(None),
@@ -29,11 +33,14 @@ class DatasetListParams:
         license: Optional[str] = Query(None),
         publication_restriction: Optional[PublicationRestriction] = Query(None),
         extra_field_values: Optional[str] = Query(None),
+        facets: Optional[List[DatasetFacet]] = Query(None),
     ) -> None:
         self.q = q
         self.organization_siret = organization_siret
         self.page_number = page_number
         self.page_size = page_size
+        self.cursor = cursor
+        self.count_strategy = count_strategy
         self.geographical_coverage = geographical_coverage
         self.service = service
         self.format_id = format_id
@@ -42,6 +49,7 @@ class DatasetListParams:
         self.license = license
         self.publication_restriction = publication_restriction
         self.extra_field_values = extra_field_values
+        self.facets = facets
 
 
 class DatasetCreate(CreateDatasetValidationMixin, BaseModel):
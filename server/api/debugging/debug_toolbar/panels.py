@@ -16,10 +16,15 @@ class SQLAlchemyPanel(Base):
 
     async def process_request(self, request: Request) -> Response:
         db = resolve(Database)
-        engine = db.engine.sync_engine
+        engines = [db.engine.sync_engine]
 
-        self.register(engine)
+        if db.replica_engine is not None:
+            engines.append(db.replica_engine.sync_engine)
+
+        for engine in engines:
+            self.register(engine)
         try:
             return await super().process_request(request)
         finally:
-            self.unregister(engine)
+            for engine in engines:
+                self.unregister(engine)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends
+
+from server.config.di import resolve
+from server.infrastructure.catalogs.caching import ExportCache
+from server.infrastructure.database import Database
+from server.infrastructure.datasets.caching import DatasetListCache
+
+from ..auth.permissions import HasAPIKey
+from .schemas import (
+    DatabasePoolStatsView,
+    DatasetListCacheStatsView,
+    ExportCacheStatsView,
+)
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+
+@router.get(
+    "/database-pool/",
+    dependencies=[Depends(HasAPIKey())],
+    response_model=DatabasePoolStatsView,
+)
+async def get_database_pool_stats() -> DatabasePoolStatsView:
+    """
+    Usage of the database connection pool of the process serving the request.
+
+    Waits are cumulative since the process started.
+    """
+    db = resolve(Database)
+    return DatabasePoolStatsView(**db.pool_stats._asdict())
+
+
+@router.get(
+    "/export-cache/",
+    dependencies=[Depends(HasAPIKey())],
+    response_model=ExportCacheStatsView,
+)
+async def get_export_cache_stats() -> ExportCacheStatsView:
+    """
+    Usage of the cache of catalog exports by the process serving the request.
+
+    Hits and misses are cumulative since the process started.
+    """
+    export_cache = resolve(ExportCache)
+    return ExportCacheStatsView(**export_cache.stats._asdict())
+
+
+@router.get(
+    "/dataset-list-cache/",
+    dependencies=[Depends(HasAPIKey())],
+    response_model=DatasetListCacheStatsView,
+)
+async def get_dataset_list_cache_stats() -> DatasetListCacheStatsView:
+    """
+    Usage of the cache of dataset listings by the process serving the request.
+
+    Counters are cumulative since the process started.
+    """
+    dataset_list_cache = resolve(DatasetListCache)
+    return DatasetListCacheStatsView(**dataset_list_cache.stats._asdict())
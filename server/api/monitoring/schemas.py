@@ -0,0 +1,31 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class DatabasePoolStatsView(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+    waits: int
+    wait_time: float
+    wait_time_buckets: Dict[str, int]
+
+
+class ExportCacheStatsView(BaseModel):
+    hits: int
+    misses: int
+    # Only known for the memory backend, `None` otherwise.
+    entries: Optional[int]
+    bytes: Optional[int]
+    evictions: Optional[int]
+    rejected: Optional[int]
+
+
+class DatasetListCacheStatsView(BaseModel):
+    hits: int
+    misses: int
+    invalidations: int
+    size: int
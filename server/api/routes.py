@@ -5,7 +5,16 @@ from starlette.responses import RedirectResponse
 from server.config import Settings
 from server.config.di import resolve
 
-from . import auth, catalogs, dataformats, datasets, licenses, organizations, tags
+from . import (
+    auth,
+    catalogs,
+    dataformats,
+    datasets,
+    licenses,
+    monitoring,
+    organizations,
+    tags,
+)
 
 router = APIRouter()
 
@@ -24,3 +33,4 @@ router.include_router(licenses.router)
 router.include_router(organizations.router)
 router.include_router(catalogs.router)
 router.include_router(dataformats.router)
+router.include_router(monitoring.router)
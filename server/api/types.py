@@ -4,4 +4,4 @@ from .auth.models import ApiUser
 
 
 class APIRequest(Request):
-    user: ApiUser  # Set by AuthMiddleware.
+    user: ApiUser  # Set by AuthMiddleware, once authenticated.
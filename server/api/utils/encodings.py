@@ -0,0 +1,47 @@
+from typing import Dict, Optional, Sequence
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Sequence[str]) -> str:
+    """
+    Pick the preferred content coding among `available` ones (by order of
+    preference of the server), according to an 'Accept-Encoding' request header.
+
+    Fall back to 'identity' if no other coding is acceptable.
+
+    See: https://httpwg.org/specs/rfc9110.html#field.accept-encoding
+    """
+    if accept_encoding is None:
+        return "identity"
+
+    weights: Dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        weight = 1.0
+        name, _, value = params.partition("=")
+
+        if name.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                # Invalid weights must be ignored.
+                continue
+
+        weights[coding] = weight
+
+    best, best_weight = "identity", 0.0
+
+    for coding in available:
+        # 'identity' is acceptable unless explicitly excluded.
+        default = weights.get("*", 1.0 if coding == "identity" else 0.0)
+        weight = weights.get(coding, default)
+
+        if weight > best_weight:
+            best, best_weight = coding, weight
+
+    return best
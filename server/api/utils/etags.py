@@ -0,0 +1,50 @@
+import datetime as dt
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an 'If-None-Match' request header matches the given ETag.
+
+    See: https://httpwg.org/specs/rfc9110.html#field.if-none-match
+    """
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison: 'W/"abc"' matches '"abc"'.
+    candidates = (_opaque_tag(value.strip()) for value in if_none_match.split(","))
+
+    return _opaque_tag(etag) in candidates
+
+
+def _opaque_tag(etag: str) -> str:
+    # NOTE: str.removeprefix() requires Python 3.9.
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def not_modified_since(
+    if_modified_since: Optional[str], last_modified: dt.datetime
+) -> bool:
+    """
+    Whether an 'If-Modified-Since' request header is at least as recent as the
+    given last modification date.
+
+    See: https://httpwg.org/specs/rfc9110.html#field.if-modified-since
+    """
+    if if_modified_since is None:
+        return False
+
+    try:
+        date = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # Invalid dates must be ignored.
+        return False
+
+    if date.tzinfo is None:
+        return False
+
+    return last_modified.replace(microsecond=0) <= date
@@ -4,10 +4,10 @@ from pydantic import SecretStr
 
 
 class PasswordEncoder:
-    def hash(self, password: SecretStr) -> str:
+    async def hash(self, password: SecretStr) -> str:
         raise NotImplementedError  # pragma: no cover
 
-    def verify(self, password: SecretStr, hash: str) -> bool:
+    async def verify(self, password: SecretStr, hash: str) -> bool:
         raise NotImplementedError  # pragma: no cover
 
 
@@ -1,10 +1,11 @@
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
 
 from server.config.di import resolve
 from server.domain.catalogs.entities import Catalog
 from server.domain.catalogs.exceptions import CatalogAlreadyExists, CatalogDoesNotExist
 from server.domain.catalogs.repositories import CatalogRepository
 from server.domain.common.types import ID, Skip
+from server.domain.datasets.entities import Dataset
 from server.domain.datasets.repositories import DatasetRepository
 from server.domain.datasets.specifications import DatasetSpec
 from server.domain.organizations.exceptions import OrganizationDoesNotExist
@@ -12,7 +13,12 @@ from server.domain.organizations.repositories import OrganizationRepository
 from server.domain.organizations.types import Siret
 
 from .commands import CreateCatalog
-from .queries import GetAllCatalogs, GetCatalogBySiret, GetCatalogExport
+from .queries import (
+    GetAllCatalogExports,
+    GetAllCatalogs,
+    GetCatalogBySiret,
+    GetCatalogExport,
+)
 from .views import CatalogExportView, CatalogView, DatasetExportView
 
 
@@ -78,15 +84,67 @@ async def get_catalog_export(query: GetCatalogExport) -> CatalogExportView:
     if catalog is None:
         raise CatalogDoesNotExist(siret)
 
-    datasets, _ = await dataset_repository.get_all(
-        page=None,
+    datasets = dataset_repository.stream_all(
         spec=DatasetSpec(organization_siret=siret),
         account=Skip(),
     )
 
     view = CatalogExportView(
         catalog=CatalogView(**catalog.dict()),
-        datasets=[DatasetExportView(**dataset.dict()) for (dataset, _) in datasets],
+        datasets=(DatasetExportView(**dataset.dict()) async for dataset in datasets),
     )
 
     return view
+
+
+async def get_all_catalog_exports(
+    query: GetAllCatalogExports,
+) -> AsyncIterator[CatalogExportView]:
+    repository = resolve(CatalogRepository)
+    dataset_repository = resolve(DatasetRepository)
+
+    catalogs = sorted(
+        await repository.get_all(with_extra_fields=True),
+        key=lambda catalog: catalog.organization.siret,
+    )
+
+    # Datasets of all catalogs are read in one pass, grouped by organization.
+    datasets = dataset_repository.stream_all(account=Skip(), by_organization=True)
+
+    return _iter_catalog_exports(catalogs, datasets)
+
+
+async def _iter_catalog_exports(
+    catalogs: List[Catalog], datasets: AsyncIterator[Dataset]
+) -> AsyncIterator[CatalogExportView]:
+    # Datasets and catalogs come sorted by SIRET, so datasets of each catalog can be
+    # split off the shared stream as they are consumed. Each export must be
+    # consumed before moving on to the next one: datasets left over are skipped.
+    current: Optional[Dataset] = None
+
+    async def advance() -> None:
+        nonlocal current
+
+        try:
+            current = await datasets.__anext__()
+        except StopAsyncIteration:
+            current = None
+
+    async def iter_datasets(siret: Siret) -> AsyncIterator[DatasetExportView]:
+        while (
+            current is not None and current.catalog_record.organization.siret == siret
+        ):
+            yield DatasetExportView(**current.dict())
+            await advance()
+
+    await advance()
+
+    for catalog in catalogs:
+        siret = catalog.organization.siret
+
+        while current is not None and current.catalog_record.organization.siret < siret:
+            await advance()
+
+        yield CatalogExportView(
+            catalog=CatalogView(**catalog.dict()), datasets=iter_datasets(siret)
+        )
@@ -1,4 +1,4 @@
-from typing import List
+from typing import AsyncIterator, List
 
 from server.domain.organizations.types import Siret
 from server.seedwork.application.queries import Query
@@ -16,3 +16,7 @@ class GetAllCatalogs(Query[List[CatalogView]]):
 
 class GetCatalogExport(Query[CatalogExportView]):
     siret: Siret
+
+
+class GetAllCatalogExports(Query[AsyncIterator[CatalogExportView]]):
+    pass
@@ -1,5 +1,5 @@
 import datetime as dt
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from pydantic import BaseModel
 
@@ -47,4 +47,9 @@ class DatasetExportView(BaseModel):
 
 class CatalogExportView(BaseModel):
     catalog: CatalogView
-    datasets: List[DatasetExportView]
+    # Datasets are fetched as they are consumed, so that exports of large catalogs
+    # can be streamed.
+    datasets: AsyncIterator[DatasetExportView]
+
+    class Config:
+        arbitrary_types_allowed = True
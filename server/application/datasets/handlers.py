@@ -1,14 +1,17 @@
+from typing import Any, Coroutine, List, Tuple
+
 from server.application.catalogs.queries import GetAllCatalogs
 from server.application.dataformats.queries import GetAllDataFormat
 from server.application.extra_fields.queries import GetAllExtraFields
 from server.application.licenses.queries import GetLicenseSet
 from server.application.tags.queries import GetAllTags
+from server.config import Settings
 from server.config.di import resolve
 from server.domain.catalog_records.entities import CatalogRecord
 from server.domain.catalog_records.repositories import CatalogRecordRepository
 from server.domain.catalogs.exceptions import CatalogDoesNotExist
 from server.domain.catalogs.repositories import CatalogRepository
-from server.domain.common.pagination import Pagination
+from server.domain.common.pagination import CAPPED_COUNT_LIMIT, CountStrategy, Page
 from server.domain.common.types import ID, Skip
 from server.domain.dataformats.repositories import DataFormatRepository
 from server.domain.datasets.entities import Dataset
@@ -16,18 +19,30 @@ from server.domain.datasets.exceptions import DatasetDoesNotExist
 from server.domain.datasets.repositories import DatasetRepository
 from server.domain.organizations.types import Siret
 from server.domain.tags.repositories import TagRepository
+from server.seedwork.application.concurrency import gather_bounded
 from server.seedwork.application.messages import MessageBus
 
 from .commands import CreateDataset, DeleteDataset, UpdateDataset
 from .exceptions import CannotCreateDataset, CannotSeeDataset, CannotUpdateDataset
-from .queries import GetAllDatasets, GetDatasetByID, GetDatasetFilters
+from .queries import (
+    GetAllDatasets,
+    GetDatasetByID,
+    GetDatasetFilters,
+    GetDatasetSuggestions,
+)
 from .specifications import (
     can_create_dataset,
     can_not_change_publication_restriction_level,
     can_see_dataset,
     can_update_dataset,
 )
-from .views import DatasetFiltersView, DatasetView
+from .views import (
+    DatasetFacetsView,
+    DatasetFiltersView,
+    DatasetListView,
+    DatasetSuggestionView,
+    DatasetView,
+)
 
 # This organization typically holds password users used by the development team.
 # It is created by migration `f2ef4eef61e3` (create-legacy-organization).
@@ -129,22 +144,36 @@ async def delete_dataset(command: DeleteDataset) -> None:
 async def get_dataset_filters(query: GetDatasetFilters) -> DatasetFiltersView:
     bus = resolve(MessageBus)
     repository = resolve(DatasetRepository)
-
-    extra_fields = []
-
-    catalogs = await bus.execute(GetAllCatalogs())
-    geographical_coverages = await repository.get_geographical_coverage_set()
-    services = await repository.get_service_set()
-    technical_sources = await repository.get_technical_source_set()
-    tags = await bus.execute(GetAllTags())
-    formats = await bus.execute(GetAllDataFormat())
-    licenses = await bus.execute(GetLicenseSet())
+    settings = resolve(Settings)
+
+    # Lookups are independent, so run them concurrently. Each of them uses its own
+    # connection, hence the limit.
+    lookups: List[Coroutine[Any, Any, Any]] = [
+        bus.execute(GetAllCatalogs()),
+        repository.get_geographical_coverage_set(),
+        repository.get_service_set(),
+        repository.get_technical_source_set(),
+        bus.execute(GetAllTags()),
+        bus.execute(GetAllDataFormat()),
+        bus.execute(GetLicenseSet()),
+    ]
 
     if query.organization_siret:
-        extra_fields = await bus.execute(
-            GetAllExtraFields(organization_siret=query.organization_siret)
+        lookups.append(
+            bus.execute(GetAllExtraFields(organization_siret=query.organization_siret))
         )
 
+    (
+        catalogs,
+        geographical_coverages,
+        services,
+        technical_sources,
+        tags,
+        formats,
+        licenses,
+        *extra_fields,
+    ) = await gather_bounded(*lookups, limit=settings.query_concurrency)
+
     return DatasetFiltersView(
         organization_siret=[
             catalog.organization
@@ -157,20 +186,96 @@ async def get_dataset_filters(query: GetDatasetFilters) -> DatasetFiltersView:
         technical_source=list(technical_sources),
         tag_id=tags,
         license=["*", *licenses],
-        extra_fields=extra_fields,
+        extra_fields=extra_fields[0] if extra_fields else [],
     )
 
 
-async def get_all_datasets(query: GetAllDatasets) -> Pagination[DatasetView]:
+async def get_all_datasets(query: GetAllDatasets) -> DatasetListView:
     dataset_repository = resolve(DatasetRepository)
 
     datasets, count = await dataset_repository.get_all(
         page=query.page, spec=query.spec, account=query.account
     )
 
-    views = [DatasetView(**dataset.dict(), **extras) for dataset, extras in datasets]
+    views = [
+        DatasetView(**dataset.dict(), headlines=extras.get("headlines"))
+        for dataset, extras in datasets
+    ]
+
+    next_cursor = None
+
+    if len(datasets) == query.page.size:
+        _, last_extras = datasets[-1]
+        next_cursor = last_extras.get("cursor")
+
+    total_items, total_items_exact = _get_total_items(query.page, count, len(views))
+
+    facets = None
+
+    if query.facets:
+        counts = await dataset_repository.get_facets(
+            query.facets, spec=query.spec, account=query.account
+        )
+        facets = DatasetFacetsView.parse_obj(
+            {
+                facet.value: [{"value": value, "count": n} for value, n in values]
+                for facet, values in counts.items()
+            }
+        )
+
+    return DatasetListView(
+        items=views,
+        total_items=total_items,
+        page_size=query.page.size,
+        next_cursor=next_cursor,
+        total_items_exact=total_items_exact,
+        facets=facets,
+    )
+
+
+def _get_total_items(page: Page, count: int, num_items: int) -> Tuple[int, bool]:
+    if page.count_strategy == CountStrategy.EXACT:
+        return count, True
+
+    if page.cursor is None and (num_items > 0 or page.number == 1):
+        num_seen = page.size * (page.number - 1) + num_items
+
+        if num_items < page.size:
+            # This is the last page, so the exact count is known anyway.
+            return num_seen, True
+
+        # Estimates may be off, but not below what we've already seen. Pages past
+        # the end don't tell anything, as previous pages may not be full.
+        count = max(count, num_seen)
+
+    if page.count_strategy == CountStrategy.CAPPED:
+        if count <= CAPPED_COUNT_LIMIT:
+            return count, True
+
+        # Past the cap, the count is a lower bound. It must include the page being
+        # served, and at least one more item after a full page, so that the
+        # number of pages doesn't end before the current one.
+        lower_bound = CAPPED_COUNT_LIMIT
+
+        if page.cursor is None and num_items == page.size:
+            num_seen = page.size * (page.number - 1) + num_items
+            lower_bound = max(lower_bound, num_seen + 1)
+
+        return lower_bound, False
+
+    return count, False
+
+
+async def get_dataset_suggestions(
+    query: GetDatasetSuggestions,
+) -> List[DatasetSuggestionView]:
+    repository = resolve(DatasetRepository)
+
+    suggestions = await repository.get_suggestions(
+        query.q, account=query.account, limit=query.limit
+    )
 
-    return Pagination(items=views, total_items=count, page_size=query.page.size)
+    return [DatasetSuggestionView(**suggestion) for suggestion in suggestions]
 
 
 async def get_dataset_by_id(query: GetDatasetByID) -> DatasetView:
@@ -1,18 +1,30 @@
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 from server.domain.auth.entities import Account
-from server.domain.common.pagination import Page, Pagination
+from server.domain.common.pagination import Page
 from server.domain.common.types import ID, Skip
-from server.domain.datasets.specifications import DatasetSpec
+from server.domain.datasets.specifications import DatasetFacet, DatasetSpec
 from server.seedwork.application.queries import Query
 
-from .views import DatasetFiltersView, DatasetView
+from .views import (
+    DatasetFiltersView,
+    DatasetListView,
+    DatasetSuggestionView,
+    DatasetView,
+)
 
 
-class GetAllDatasets(Query[Pagination[DatasetView]]):
+class GetAllDatasets(Query[DatasetListView]):
     page: Page = Page()
     spec: DatasetSpec = DatasetSpec()
     account: Union[Account, Skip] = Skip()
+    facets: List[DatasetFacet] = []
+
+
+class GetDatasetSuggestions(Query[List[DatasetSuggestionView]]):
+    q: str
+    account: Union[Account, Skip] = Skip()
+    limit: int = 10
 
 
 class GetDatasetByID(Query[DatasetView]):
@@ -1,10 +1,12 @@
 import datetime as dt
-from typing import List, Optional
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
+from pydantic.generics import GenericModel
 
 from server.application.dataformats.views import DataFormatView
 from server.application.extra_fields.views import ExtraFieldView
+from server.domain.common.pagination import Pagination
 from server.domain.common.types import ID
 from server.domain.datasets.entities import PublicationRestriction, UpdateFrequency
 from server.domain.datasets.repositories import DatasetHeadlines
@@ -13,6 +15,8 @@ from ..catalog_records.views import CatalogRecordView
 from ..organizations.views import OrganizationView
 from ..tags.views import TagView
 
+T = TypeVar("T")
+
 
 class ExtraFieldValueView(BaseModel):
     extra_field_id: ID
@@ -42,6 +46,32 @@ class DatasetView(BaseModel):
     headlines: Optional[DatasetHeadlines] = None
 
 
+class FacetValueView(GenericModel, Generic[T]):
+    value: T
+    count: int
+
+
+class DatasetFacetsView(BaseModel):
+    # Values are sorted by decreasing count. Facets which were not requested are
+    # left out.
+    geographical_coverage: Optional[List[FacetValueView[str]]] = None
+    service: Optional[List[FacetValueView[str]]] = None
+    format_id: Optional[List[FacetValueView[int]]] = None
+    tag_id: Optional[List[FacetValueView[ID]]] = None
+    license: Optional[List[FacetValueView[str]]] = None
+
+
+class DatasetListView(Pagination[DatasetView]):
+    items: List[DatasetView]
+    # Counts of matching datasets for each value of requested facets, if any.
+    facets: Optional[DatasetFacetsView] = None
+
+
+class DatasetSuggestionView(BaseModel):
+    id: ID
+    title: str
+
+
 class DatasetFiltersView(BaseModel):
     organization_siret: List[OrganizationView]
     geographical_coverage: List[str]
@@ -75,6 +75,7 @@ from server.domain.extra_fields.repositories import ExtraFieldRepository
 from server.domain.organizations.repositories import OrganizationRepository
 from server.domain.tags.repositories import TagRepository
 from server.infrastructure.adapters.messages import MessageBusAdapter
+from server.infrastructure.auth.caching import AccountTokenCache
 from server.infrastructure.auth.datapass import (
     DataPassOpenIDClient,
     get_datapass_openid_client,
@@ -91,10 +92,17 @@ from server.infrastructure.auth.repositories import (
 from server.infrastructure.catalog_records.repositories import (
     SqlCatalogRecordRepository,
 )
-from server.infrastructure.catalogs.caching import ExportCache
+from server.infrastructure.catalogs.caching import (
+    DirectoryExportCacheBackend,
+    ExportCache,
+    ExportCacheBackend,
+    MemoryExportCacheBackend,
+    SqlExportCacheBackend,
+)
 from server.infrastructure.catalogs.repositories import SqlCatalogRepository
 from server.infrastructure.database import Database
 from server.infrastructure.dataformats.repositories import SqlDataFormatRepository
+from server.infrastructure.datasets.caching import DatasetFiltersCache, DatasetListCache
 from server.infrastructure.datasets.repositories import SqlDatasetRepository
 from server.infrastructure.extra_fields.repositories import SqlExtraFieldRepository
 from server.infrastructure.organizations.repositories import SqlOrganizationRepository
@@ -132,7 +140,15 @@ def configure(container: "Container") -> None:
     container.register_instance(Settings, settings)
 
     # Auth services
-    container.register_instance(PasswordEncoder, Argon2PasswordEncoder())
+    container.register_instance(
+        PasswordEncoder,
+        Argon2PasswordEncoder(
+            time_cost=settings.password_hash_time_cost,
+            memory_cost=settings.password_hash_memory_cost,
+            parallelism=settings.password_hash_parallelism,
+            concurrency=settings.password_hash_concurrency,
+        ),
+    )
     container.register_instance(Signer, ItsDangerousSigner(settings))
     container.register_instance(
         DataPassOpenIDClient, get_datapass_openid_client(settings)
@@ -159,25 +175,81 @@ def configure(container: "Container") -> None:
 
     # Databases
 
-    db = Database(url=settings.env_database_url, debug=settings.debug)
+    db = Database(
+        url=settings.env_database_url,
+        debug=settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+        replica_url=settings.env_db_replica_url,
+        replica_max_lag=settings.db_replica_max_lag,
+    )
     container.register_instance(Database, db)
 
+    # Caching
+    dataset_list_cache = DatasetListCache(max_age=dt.timedelta(minutes=5))
+    container.register_instance(DatasetListCache, dataset_list_cache)
+    dataset_filters_cache = DatasetFiltersCache(max_age=dt.timedelta(minutes=5))
+    container.register_instance(DatasetFiltersCache, dataset_filters_cache)
+    export_cache_backend: ExportCacheBackend
+
+    if settings.export_cache == "directory":
+        export_cache_backend = DirectoryExportCacheBackend(
+            settings.export_cache_directory
+        )
+    elif settings.export_cache == "database":
+        export_cache_backend = SqlExportCacheBackend(db)
+    else:
+        export_cache_backend = MemoryExportCacheBackend(
+            max_bytes=settings.export_cache_max_bytes
+        )
+
+    export_cache = ExportCache(
+        max_age=dt.timedelta(days=1),
+        backend=export_cache_backend,
+        stale_while_revalidate=dt.timedelta(hours=1),
+    )
+    container.register_instance(ExportCache, export_cache)
+    # Short-lived, as tokens changed by other processes are accepted until expiry.
+    account_token_cache = AccountTokenCache(max_age=dt.timedelta(minutes=1))
+    container.register_instance(AccountTokenCache, account_token_cache)
+
     # Repositories
 
-    container.register_instance(AccountRepository, SqlAccountRepository(db))
-    container.register_instance(PasswordUserRepository, SqlPasswordUserRepository(db))
+    container.register_instance(
+        AccountRepository, SqlAccountRepository(db, token_cache=account_token_cache)
+    )
+    container.register_instance(
+        PasswordUserRepository,
+        SqlPasswordUserRepository(db, token_cache=account_token_cache),
+    )
     container.register_instance(DataPassUserRepository, SqlDataPassUserRepository(db))
     container.register_instance(CatalogRecordRepository, SqlCatalogRecordRepository(db))
-    container.register_instance(DatasetRepository, SqlDatasetRepository(db))
-    container.register_instance(TagRepository, SqlTagRepository(db))
+    container.register_instance(
+        DatasetRepository,
+        SqlDatasetRepository(
+            db,
+            cache=dataset_list_cache,
+            filters_cache=dataset_filters_cache,
+            export_cache=export_cache,
+        ),
+    )
+    container.register_instance(
+        TagRepository, SqlTagRepository(db, filters_cache=dataset_filters_cache)
+    )
     container.register_instance(OrganizationRepository, SqlOrganizationRepository(db))
-    container.register_instance(CatalogRepository, SqlCatalogRepository(db))
-    container.register_instance(DataFormatRepository, SqlDataFormatRepository(db))
+    container.register_instance(
+        CatalogRepository, SqlCatalogRepository(db, filters_cache=dataset_filters_cache)
+    )
+    container.register_instance(
+        DataFormatRepository,
+        SqlDataFormatRepository(db, filters_cache=dataset_filters_cache),
+    )
     container.register_instance(ExtraFieldRepository, SqlExtraFieldRepository(db))
 
-    # Caching
-    container.register_instance(ExportCache, ExportCache(max_age=dt.timedelta(days=1)))
-
 
 _CONTAINER = Container(configure)
 
@@ -1,9 +1,12 @@
+import tempfile
+from pathlib import Path
 from typing import Literal, Optional
 
 from pydantic import BaseSettings
 from sqlalchemy.engine.url import make_url
 
 ServerMode = Literal["local", "live"]
+ExportCacheBackendName = Literal["memory", "directory", "database"]
 
 
 class Settings(BaseSettings):
@@ -12,6 +15,17 @@ class Settings(BaseSettings):
     secret_key: str
     server_mode: ServerMode = "local"
     database_url: str = "postgresql+asyncpg://localhost:5432/catalogage"
+    # Connection pool of each process. Defaults are those of SQLAlchemy.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 100
+    # Read replica serving listings, search filters and exports. Reads go to the
+    # primary for `db_replica_max_lag` seconds after each write of the process.
+    db_replica_url: Optional[str] = None
+    db_replica_max_lag: float = 5
     client_url: str = "http://localhost:3000"
     datapass_url: str = "https://app-staging.moncomptepro.beta.gouv.fr"
     datapass_client_id: str = "<define-me>"
@@ -23,6 +37,19 @@ class Settings(BaseSettings):
     debug: bool = False
     testing: bool = False
     sentry_dsn: Optional[str] = None
+    # Maximum number of database queries a single request may run concurrently.
+    query_concurrency: int = 4
+    # Argon2 parameters for new password hashes (memory cost in KiB). Defaults are
+    # those of argon2-cffi, i.e. the second recommended option of RFC 9106.
+    password_hash_time_cost: int = 3
+    password_hash_memory_cost: int = 65536
+    password_hash_parallelism: int = 4
+    # Maximum number of passwords each process may hash concurrently.
+    password_hash_concurrency: int = 2
+    export_cache: ExportCacheBackendName = "memory"
+    export_cache_directory: Path = Path(tempfile.gettempdir()) / "catalogage-exports"
+    # Maximum total size of exports cached in memory by each process.
+    export_cache_max_bytes: int = 64 * 1024 * 1024
 
     class Config:
         env_prefix = "app_"
@@ -45,3 +72,8 @@ class Settings(BaseSettings):
     @property
     def env_database_url(self) -> str:
         return self.test_database_url if self.testing else self.database_url
+
+    @property
+    def env_db_replica_url(self) -> Optional[str]:
+        # Tests only use the test database.
+        return None if self.testing else self.db_replica_url
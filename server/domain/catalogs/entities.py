@@ -1,3 +1,4 @@
+import enum
 from typing import List
 
 from pydantic import Field
@@ -12,3 +13,9 @@ from ..organizations.entities import Organization
 class Catalog(Entity):
     organization: Organization
     extra_fields: List[Annotated[ExtraField, Field(discriminator="type")]]
+
+
+class ExportFormat(enum.Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    JSONLD = "jsonld"
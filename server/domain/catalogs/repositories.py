@@ -10,7 +10,7 @@ class CatalogRepository(Repository):
     async def get_by_siret(self, siret: Siret) -> Optional[Catalog]:
         raise NotImplementedError  # pragma: no cover
 
-    async def get_all(self) -> List[Catalog]:
+    async def get_all(self, with_extra_fields: bool = False) -> List[Catalog]:
         raise NotImplementedError  # pragma: no cover
 
     async def insert(self, catalog: Catalog) -> Siret:
@@ -13,3 +13,8 @@ class AlreadyExists(Exception):
 
     def __init__(self, pk: Any) -> None:
         super().__init__(f"{self.entity_name} already exists: {pk!r}")
+
+
+class InvalidCursor(Exception):
+    def __init__(self, cursor: str) -> None:
+        super().__init__(f"Invalid pagination cursor: {cursor!r}")
@@ -1,4 +1,7 @@
-from typing import Any, Generic, List, TypeVar, cast
+import base64
+import enum
+import json
+from typing import Any, Generic, List, Optional, Sequence, TypeVar, cast
 
 from pydantic import BaseModel, Field
 from pydantic.generics import GenericModel
@@ -6,12 +9,33 @@ from typing_extensions import Annotated
 
 from server.infrastructure.helpers.pydantic import Computed
 
+from .exceptions import InvalidCursor
+
 T = TypeVar("T")
 
+# Counting stops past this many items when using `CountStrategy.CAPPED`.
+CAPPED_COUNT_LIMIT = 10_000
+
+
+class CountStrategy(enum.Enum):
+    # Count all matching items.
+    EXACT = "exact"
+    # Count at most `CAPPED_COUNT_LIMIT` items, e.g. to display "10 000+ results".
+    CAPPED = "capped"
+    # Use the query planner's estimate of the number of matching items.
+    ESTIMATED = "estimated"
+
 
 class Page(BaseModel):
     number: Annotated[int, Field(ge=1, le=10_000)] = 1
     size: Annotated[int, Field(ge=1)] = 10
+    # Opaque keyset pagination cursor, as returned in `Pagination.next_cursor`.
+    # When set, results start right after the row it points to and `number`
+    # is ignored.
+    cursor: Optional[str] = None
+    # Counting all matching items can cost more than fetching the page itself on
+    # large result sets. Other strategies trade accuracy of `total_items` for speed.
+    count_strategy: CountStrategy = CountStrategy.EXACT
 
     class Config:
         allow_mutation = False
@@ -24,6 +48,27 @@ class Pagination(GenericModel, Generic[T]):
     total_pages: Computed[int] = cast(
         Any, Field(Computed.Expr("math.ceil(total_items / page_size)"))
     )
+    next_cursor: Optional[str] = None
+    # False when `total_items` is a lower bound or an estimate, see `CountStrategy`.
+    total_items_exact: bool = True
 
     class Config:
         allow_mutation = False
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    data = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except ValueError:
+        raise InvalidCursor(cursor)
+
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+
+    return values
@@ -1,4 +1,4 @@
-from typing import List, Optional, Set, Tuple, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from typing_extensions import TypedDict
 
@@ -8,7 +8,7 @@ from server.seedwork.domain.repositories import Repository
 from ..common.pagination import Page
 from ..common.types import ID, Skip, id_factory
 from .entities import Dataset
-from .specifications import DatasetSpec
+from .specifications import DatasetFacet, DatasetSpec
 
 
 class DatasetHeadlines(TypedDict):
@@ -18,6 +18,12 @@ class DatasetHeadlines(TypedDict):
 
 class DatasetGetAllExtras(TypedDict, total=False):
     headlines: DatasetHeadlines
+    cursor: str
+
+
+class DatasetSuggestion(TypedDict):
+    id: ID
+    title: str
 
 
 class DatasetRepository(Repository):
@@ -33,6 +39,40 @@ class DatasetRepository(Repository):
     ) -> Tuple[List[Tuple[Dataset, DatasetGetAllExtras]], int]:
         raise NotImplementedError  # pragma: no cover
 
+    def stream_all(
+        self,
+        *,
+        account: Union[Account, Skip] = Skip(),
+        spec: DatasetSpec = DatasetSpec(),
+        by_organization: bool = False,
+    ) -> AsyncIterator[Dataset]:
+        """
+        Iterate over all matching datasets, fetching them in batches as they are
+        consumed rather than all at once.
+
+        If `by_organization` is true, datasets are grouped by organization, sorted
+        by SIRET.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_facets(
+        self,
+        facets: Sequence[DatasetFacet],
+        *,
+        account: Union[Account, Skip] = Skip(),
+        spec: DatasetSpec = DatasetSpec(),
+    ) -> Dict[DatasetFacet, List[Tuple[Any, int]]]:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_suggestions(
+        self,
+        q: str,
+        *,
+        account: Union[Account, Skip] = Skip(),
+        limit: int = 10,
+    ) -> List[DatasetSuggestion]:
+        raise NotImplementedError  # pragma: no cover
+
     async def get_by_id(self, id: ID) -> Optional[Dataset]:
         raise NotImplementedError  # pragma: no cover
 
@@ -1,3 +1,4 @@
+import enum
 from dataclasses import dataclass
 from typing import List, Optional, Sequence
 
@@ -19,3 +20,12 @@ class DatasetSpec:
     license: Optional[str] = None
     extra_field_values: Optional[List[ExtraFieldValue]] = None
     include_all_datasets: bool = False
+
+
+class DatasetFacet(enum.Enum):
+    # Values match the names of the related filters, see `DatasetFiltersView`.
+    GEOGRAPHICAL_COVERAGE = "geographical_coverage"
+    SERVICE = "service"
+    FORMAT_ID = "format_id"
+    TAG_ID = "tag_id"
+    LICENSE = "license"
@@ -0,0 +1,70 @@
+import datetime as dt
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from server.domain.auth.entities import Account
+from server.domain.common.datetime import now
+from server.domain.common.types import ID
+
+_Entry = Tuple[dt.datetime, Account]
+
+
+class AccountTokenCache:
+    """
+    Cache accounts by API token, as each authenticated request looks up its token.
+
+    Writes to accounts invalidate their entries, see `invalidate()`. These only
+    cover writes made by this process, so entries also expire after `max_age`: a
+    token changed by another process may keep being accepted until then.
+    """
+
+    def __init__(
+        self,
+        max_age: dt.timedelta,
+        max_size: int = 1000,
+        nowfunc: Callable[[], dt.datetime] = now,
+    ) -> None:
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._max_age = max_age
+        self._max_size = max_size
+        self._now = nowfunc
+        # See `DatasetListCache`.
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, api_token: str) -> Optional[Account]:
+        try:
+            expiry_date, account = self._entries[api_token]
+        except KeyError:
+            return None
+
+        if self._now() > expiry_date:
+            del self._entries[api_token]
+            return None
+
+        self._entries.move_to_end(api_token)
+
+        # Entities are mutable.
+        return account.copy()
+
+    def set(self, account: Account, generation: int) -> None:
+        if generation != self._generation:
+            # An account was written while this one was being fetched.
+            return
+
+        key = account.api_token
+        self._entries[key] = (self._now() + self._max_age, account.copy())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, account_id: ID) -> None:
+        self._generation += 1
+
+        for api_token, (_, account) in list(self._entries.items()):
+            if account.id == account_id:
+                del self._entries[api_token]
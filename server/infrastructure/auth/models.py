@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import CHAR, Column, Enum, ForeignKey, String
+from sqlalchemy import CHAR, Column, Enum, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -43,6 +43,11 @@ class AccountModel(Base):
         "DataPassUserModel", back_populates="account", uselist=False
     )
 
+    __table_args__ = (
+        # Tokens are looked up on each authenticated request, by equality only.
+        Index("ix_account_api_token", api_token, postgresql_using="HASH"),
+    )
+
 
 class PasswordUserModel(Base):
     """
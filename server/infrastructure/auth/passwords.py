@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import argon2
 import itsdangerous
 from pydantic import SecretStr
@@ -7,13 +10,40 @@ from server.config.settings import Settings
 
 
 class Argon2PasswordEncoder(PasswordEncoder):
-    def __init__(self) -> None:
-        self._hasher = argon2.PasswordHasher()
-
-    def hash(self, password: SecretStr) -> str:
+    """
+    Hash passwords with Argon2.
+
+    Hashing is slow by design (tens of milliseconds with default parameters), so it
+    runs in a pool of `concurrency` threads instead of blocking the event loop.
+    argon2-cffi releases the GIL while hashing.
+    """
+
+    def __init__(
+        self,
+        time_cost: int = argon2.DEFAULT_TIME_COST,
+        memory_cost: int = argon2.DEFAULT_MEMORY_COST,
+        parallelism: int = argon2.DEFAULT_PARALLELISM,
+        concurrency: int = 2,
+    ) -> None:
+        self._hasher = argon2.PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="argon2"
+        )
+
+    async def hash(self, password: SecretStr) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._hash, password)
+
+    async def verify(self, password: SecretStr, hash: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._verify, password, hash)
+
+    def _hash(self, password: SecretStr) -> str:
         return self._hasher.hash(password.get_secret_value())
 
-    def verify(self, password: SecretStr, hash: str) -> bool:
+    def _verify(self, password: SecretStr, hash: str) -> bool:
         try:
             return self._hasher.verify(hash, password.get_secret_value())
         except argon2.exceptions.VerificationError:
@@ -15,6 +15,7 @@ from server.domain.auth.repositories import (
 from server.domain.common.types import ID
 
 from ..database import Database
+from .caching import AccountTokenCache
 from .models import AccountModel, DataPassUserModel, PasswordUserModel
 from .transformers import (
     make_account_entity,
@@ -28,8 +29,11 @@ from .transformers import (
 
 
 class SqlAccountRepository(AccountRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self, db: Database, token_cache: Optional[AccountTokenCache] = None
+    ) -> None:
         self._db = db
+        self._token_cache = token_cache
 
     async def _maybe_get_by(
         self, session: AsyncSession, *whereclauses: Any
@@ -46,6 +50,22 @@ class SqlAccountRepository(AccountRepository):
             return make_account_entity(instance)
 
     async def get_by_api_token(self, api_token: str) -> Optional[Account]:
+        if self._token_cache is None:
+            return await self._get_by_api_token(api_token)
+
+        if (account := self._token_cache.get(api_token)) is not None:
+            return account
+
+        generation = self._token_cache.generation
+        account = await self._get_by_api_token(api_token)
+
+        # Unknown tokens are not cached, so that they can't be used to fill the cache.
+        if account is not None:
+            self._token_cache.set(account, generation)
+
+        return account
+
+    async def _get_by_api_token(self, api_token: str) -> Optional[Account]:
         async with self._db.session() as session:
             instance = await self._maybe_get_by(
                 session, AccountModel.api_token == api_token
@@ -66,8 +86,11 @@ class SqlAccountRepository(AccountRepository):
 
 
 class SqlPasswordUserRepository(PasswordUserRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self, db: Database, token_cache: Optional[AccountTokenCache] = None
+    ) -> None:
         self._db = db
+        self._token_cache = token_cache
 
     async def _maybe_get_by(
         self, session: AsyncSession, *whereclauses: Any
@@ -116,6 +139,8 @@ class SqlPasswordUserRepository(PasswordUserRepository):
 
             await session.commit()
 
+        self._invalidate_cache(entity.account_id)
+
     async def delete(self, account_id: ID) -> None:
         async with self._db.session() as session:
             instance = await self._maybe_get_by(
@@ -128,6 +153,12 @@ class SqlPasswordUserRepository(PasswordUserRepository):
             await session.delete(instance)
             await session.commit()
 
+        self._invalidate_cache(account_id)
+
+    def _invalidate_cache(self, account_id: ID) -> None:
+        if self._token_cache is not None:
+            self._token_cache.invalidate(account_id)
+
 
 class SqlDataPassUserRepository(DataPassUserRepository):
     def __init__(self, db: Database) -> None:
@@ -43,7 +43,7 @@ def update_instance(instance: PasswordUserModel, entity: PasswordUser) -> None:
         setattr(instance, field, getattr(entity, field))
 
     for field in set(Account.__fields__) - {"id"}:
-        setattr(instance, field, getattr(entity.account, field))
+        setattr(instance.account, field, getattr(entity.account, field))
 
 
 def make_datapass_user_instance(entity: DataPassUser) -> DataPassUserModel:
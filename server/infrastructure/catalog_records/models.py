@@ -20,7 +20,10 @@ class CatalogRecordModel(Base):
 
     id: ID = Column(UUID(as_uuid=True), primary_key=True)
     created_at: dt.datetime = Column(
-        DateTime(timezone=True), server_default=func.clock_timestamp(), nullable=False
+        DateTime(timezone=True),
+        server_default=func.clock_timestamp(),
+        nullable=False,
+        index=True,
     )
     organization_siret: Siret = Column(
         CHAR(14), ForeignKey("catalog.organization_siret"), nullable=False, index=True
@@ -1,50 +1,761 @@
+import asyncio
 import datetime as dt
-from typing import Callable, Dict, Optional, Tuple
+import enum
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Set, Tuple
 
-from server.domain.common.datetime import now
+import brotli
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.domain.catalogs.entities import ExportFormat
+from server.domain.common.datetime import now, parse
 from server.domain.organizations.types import Siret
 
+from ..database import Database
+from .models import CatalogExportModel, CatalogExportVersionModel
+
+logger = logging.getLogger(__name__)
+
+
+class ContentEncoding(enum.Enum):
+    IDENTITY = "identity"
+    GZIP = "gzip"
+    BROTLI = "br"
+
+
+class ExportCacheEntry(NamedTuple):
+    content: bytes
+    etag: str
+    # Time at which the export was generated. Entries are invalidated when
+    # datasets of the catalog change, so the catalog hasn't changed since.
+    last_modified: dt.datetime
+    encoding: ContentEncoding = ContentEncoding.IDENTITY
+
+
+_Entry = Tuple[dt.datetime, ExportCacheEntry]
+_Variants = Dict[ContentEncoding, ExportCacheEntry]
+
+
+class ExportCacheUsage(NamedTuple):
+    entries: int
+    bytes: int
+    evictions: int
+    # Entries not stored because they are larger than the cap on their own.
+    rejected: int
+
+
+class ExportCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    # Only known for backends local to the process, `None` otherwise.
+    entries: Optional[int]
+    bytes: Optional[int]
+    evictions: Optional[int]
+    rejected: Optional[int]
+
+
+class ExportCacheBackend:
+    """
+    Storage of cached exports, along with their expiry date.
+
+    Each catalog also has a version, incremented when its exports are invalidated,
+    so that exports generated from data read before are not stored, see `set_all()`.
+    """
+
+    @property
+    def usage(self) -> Optional[ExportCacheUsage]:
+        return None
+
+    async def get(self, key: str) -> Optional[_Entry]:
+        raise NotImplementedError  # pragma: no cover
+
+    async def set(
+        self, key: str, entry: ExportCacheEntry, expiry_date: dt.datetime
+    ) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_version(self, siret: Siret) -> int:
+        raise NotImplementedError  # pragma: no cover
+
+    async def invalidate(self, siret: Siret) -> None:
+        """
+        Increment the version of the catalog, then delete all of its exports.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    async def set_all(
+        self,
+        siret: Siret,
+        entries: Dict[str, Optional[ExportCacheEntry]],
+        expiry_date: dt.datetime,
+        version: int,
+    ) -> bool:
+        """
+        Store exports of the catalog (or delete them if `None`), unless the catalog
+        was invalidated since `version` was read. Return whether they were stored.
+        """
+        if await self.get_version(siret) != version:
+            return False
+
+        for key, entry in entries.items():
+            if entry is None:
+                await self.delete(key)
+            else:
+                await self.set(key, entry, expiry_date)
+
+        # The catalog may have been invalidated while entries were being written.
+        # `invalidate()` deletes exports after incrementing the version, so either
+        # it deletes these entries, or the new version shows up here.
+        if await self.get_version(siret) != version:
+            for key in entries:
+                await self.delete(key)
+
+            return False
+
+        return True
+
+
+class MemoryExportCacheBackend(ExportCacheBackend):
+    """
+    Store exports in memory. Each process has its own copy.
+
+    Exports are large, so the total size of contents is capped to `max_bytes`, by
+    evicting least recently used entries.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._versions: Dict[Siret, int] = {}
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._evictions = 0
+        self._rejected = 0
+
+    @property
+    def usage(self) -> ExportCacheUsage:
+        return ExportCacheUsage(
+            entries=len(self._entries),
+            bytes=self._bytes,
+            evictions=self._evictions,
+            rejected=self._rejected,
+        )
+
+    async def get(self, key: str) -> Optional[_Entry]:
+        item = self._entries.get(key)
+
+        if item is not None:
+            self._entries.move_to_end(key)
+
+        return item
+
+    async def set(
+        self, key: str, entry: ExportCacheEntry, expiry_date: dt.datetime
+    ) -> None:
+        self._pop(key)
+
+        size = len(entry.content)
+
+        if size > self._max_bytes:
+            # Storing it would evict all other entries.
+            self._rejected += 1
+            return
+
+        self._entries[key] = (expiry_date, entry)
+        self._bytes += size
+
+        while self._bytes > self._max_bytes:
+            self._pop(next(iter(self._entries)))
+            self._evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._pop(key)
+
+    async def get_version(self, siret: Siret) -> int:
+        return self._versions.get(siret, 0)
+
+    async def invalidate(self, siret: Siret) -> None:
+        self._versions[siret] = self._versions.get(siret, 0) + 1
+
+        for key in [key for key in self._entries if key.startswith(f"{siret}.")]:
+            self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+
+        if item is not None:
+            _, entry = item
+            self._bytes -= len(entry.content)
+
+
+_FILENAME_RE = re.compile(r"[\w.-]+")
+
+
+class DirectoryExportCacheBackend(ExportCacheBackend):
+    """
+    Store exports as files in a directory, shared by processes of the same host.
+
+    Files are written to a temporary file then renamed, so that readers never see
+    a partially written export. The expiry date is stored as the modification
+    time of files, and other metadata (ETag, last modification date and encoding)
+    as a header line. Versions of catalogs are
+    stored in `<siret>.version` files.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+
+    def _path(self, key: str) -> Path:
+        if not _FILENAME_RE.fullmatch(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+
+        return self._directory / key
+
+    def _read(self, key: str) -> Optional[_Entry]:
+        try:
+            with self._path(key).open("rb") as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                header = f.readline().decode()
+                content = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            etag, last_modified, encoding = header.split()
+        except ValueError:
+            # Written by a previous version, without the encoding.
+            return None
+
+        entry = ExportCacheEntry(
+            content=content,
+            etag=etag,
+            last_modified=parse(last_modified),
+            encoding=ContentEncoding(encoding),
+        )
+
+        return dt.datetime.fromtimestamp(mtime, dt.timezone.utc), entry
+
+    def _write(
+        self, key: str, entry: ExportCacheEntry, expiry_date: dt.datetime
+    ) -> None:
+        path = self._path(key)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=self._directory, prefix=".tmp-")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                header = (
+                    f"{entry.etag} {entry.last_modified.isoformat()} "
+                    f"{entry.encoding.value}\n"
+                )
+                f.write(header.encode())
+                f.write(entry.content)
+
+            timestamp = expiry_date.timestamp()
+            os.utime(tmp, (timestamp, timestamp))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def _read_version(self, siret: Siret) -> int:
+        try:
+            return int(self._path(f"{siret}.version").read_text())
+        except FileNotFoundError:
+            return 0
+
+    def _invalidate(self, siret: Siret) -> None:
+        path = self._path(f"{siret}.version")
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=self._directory, prefix=".tmp-")
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(str(self._read_version(siret) + 1))
+
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        for export_path in self._directory.glob(f"{siret}.*"):
+            if export_path != path:
+                export_path.unlink(missing_ok=True)
+
+    # Don't block the event loop on file I/O.
+    # NOTE: asyncio.to_thread() requires Python 3.9.
+
+    async def get(self, key: str) -> Optional[_Entry]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._read, key)
+
+    async def set(
+        self, key: str, entry: ExportCacheEntry, expiry_date: dt.datetime
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, key, entry, expiry_date)
+
+    async def delete(self, key: str) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._delete, key)
+
+    async def get_version(self, siret: Siret) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._read_version, siret)
+
+    async def invalidate(self, siret: Siret) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._invalidate, siret)
+
+
+class SqlExportCacheBackend(ExportCacheBackend):
+    """
+    Store exports in the database, shared by all processes of the deployment.
+    """
+
+    def __init__(self, db: Database) -> None:
+        self._db = db
+
+    async def get(self, key: str) -> Optional[_Entry]:
+        async with self._db.session() as session:
+            stmt = select(
+                CatalogExportModel.expiry_date,
+                CatalogExportModel.content,
+                CatalogExportModel.etag,
+                CatalogExportModel.last_modified,
+                CatalogExportModel.encoding,
+            ).where(CatalogExportModel.key == key)
+            result = await session.execute(stmt)
+            row = result.one_or_none()
+
+        if row is None:
+            return None
+
+        expiry_date, content, etag, last_modified, encoding = row
+        entry = ExportCacheEntry(
+            content=content,
+            etag=etag,
+            last_modified=last_modified,
+            encoding=ContentEncoding(encoding),
+        )
+        return expiry_date, entry
+
+    async def set(
+        self, key: str, entry: ExportCacheEntry, expiry_date: dt.datetime
+    ) -> None:
+        async with self._db.session() as session:
+            await self._upsert(session, key, entry, expiry_date)
+            await session.commit()
+
+    async def _upsert(
+        self,
+        session: AsyncSession,
+        key: str,
+        entry: ExportCacheEntry,
+        expiry_date: dt.datetime,
+    ) -> None:
+        values = {
+            "content": entry.content,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "encoding": entry.encoding.value,
+            "expiry_date": expiry_date,
+        }
+        stmt = insert(CatalogExportModel).values(key=key, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CatalogExportModel.key], set_=values
+        )
+        await session.execute(stmt)
+
+    async def delete(self, key: str) -> None:
+        async with self._db.session() as session:
+            await session.execute(
+                delete(CatalogExportModel).where(CatalogExportModel.key == key)
+            )
+            await session.commit()
+
+    async def get_version(self, siret: Siret) -> int:
+        async with self._db.session() as session:
+            stmt = select(CatalogExportVersionModel.version).where(
+                CatalogExportVersionModel.organization_siret == siret
+            )
+            result = await session.execute(stmt)
+            version = result.scalar_one_or_none()
+
+        return version if version is not None else 0
+
+    async def invalidate(self, siret: Siret) -> None:
+        async with self._db.session() as session:
+            stmt = insert(CatalogExportVersionModel).values(
+                organization_siret=siret, version=1
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CatalogExportVersionModel.organization_siret],
+                set_={"version": CatalogExportVersionModel.version + 1},
+            )
+            await session.execute(stmt)
+            await session.execute(
+                delete(CatalogExportModel)
+                .where(CatalogExportModel.key.startswith(f"{siret}.", autoescape=True))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def set_all(
+        self,
+        siret: Siret,
+        entries: Dict[str, Optional[ExportCacheEntry]],
+        expiry_date: dt.datetime,
+        version: int,
+    ) -> bool:
+        async with self._db.session() as session:
+            # Lock the version row until entries are committed: a concurrent
+            # `invalidate()` either commits first, so that its new version is read
+            # here, or waits for entries to be committed, then deletes them.
+            stmt = insert(CatalogExportVersionModel).values(
+                organization_siret=siret, version=0
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CatalogExportVersionModel.organization_siret],
+                set_={"version": CatalogExportVersionModel.version},
+            ).returning(CatalogExportVersionModel.version)
+            result = await session.execute(stmt)
+
+            if result.scalar_one() != version:
+                return False
+
+            for key, entry in entries.items():
+                if entry is None:
+                    await session.execute(
+                        delete(CatalogExportModel).where(CatalogExportModel.key == key)
+                    )
+                else:
+                    await self._upsert(session, key, entry, expiry_date)
+
+            await session.commit()
+
+        return True
+
+
+def _make_key(
+    siret: Siret,
+    fmt: ExportFormat,
+    encoding: ContentEncoding = ContentEncoding.IDENTITY,
+) -> str:
+    key = f"{siret}.{fmt.value}"
+
+    if encoding != ContentEncoding.IDENTITY:
+        key += f".{encoding.value}"
+
+    return key
+
+
+# Compressing small exports isn't worth it, see Starlette's GZipMiddleware.
+COMPRESSION_MIN_SIZE = 500
+
+
+def _compress(content: bytes) -> Dict[ContentEncoding, bytes]:
+    variants = {ContentEncoding.IDENTITY: content}
+
+    if len(content) < COMPRESSION_MIN_SIZE:
+        return variants
+
+    # Exports are compressed once, but may be large: favor speed over ratio.
+    # Use a fixed mtime, so that the output (hence the ETag) is deterministic.
+    variants[ContentEncoding.GZIP] = gzip.compress(content, compresslevel=6, mtime=0)
+    variants[ContentEncoding.BROTLI] = brotli.compress(content, quality=6)
+
+    return {
+        encoding: data
+        for encoding, data in variants.items()
+        if encoding == ContentEncoding.IDENTITY or len(data) < len(content)
+    }
+
 
 class ExportCache:
     """
     Implement two types of cache to reduce the load associated to exporting catalogs:
 
-    * Client-side caching, by adding 'Cache-Control' headers.
-      Individual clients will only make new requests when their cache entry has expired.
+    * Client-side caching, by adding 'ETag' and 'Last-Modified' headers.
+      Clients revalidate their copy with conditional requests, and only download
+      the export again when the catalog has changed.
+
+    * Server-side caching, by storing exports in a backend and reusing them for new
+      clients until datasets of the catalog change, see `invalidate()`. Backends
+      other than memory are shared by processes, so that each export is generated
+      only once. Entries also expire after `max_age`, so that other changes (e.g.
+      renaming an organization) are eventually reflected.
 
-    * Server-side caching, by storing exports in memory and reusing them for new
-      clients until we consider them as stale (configurable).
+    Exports are stored for each format, along with gzip and brotli compressed
+    variants, so that they are compressed only once. Within a process, concurrent
+    requests for a missing export wait for a single regeneration, see `claim()`.
+    Expired entries may also keep being served for `stale_while_revalidate` while
+    they are regenerated in the background.
     """
 
     def __init__(
-        self, max_age: dt.timedelta, nowfunc: Callable[[], dt.datetime] = now
+        self,
+        max_age: dt.timedelta,
+        backend: Optional[ExportCacheBackend] = None,
+        stale_while_revalidate: dt.timedelta = dt.timedelta(0),
+        claim_timeout: dt.timedelta = dt.timedelta(minutes=1),
+        max_entry_bytes: int = 64 * 1024 * 1024,
+        nowfunc: Callable[[], dt.datetime] = now,
     ) -> None:
-        self._exports: Dict[str, Tuple[dt.datetime, str]] = {}
+        self._backend = backend if backend is not None else MemoryExportCacheBackend()
         self._max_age = max_age
-        self._cache_control = f"max-age={int(self._max_age.total_seconds())}"
+        self._max_entry_bytes = max_entry_bytes
+        self._stale_while_revalidate = stale_while_revalidate
+        self._claim_timeout = claim_timeout
         self._now = nowfunc
+        # Exports being regenerated, resolved with the new entries, or with `None`
+        # if they could not be stored.
+        self._pending: Dict[str, "asyncio.Future[Optional[_Variants]]"] = {}
+        # Keep references to background tasks, so they don't get garbage collected.
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._hits = 0
+        self._misses = 0
 
-    def get(self, siret: Siret) -> Optional[str]:
-        try:
-            expiry_date, content = self._exports[siret]
-        except KeyError:
+    async def get_generation(self, siret: Siret) -> int:
+        """
+        Return the version of exports of the catalog, to be read before generating
+        an export and passed to `set()`.
+        """
+        return await self._backend.get_version(siret)
+
+    @property
+    def max_entry_bytes(self) -> int:
+        """
+        Exports larger than this are not stored, so that they are never held in
+        memory as a whole.
+        """
+        return self._max_entry_bytes
+
+    def now(self) -> dt.datetime:
+        # HTTP dates have a resolution of one second.
+        return self._now().replace(microsecond=0)
+
+    async def get(
+        self,
+        siret: Siret,
+        fmt: ExportFormat = ExportFormat.CSV,
+        revalidate: Optional[Callable[[], Awaitable[bytes]]] = None,
+        encoding: ContentEncoding = ContentEncoding.IDENTITY,
+    ) -> Optional[ExportCacheEntry]:
+        """
+        Return the cached export, if any.
+
+        The variant with the given `encoding` is returned if it is available,
+        otherwise the uncompressed export is returned.
+
+        If `revalidate` is given, expired entries are returned as long as they are
+        within the stale-while-revalidate window, and `revalidate()` is run in the
+        background to regenerate them.
+        """
+        key = _make_key(siret, fmt, encoding)
+        item = await self._backend.get(key)
+
+        if item is None and encoding != ContentEncoding.IDENTITY:
+            key = _make_key(siret, fmt)
+            item = await self._backend.get(key)
+
+        if item is None:
+            self._misses += 1
             return None
 
+        expiry_date, entry = item
+
         is_stale = self._now() > expiry_date
 
-        if is_stale:
-            del self._exports[siret]
+        if not is_stale:
+            self._hits += 1
+            return entry
+
+        if self._now() > expiry_date + self._stale_while_revalidate:
+            await self._backend.delete(key)
+            self._misses += 1
             return None
 
-        return content
+        if revalidate is None:
+            self._misses += 1
+            return None
 
-    def set(self, siret: Siret, content: str) -> None:
-        self._exports[siret] = (self._now() + self._max_age, content)
+        pending_key = _make_key(siret, fmt)
 
-    @property
-    def hit_headers(self) -> dict:
-        return {"Cache-Control": self._cache_control, "X-Cache": "HIT"}
+        if pending_key not in self._pending:
+            self._pending[pending_key] = asyncio.get_running_loop().create_future()
+            task = asyncio.create_task(self._revalidate(siret, fmt, revalidate))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        self._hits += 1
+        return entry
+
+    async def _revalidate(
+        self,
+        siret: Siret,
+        fmt: ExportFormat,
+        revalidate: Callable[[], Awaitable[bytes]],
+    ) -> None:
+        generation = await self.get_generation(siret)
+        last_modified = self.now()
+
+        try:
+            content = await revalidate()
+            await self.set(siret, content, last_modified, generation, fmt=fmt)
+        except Exception:
+            logger.exception(
+                "Failed to regenerate %s export of catalog %s", fmt.value, siret
+            )
+        finally:
+            self.release(siret, fmt)
+
+    async def claim(
+        self,
+        siret: Siret,
+        fmt: ExportFormat = ExportFormat.CSV,
+        encoding: ContentEncoding = ContentEncoding.IDENTITY,
+    ) -> Optional[ExportCacheEntry]:
+        """
+        Wait for the export to be regenerated if it is already being regenerated,
+        and return the new entry, see `get()` regarding `encoding`.
+
+        Otherwise, return `None`: the caller must then regenerate the export, and
+        store it using `set()`, or call `release()` if it fails to.
+        """
+        key = _make_key(siret, fmt)
+
+        while True:
+            future = self._pending.get(key)
+
+            if future is None:
+                self._pending[key] = asyncio.get_running_loop().create_future()
+                return None
+
+            try:
+                # Don't cancel the regeneration if the caller gets cancelled.
+                variants = await asyncio.wait_for(
+                    asyncio.shield(future), self._claim_timeout.total_seconds()
+                )
+            except asyncio.TimeoutError:
+                # The regeneration may have been abandoned, e.g. if its client
+                # disconnected before the export could be sent. Take over.
+                if self._pending.get(key) is future:
+                    self.release(siret, fmt)
+                continue
+
+            if variants is not None:
+                return variants.get(encoding, variants[ContentEncoding.IDENTITY])
+
+    def release(self, siret: Siret, fmt: ExportFormat = ExportFormat.CSV) -> None:
+        # Let waiters regenerate the export themselves.
+        future = self._pending.pop(_make_key(siret, fmt), None)
+
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def set(
+        self,
+        siret: Siret,
+        content: bytes,
+        last_modified: dt.datetime,
+        generation: int,
+        fmt: ExportFormat = ExportFormat.CSV,
+    ) -> None:
+        if len(content) > self._max_entry_bytes:
+            self.release(siret, fmt)
+            return
+
+        try:
+            # Don't block the event loop while compressing large exports.
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(None, _compress, content)
+        except BaseException:
+            self.release(siret, fmt)
+            raise
+
+        # Each variant has its own ETag, as required for strong validators.
+        variants = {
+            encoding: ExportCacheEntry(
+                content=data,
+                etag=f'"{hashlib.sha256(data).hexdigest()[:32]}"',
+                last_modified=last_modified,
+                encoding=encoding,
+            )
+            for encoding, data in compressed.items()
+        }
+        expiry_date = self._now() + self._max_age
+        # Variants of a previous version of the export which are missing now are
+        # deleted.
+        entries = {
+            _make_key(siret, fmt, encoding): variants.get(encoding)
+            for encoding in ContentEncoding
+        }
+
+        try:
+            stored = await self._backend.set_all(
+                siret, entries, expiry_date, generation
+            )
+        except BaseException:
+            self.release(siret, fmt)
+            raise
+
+        if not stored:
+            # A dataset was written while the export was being generated.
+            self.release(siret, fmt)
+            return
+
+        future = self._pending.pop(_make_key(siret, fmt), None)
+
+        if future is not None and not future.done():
+            future.set_result(variants)
+
+    async def invalidate(self, siret: Siret) -> None:
+        await self._backend.invalidate(siret)
 
     @property
-    def miss_headers(self) -> dict:
-        return {"Cache-Control": self._cache_control}
+    def stats(self) -> ExportCacheStats:
+        usage = self._backend.usage
+
+        return ExportCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            entries=usage.entries if usage is not None else None,
+            bytes=usage.bytes if usage is not None else None,
+            evictions=usage.evictions if usage is not None else None,
+            rejected=usage.rejected if usage is not None else None,
+        )
+
+    def hit_headers(self, entry: ExportCacheEntry) -> dict:
+        return {
+            **self.miss_headers(entry.last_modified),
+            "ETag": entry.etag,
+            "X-Cache": "HIT",
+        }
+
+    def miss_headers(self, last_modified: dt.datetime) -> dict:
+        # Exports are public, but may change at any time: clients must revalidate.
+        return {
+            "Cache-Control": "no-cache",
+            "Last-Modified": format_datetime(
+                last_modified.astimezone(dt.timezone.utc), usegmt=True
+            ),
+            "Vary": "Accept-Encoding",
+        }
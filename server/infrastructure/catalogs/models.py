@@ -1,7 +1,16 @@
 import datetime as dt
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import CHAR, Column, DateTime, ForeignKey, func
+from sqlalchemy import (
+    CHAR,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from server.domain.organizations.types import Siret
@@ -41,3 +50,25 @@ class CatalogModel(Base):
         "ExtraFieldModel",
         back_populates="catalog",
     )
+
+
+class CatalogExportModel(Base):
+    # Cached exports of catalogs, see `SqlExportCacheBackend`.
+    __tablename__ = "catalog_export"
+
+    key: str = Column(String, primary_key=True)
+    content: bytes = Column(LargeBinary, nullable=False)
+    etag: str = Column(String, nullable=False)
+    last_modified: dt.datetime = Column(DateTime(timezone=True), nullable=False)
+    # See `ContentEncoding`.
+    encoding: str = Column(String, nullable=False)
+    expiry_date: dt.datetime = Column(DateTime(timezone=True), nullable=False)
+
+
+class CatalogExportVersionModel(Base):
+    # Incremented each time cached exports of a catalog are invalidated, so that
+    # exports generated before are not stored, see `SqlExportCacheBackend`.
+    __tablename__ = "catalog_export_version"
+
+    organization_siret: Siret = Column(CHAR(14), primary_key=True)
+    version: int = Column(Integer, nullable=False)
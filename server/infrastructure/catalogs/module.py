@@ -1,11 +1,13 @@
 from server.application.catalogs.commands import CreateCatalog
 from server.application.catalogs.handlers import (
     create_catalog,
+    get_all_catalog_exports,
     get_all_catalogs,
     get_catalog_by_siret,
     get_catalog_export,
 )
 from server.application.catalogs.queries import (
+    GetAllCatalogExports,
     GetAllCatalogs,
     GetCatalogBySiret,
     GetCatalogExport,
@@ -22,4 +24,5 @@ class CatalogsModule(Module):
         GetCatalogBySiret: get_catalog_by_siret,
         GetAllCatalogs: get_all_catalogs,
         GetCatalogExport: get_catalog_export,
+        GetAllCatalogExports: get_all_catalog_exports,
     }
@@ -1,21 +1,25 @@
 from typing import List, Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import contains_eager, noload
+from sqlalchemy.orm import contains_eager, noload, selectinload
 
 from server.domain.catalogs.entities import Catalog
 from server.domain.catalogs.repositories import CatalogRepository
 from server.domain.organizations.types import Siret
 
 from ..database import Database
+from ..datasets.caching import DatasetFiltersCache
 from ..organizations.models import OrganizationModel
 from .models import CatalogModel
 from .transformers import make_entity, make_instance
 
 
 class SqlCatalogRepository(CatalogRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self, db: Database, filters_cache: Optional[DatasetFiltersCache] = None
+    ) -> None:
         self._db = db
+        self._filters_cache = filters_cache
 
     async def get_by_siret(self, siret: Siret) -> Optional[Catalog]:
         async with self._db.session() as session:
@@ -35,17 +39,21 @@ class SqlCatalogRepository(CatalogRepository):
                 return None
             return make_entity(instance)
 
-    async def get_all(self) -> List[Catalog]:
-        async with self._db.session() as session:
+    async def get_all(self, with_extra_fields: bool = False) -> List[Catalog]:
+        async with self._db.read_session() as session:
             stmt = (
                 select(CatalogModel)
                 .join(CatalogModel.organization)
                 .order_by(OrganizationModel.name)
                 .options(
                     contains_eager(CatalogModel.organization),
-                    # Don't need these so they aren't fetched, return [] when
-                    # accessing the attribute on the instance.
-                    noload(CatalogModel.extra_fields),
+                    (
+                        selectinload(CatalogModel.extra_fields)
+                        if with_extra_fields
+                        # Don't need these so they aren't fetched, return [] when
+                        # accessing the attribute on the instance.
+                        else noload(CatalogModel.extra_fields)
+                    ),
                 )
             )
             result = await session.execute(stmt)
@@ -62,4 +70,9 @@ class SqlCatalogRepository(CatalogRepository):
             await session.commit()
             await session.refresh(instance)
 
-            return instance.organization_siret
+        # New catalogs don't have datasets yet, so listings don't change, and their
+        # exports can't have been cached. Catalogs are never updated.
+        if self._filters_cache is not None:
+            self._filters_cache.invalidate()
+
+        return instance.organization_siret
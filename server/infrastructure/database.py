@@ -1,11 +1,24 @@
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+import bisect
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Type
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import DeclarativeMeta, registry, sessionmaker
+from sqlalchemy.orm import DeclarativeMeta, Session, registry, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
 
 mapper_registry = registry()
 
+# Set within `Database.primary_reads()`.
+_primary_reads: "ContextVar[bool]" = ContextVar("primary_reads", default=False)
+
 
 class Base(metaclass=DeclarativeMeta):
     # Explicit SQLAlchemy declarative base, for use with mypy.
@@ -21,27 +34,239 @@ class Base(metaclass=DeclarativeMeta):
     __init__ = mapper_registry.constructor
 
 
+# Upper bounds (in seconds) of buckets of the histogram of connection wait times.
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, math.inf)
+
+# Waiting longer than this for a connection is logged, as the pool may be too small.
+POOL_SLOW_WAIT = 0.1
+POOL_SLOW_WAIT_LOG_INTERVAL = 10
+
+
+class DatabasePoolStats(NamedTuple):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    # Number of connections being waited for, i.e. requests stalled by the pool.
+    waiting: int
+    # Number of connections acquired (or failed to be), and total time spent.
+    waits: int
+    wait_time: float
+    # Cumulative number of waits per bucket, keyed by upper bound, as in Prometheus
+    # histograms: `le="0.1"`.
+    wait_time_buckets: Dict[str, int]
+
+
+class _PoolMetrics:
+    def __init__(self) -> None:
+        self.waiting = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.buckets: List[int] = [0] * len(POOL_WAIT_BUCKETS)
+        self.last_slow_wait_log = -math.inf
+
+    def observe(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_time += seconds
+        self.buckets[bisect.bisect_left(POOL_WAIT_BUCKETS, seconds)] += 1
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Record how long connections are waited for, see `Database.pool_stats`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = _PoolMetrics()
+
+    def recreate(self) -> "InstrumentedPool":
+        # Called when connections get invalidated, e.g. if the database restarts.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self) -> Any:
+        metrics = self.metrics
+        metrics.waiting += 1
+        start = time.perf_counter()
+
+        try:
+            return super().connect()
+        finally:
+            metrics.waiting -= 1
+            elapsed = time.perf_counter() - start
+            metrics.observe(elapsed)
+
+            if elapsed >= POOL_SLOW_WAIT:
+                self._log_slow_wait(elapsed)
+
+    def _log_slow_wait(self, elapsed: float) -> None:
+        now = time.monotonic()
+
+        if now - self.metrics.last_slow_wait_log < POOL_SLOW_WAIT_LOG_INTERVAL:
+            return
+
+        self.metrics.last_slow_wait_log = now
+
+        logger.warning(
+            "Waited %.0f ms for a database connection. %s Waiting: %d",
+            elapsed * 1000,
+            self.status(),
+            self.metrics.waiting,
+        )
+
+
 class Database:
-    def __init__(self, url: str, debug: bool = False) -> None:
-        self._engine = create_async_engine(url, future=True)
+    def __init__(
+        self,
+        url: str,
+        debug: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        replica_url: Optional[str] = None,
+        replica_max_lag: float = 5,
+    ) -> None:
+        engine_kwargs: Dict[str, Any] = dict(
+            future=True,
+            poolclass=InstrumentedPool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            # Caches of asyncpg and of SQLAlchemy's asyncpg dialect. They must be
+            # disabled behind PgBouncer in transaction mode.
+            connect_args={
+                "statement_cache_size": statement_cache_size,
+                "prepared_statement_cache_size": statement_cache_size,
+            },
+        )
+        self._engine = create_async_engine(url, **engine_kwargs)
         self._session_cls = sessionmaker(
-            bind=self._engine, class_=AsyncSession, future=True
+            bind=self._engine,
+            class_=AsyncSession,
+            sync_session_class=self._make_write_tracking_session_cls(),
+            future=True,
+        )
+
+        # Each replica connection gets its own pool, of the same size.
+        self._replica_engine = (
+            create_async_engine(replica_url, **engine_kwargs)
+            if replica_url is not None
+            else None
+        )
+        self._read_session_cls = sessionmaker(
+            bind=self._replica_engine or self._engine,
+            class_=AsyncSession,
+            future=True,
         )
+        self._replica_max_lag = replica_max_lag
+        self._last_write_at = -math.inf
+
+    def _make_write_tracking_session_cls(self) -> Type[Session]:
+        # Record when this process last committed changes, see `read_session()`.
+        # Only ORM writes are tracked (i.e. changes flushed from the session), not
+        # statements such as those of the export cache, so that cache updates do
+        # not pin reads to the primary.
+        class WriteTrackingSession(Session):
+            pass
+
+        @event.listens_for(WriteTrackingSession, "after_flush")
+        def after_flush(session: Session, flush_context: Any) -> None:
+            session.info["has_writes"] = True
+
+        @event.listens_for(WriteTrackingSession, "after_commit")
+        def after_commit(session: Session) -> None:
+            if session.info.pop("has_writes", False):
+                self._last_write_at = time.monotonic()
+
+        @event.listens_for(WriteTrackingSession, "after_rollback")
+        def after_rollback(session: Session) -> None:
+            session.info.pop("has_writes", None)
+
+        return WriteTrackingSession
 
     @property
     def engine(self) -> AsyncEngine:
         return self._engine
 
+    @property
+    def pool_stats(self) -> DatabasePoolStats:
+        pool = self._engine.sync_engine.pool
+        assert isinstance(pool, InstrumentedPool)
+        metrics = pool.metrics
+
+        return DatabasePoolStats(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            waiting=metrics.waiting,
+            waits=metrics.waits,
+            wait_time=metrics.wait_time,
+            wait_time_buckets={
+                ("+Inf" if bound == math.inf else str(bound)): count
+                for bound, count in zip(
+                    POOL_WAIT_BUCKETS, itertools.accumulate(metrics.buckets)
+                )
+            },
+        )
+
+    @property
+    def replica_engine(self) -> Optional[AsyncEngine]:
+        return self._replica_engine
+
     def session(self) -> AsyncSession:
         return self._session_cls()
 
+    def read_session(self) -> AsyncSession:
+        """
+        Return a session for read-only queries, served by the replica if any.
+
+        Reads are served by the primary for `replica_max_lag` seconds after this
+        process wrote to it, so that e.g. a dataset shows up in the listing right
+        after it was created. Writes made by other processes may not be visible
+        until the replica has caught up, as with entries of in-memory caches.
+
+        Reads are also served by the primary within `primary_reads()`.
+        """
+        if (
+            _primary_reads.get()
+            or time.monotonic() - self._last_write_at < self._replica_max_lag
+        ):
+            return self._session_cls()
+
+        return self._read_session_cls()
+
+    @contextmanager
+    def primary_reads(self) -> Iterator[None]:
+        """
+        Serve reads made within this block by the primary, e.g. to fill in-memory
+        caches. Their entries are only dropped on writes, so they must not be
+        filled with rows of a replica which has not caught up with a write yet.
+        """
+        token = _primary_reads.set(True)
+        try:
+            yield
+        finally:
+            _primary_reads.reset(token)
+
     @asynccontextmanager
     async def autorollback(self) -> AsyncIterator[None]:
         async with self._engine.connect() as conn:
             self._session_cls.configure(bind=conn)
+            self._read_session_cls.configure(bind=conn)
             try:
                 async with conn.begin() as tx:
                     yield
                     await tx.rollback()
             finally:
                 self._session_cls.configure(bind=self._engine)
+                self._read_session_cls.configure(
+                    bind=self._replica_engine or self._engine
+                )
@@ -6,13 +6,17 @@ from server.domain.dataformats.entities import DataFormat
 from server.domain.dataformats.repositories import DataFormatRepository
 
 from ..database import Database
+from ..datasets.caching import DatasetFiltersCache
 from .models import DataFormatModel
 from .transformers import make_entity, make_instance
 
 
 class SqlDataFormatRepository(DataFormatRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self, db: Database, filters_cache: Optional[DatasetFiltersCache] = None
+    ) -> None:
         self._db = db
+        self._filters_cache = filters_cache
 
     async def insert(self, entity: DataFormat) -> Optional[int]:
         async with self._db.session() as session:
@@ -24,7 +28,12 @@ class SqlDataFormatRepository(DataFormatRepository):
 
             await session.refresh(instance)
 
-            return instance.id
+        # New formats aren't used by any dataset yet, so listings and exports don't
+        # change.
+        if self._filters_cache is not None:
+            self._filters_cache.invalidate()
+
+        return instance.id
 
     async def get_all(self, ids: List[Optional[int]] = None) -> List[DataFormat]:
         async with self._db.session() as session:
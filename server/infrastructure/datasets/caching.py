@@ -0,0 +1,270 @@
+import datetime as dt
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Union
+
+from server.domain.auth.entities import Account
+from server.domain.common.datetime import now
+from server.domain.common.pagination import Page
+from server.domain.common.types import Skip
+from server.domain.datasets.entities import Dataset
+from server.domain.datasets.repositories import DatasetGetAllExtras
+from server.domain.datasets.specifications import DatasetSpec
+from server.domain.organizations.types import Siret
+
+DatasetListResult = Tuple[List[Tuple[Dataset, DatasetGetAllExtras]], int]
+_Entry = Tuple[dt.datetime, DatasetListResult]
+
+
+@dataclass(frozen=True)
+class DatasetListCacheKey:
+    organization_siret: Optional[Siret]
+    include_all_datasets: bool
+    # Other spec attributes, normalized.
+    filters: Tuple[Tuple[str, Any], ...]
+    page: Optional[Tuple[Any, ...]]
+    # Restricted datasets are visible to members of their organization only, so
+    # results depend on the organization of the account, if any, rather than on
+    # the account itself.
+    visibility: Optional[Siret]
+
+    @classmethod
+    def build(
+        cls,
+        spec: DatasetSpec,
+        page: Optional[Page],
+        account: Union[Account, Skip],
+    ) -> "DatasetListCacheKey":
+        return cls(
+            organization_siret=spec.organization_siret,
+            include_all_datasets=spec.include_all_datasets,
+            filters=tuple(
+                (field.name, _normalize(field.name, getattr(spec, field.name)))
+                for field in fields(spec)
+                if field.name not in ("organization_siret", "include_all_datasets")
+            ),
+            page=_normalize_page(page),
+            visibility=(
+                account.organization_siret if isinstance(account, Account) else None
+            ),
+        )
+
+    def is_affected_by(self, organization_siret: Siret, restricted: bool) -> bool:
+        """
+        Whether a write to a dataset of the given organization may change results.
+        """
+        if self.organization_siret not in (None, organization_siret):
+            return False
+
+        if not restricted:
+            return True
+
+        if self.visibility is None:
+            return self.include_all_datasets
+
+        return self.visibility == organization_siret
+
+
+def _normalize(name: str, value: Any) -> Any:
+    # Filters on multiple values are unordered, and the search query is
+    # insensitive to whitespace. Normalize them so that equivalent listings share
+    # a cache entry. This also makes them hashable.
+
+    if name == "search_term" and value is not None:
+        return " ".join(value.split())
+
+    if name == "extra_field_values" and value is not None:
+        value = [(item.extra_field_id, item.value) for item in value]
+
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted(set(value), key=lambda item: (item is None, item)))
+
+    return value
+
+
+def _normalize_page(page: Optional[Page]) -> Optional[Tuple[Any, ...]]:
+    if page is None:
+        return None
+
+    # The page number is ignored when resuming from a cursor.
+    number = 1 if page.cursor is not None else page.number
+
+    return (number, page.size, page.cursor, page.count_strategy)
+
+
+class DatasetListCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    invalidations: int
+    size: int
+
+
+class DatasetListCache:
+    """
+    Cache results of dataset listings.
+
+    The catalog UI issues the same listings over and over again, e.g. the default
+    listing, popular filters and the first page of common searches.
+
+    Dataset writes invalidate affected entries, see `invalidate()`. Entries also
+    expire after `max_age`, so that other writes (e.g. renaming an organization)
+    are eventually reflected.
+    """
+
+    def __init__(
+        self,
+        max_age: dt.timedelta,
+        max_size: int = 1000,
+        nowfunc: Callable[[], dt.datetime] = now,
+    ) -> None:
+        self._entries: "OrderedDict[DatasetListCacheKey, _Entry]" = OrderedDict()
+        self._max_age = max_age
+        self._max_size = max_size
+        self._now = nowfunc
+        # Bumped on each invalidation, so that results of listings which ran
+        # concurrently with a write are not stored. See `set()`.
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: DatasetListCacheKey) -> Optional[DatasetListResult]:
+        try:
+            expiry_date, (items, count) = self._entries[key]
+        except KeyError:
+            self._misses += 1
+            return None
+
+        if self._now() > expiry_date:
+            del self._entries[key]
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+
+        return list(items), count
+
+    def set(
+        self, key: DatasetListCacheKey, result: DatasetListResult, generation: int
+    ) -> None:
+        if generation != self._generation:
+            # A dataset was written while results were being fetched.
+            return
+
+        items, count = result
+        self._entries[key] = (self._now() + self._max_age, (list(items), count))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, organization_siret: Siret, restricted: bool) -> None:
+        """
+        Drop entries affected by a write to a dataset of the given organization.
+
+        `restricted` must only be set if the dataset was restricted both before and
+        after the write.
+        """
+        self._generation += 1
+
+        for key in list(self._entries):
+            if key.is_affected_by(organization_siret, restricted):
+                del self._entries[key]
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    @property
+    def stats(self) -> DatasetListCacheStats:
+        return DatasetListCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            invalidations=self._invalidations,
+            size=len(self._entries),
+        )
+
+
+class DatasetFiltersCacheEntry(NamedTuple):
+    # JSON-encoded `DatasetFiltersView`.
+    content: bytes
+    etag: str
+
+
+_FiltersEntry = Tuple[dt.datetime, DatasetFiltersCacheEntry]
+
+
+class DatasetFiltersCache:
+    """
+    Cache the available dataset filters, as served to the catalog UI.
+
+    Filters are fetched on each page load, but only change when datasets, tags,
+    formats or catalogs are written. Repositories of these call `invalidate()`.
+    Entries also expire after `max_age`, so that writes made by other processes
+    are eventually reflected.
+
+    Entries carry an ETag derived from their content, so that clients can
+    revalidate their copy instead of downloading it again.
+    """
+
+    def __init__(
+        self,
+        max_age: dt.timedelta,
+        max_size: int = 1000,
+        nowfunc: Callable[[], dt.datetime] = now,
+    ) -> None:
+        # Filters depend on the organization, because of extra fields.
+        self._entries: "OrderedDict[Optional[str], _FiltersEntry]" = OrderedDict()
+        self._max_age = max_age
+        self._max_size = max_size
+        self._now = nowfunc
+        # See `DatasetListCache`.
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(
+        self, organization_siret: Optional[str]
+    ) -> Optional[DatasetFiltersCacheEntry]:
+        try:
+            expiry_date, entry = self._entries[organization_siret]
+        except KeyError:
+            return None
+
+        if self._now() > expiry_date:
+            del self._entries[organization_siret]
+            return None
+
+        self._entries.move_to_end(organization_siret)
+
+        return entry
+
+    def set(
+        self, organization_siret: Optional[str], content: bytes, generation: int
+    ) -> DatasetFiltersCacheEntry:
+        entry = DatasetFiltersCacheEntry(
+            content=content,
+            etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+        )
+
+        if generation == self._generation:
+            self._entries[organization_siret] = (self._now() + self._max_age, entry)
+            self._entries.move_to_end(organization_siret)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+        return entry
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
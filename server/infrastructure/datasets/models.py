@@ -1,7 +1,18 @@
 import uuid
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Column, Computed, DateTime, Enum, ForeignKey, Index, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    FetchedValue,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, relationship
 
@@ -62,9 +73,11 @@ class DatasetModel(Base):
         "ExtraFieldValueModel", cascade="all, delete-orphan", back_populates="dataset"
     )
 
+    # Weighted search vector of the title, tag names, description, and then other
+    # text fields. It also covers related rows, so it is maintained by triggers
+    # created by migration `34fbef87b24b` (dataset-search-tsv-trigger).
     search_tsv: Mapped[str] = Column(
-        TSVECTOR,
-        Computed("to_tsvector('french', title || ' ' || description)", persisted=True),
+        TSVECTOR, server_default=FetchedValue(), server_onupdate=FetchedValue()
     )
 
     __table_args__ = (
@@ -73,4 +86,20 @@ class DatasetModel(Base):
             search_tsv,
             postgresql_using="GIN",
         ),
+        Index(
+            "ix_dataset_title_tsv",
+            func.to_tsvector(text("'french'"), title),
+            postgresql_using="GIN",
+        ),
     )
+
+
+# Lexicon of dataset titles, used to complete search terms as they are typed.
+# It is maintained by triggers created by migration `d438309012b7`
+# (dataset-title-lexeme).
+class DatasetTitleLexemeModel(Base):
+    __tablename__ = "dataset_title_lexeme"
+
+    word = Column(String(collation="C"), primary_key=True)
+    # Number of datasets whose title contains this word.
+    ndoc = Column(Integer, nullable=False)
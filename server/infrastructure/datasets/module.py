@@ -9,12 +9,14 @@ from server.application.datasets.handlers import (
     get_all_datasets,
     get_dataset_by_id,
     get_dataset_filters,
+    get_dataset_suggestions,
     update_dataset,
 )
 from server.application.datasets.queries import (
     GetAllDatasets,
     GetDatasetByID,
     GetDatasetFilters,
+    GetDatasetSuggestions,
 )
 from server.seedwork.application.modules import Module
 
@@ -30,4 +32,5 @@ class DatasetsModule(Module):
         GetAllDatasets: get_all_datasets,
         GetDatasetByID: get_dataset_by_id,
         GetDatasetFilters: get_dataset_filters,
+        GetDatasetSuggestions: get_dataset_suggestions,
     }
@@ -1,31 +1,66 @@
-from typing import Union
+import uuid
+from typing import Any, Container, Dict, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import and_, desc, func, or_, select, text
+from sqlalchemy import (
+    String,
+    and_,
+    cast,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.engine import Row
 from sqlalchemy.orm import contains_eager, selectinload
+from sqlalchemy.sql import Select
 
 from server.domain.auth.entities import Account
-from server.domain.common.types import Skip
+from server.domain.common import datetime as dtutil
+from server.domain.common.exceptions import InvalidCursor
+from server.domain.common.pagination import (
+    CAPPED_COUNT_LIMIT,
+    CountStrategy,
+    Page,
+    decode_cursor,
+    encode_cursor,
+)
+from server.domain.common.types import ID, Skip
 from server.domain.datasets.entities import PublicationRestriction
 from server.domain.datasets.repositories import DatasetGetAllExtras
-from server.domain.datasets.specifications import DatasetSpec
+from server.domain.datasets.specifications import DatasetFacet, DatasetSpec
 from server.infrastructure.extra_fields.models import ExtraFieldValueModel
 
 from ...catalog_records.models import CatalogRecordModel
 from ...catalogs.models import CatalogModel
-from ...tags.models import TagModel
+from ...dataformats.models import dataset_dataformat
+from ...helpers.sqlalchemy import to_limit_offset
+from ...tags.models import TagModel, dataset_tag
 from ..models import DataFormatModel, DatasetModel
 
 _TS_HEADLINE_TITLE_COL = "ts_headline_title"
 _TS_HEADLINE_DESCRIPTION_COL = "ts_headline_description"
+_TOTAL_ITEMS_COL = "total_items"
 
 
 class GetAllQuery:
-    def __init__(self, spec: DatasetSpec, account: Union[Account, Skip]) -> None:
+    def __init__(
+        self,
+        spec: DatasetSpec,
+        account: Union[Account, Skip],
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+        exact_match_extra_field_ids: Container[ID] = (),
+    ) -> None:
         columns = []
-        joinclauses = []
+        # Columns computed for the page of results only, see `paginate()`.
+        page_columns = []
+        # Names of the columns rows are sorted by, in order. All sorts are descending,
+        # and the last column is unique, so that keyset pagination can resume right
+        # after any given row. See `_seek()`.
+        sort_keys: List[str] = []
         whereclauses = []
-        orderbyclauses = []
 
         if (search_term := spec.search_term) is not None:
             # Search using a PostgreSQL text search vector (TSV).
@@ -40,10 +75,13 @@ class GetAllQuery:
             columns.append(
                 func.ts_rank_cd(DatasetModel.search_tsv, ts_query).label("rank")
             )
+            sort_keys.append("rank")
 
             # Compute headlines (highlight markers) for title and description.
             # https://www.postgresql.org/docs/12/textsearch-controls.html#TEXTSEARCH-HEADLINE
-            columns.append(
+            # This is expensive (the whole text is parsed again), so it is only done
+            # for the page of results, rather than for all matching datasets.
+            page_columns.append(
                 func.ts_headline(
                     text("'french'"),
                     DatasetModel.title,
@@ -51,7 +89,7 @@ class GetAllQuery:
                     text("'StartSel=<mark>, StopSel=</mark>, HighlightAll=1'"),
                 ).label(_TS_HEADLINE_TITLE_COL)
             )
-            columns.append(
+            page_columns.append(
                 func.ts_headline(
                     text("'french'"),
                     DatasetModel.description,
@@ -63,8 +101,9 @@ class GetAllQuery:
             # Drop rows that don't match the search query.
             whereclauses.append(DatasetModel.search_tsv.op("@@")(ts_query))
 
-            # Sort rows by search rank, best match first.
-            orderbyclauses.append(desc(text("rank")))
+        # Sort rows by search rank if any (best match first), then most recent first.
+        # Dataset ID is only there to break ties.
+        sort_keys.extend(["created_at", "id"])
 
         if isinstance(account, Skip):
             if organization_siret := spec.organization_siret:
@@ -115,16 +154,19 @@ class GetAllQuery:
         if (services := spec.service__in) is not None:
             whereclauses.append(DatasetModel.service.in_(services))
 
+        # Filters on to-many relationships use EXISTS subqueries rather than joins,
+        # so that each dataset comes out once without having to DISTINCT rows.
+
         if (format_ids := spec.format__id__in) is not None:
-            joinclauses.append((DatasetModel.formats, {"isouter": True}))
-            whereclauses.append(DataFormatModel.id.in_(format_ids))
+            whereclauses.append(
+                DatasetModel.formats.any(DataFormatModel.id.in_(format_ids))
+            )
 
         if (technical_sources := spec.technical_source__in) is not None:
             whereclauses.append(DatasetModel.technical_source.in_(technical_sources))
 
         if (tag_ids := spec.tag__id__in) is not None:
-            joinclauses.append((DatasetModel.tags, {"isouter": True}))
-            whereclauses.append(TagModel.id.in_(tag_ids))
+            whereclauses.append(DatasetModel.tags.any(TagModel.id.in_(tag_ids)))
 
         if (license := spec.license) is not None:
             if license == "*":
@@ -133,31 +175,104 @@ class GetAllQuery:
                 whereclauses.append(DatasetModel.license == license)
 
         if (extra_field_values := spec.extra_field_values) is not None:
-            joinclauses.append((DatasetModel.extra_field_values, {"isouter": True}))
+            clauses = []
+
+            for extra_field_value in extra_field_values:
+                extra_field_id = extra_field_value.extra_field_id
+                value = extra_field_value.value
+
+                if extra_field_id in exact_match_extra_field_ids:
+                    # Values come from a fixed set (e.g. ENUM or BOOL extra fields),
+                    # so compare them as a whole, using a hash index.
+                    value_clause = ExtraFieldValueModel.value == value
+                else:
+                    # Substring match, using a trigram index.
+                    value_clause = ExtraFieldValueModel.value.like(f"%{value}%")
 
-            clauses = [
-                and_(
-                    ExtraFieldValueModel.value.like(f"%{extra_field_value.value}%"),
-                    ExtraFieldValueModel.extra_field_id
-                    == extra_field_value.extra_field_id,
+                clauses.append(
+                    and_(
+                        ExtraFieldValueModel.extra_field_id == extra_field_id,
+                        value_clause,
+                    )
                 )
-                for extra_field_value in extra_field_values
-            ]
 
-            whereclauses.append(or_(*clauses))
+            whereclauses.append(DatasetModel.extra_field_values.any(or_(*clauses)))
 
         stmt = (
-            select(DatasetModel, CatalogRecordModel.created_at, *columns)
+            select(DatasetModel.id, CatalogRecordModel.created_at, *columns)
             .join(DatasetModel.catalog_record)
-            .join(CatalogRecordModel.catalog)
-            .join(CatalogModel.organization)
+            .where(*whereclauses)
         )
 
-        for target, kwargs in joinclauses:
-            stmt = stmt.join(target, **kwargs)
+        # Matching datasets are read by both the page of results and the total
+        # count, which come back in a single statement. As a subquery (rather than
+        # a CTE), each of them is planned on its own: the page can use indexes to
+        # stop after enough rows, instead of waiting for all matching datasets.
+        matches = stmt.subquery("matches")
 
-        self.statement = (
-            stmt.options(
+        self._matches_statement = stmt
+        self.count_strategy = count_strategy
+
+        if count_strategy == CountStrategy.CAPPED:
+            # Stop counting right past the cap.
+            matches_stmt = select(matches.c.id).limit(CAPPED_COUNT_LIMIT + 1)
+            self.count_statement = select(func.count()).select_from(
+                matches_stmt.subquery()
+            )
+        else:
+            self.count_statement = select(func.count()).select_from(matches)
+
+        # Matching datasets, without sorting, for the query planner to estimate.
+        self.estimate_statement = select(matches.c.id)
+
+        self._sort_keys = [matches.c[name] for name in sort_keys]
+        self._sort_key_names = sort_keys
+        self._page_columns = page_columns
+
+        # Sort matching datasets by ID only. Pagination applies to this statement,
+        # so that full datasets are only fetched for the page of results.
+        self._ids_statement = select(matches).order_by(
+            *(key.desc() for key in self._sort_keys)
+        )
+
+    def paginate(
+        self,
+        page: Optional[Page],
+        with_count: bool = True,
+        by_organization: bool = False,
+    ) -> Select:
+        """
+        Return the statement fetching datasets in the given page of results, or
+        all matching datasets if `page` is None.
+
+        Unless `with_count` is false, rows come along with the total count, see
+        `total_items()`.
+
+        If `by_organization` is true, rows are grouped by organization (sorted by
+        SIRET), then sorted as usual.
+        """
+        ids_statement = self._ids_statement
+
+        if page is not None:
+            if page.cursor is not None:
+                ids_statement = ids_statement.where(self._seek(page.cursor))
+
+            limit, offset = to_limit_offset(page)
+            ids_statement = ids_statement.limit(limit).offset(offset)
+
+        ids = ids_statement.subquery("page")
+
+        stmt = (
+            select(
+                DatasetModel,
+                *(ids.c[column.name] for column in ids.c if column.name != "id"),
+                *self._page_columns,
+            )
+            .join(ids, ids.c.id == DatasetModel.id)
+            .join(DatasetModel.catalog_record)
+            .join(CatalogRecordModel.catalog)
+            .join(CatalogModel.organization)
+            .options(
                 contains_eager(DatasetModel.catalog_record)
                 .contains_eager(CatalogRecordModel.catalog)
                 .contains_eager(CatalogModel.organization),
@@ -165,24 +280,120 @@ class GetAllQuery:
                 selectinload(DatasetModel.tags),
                 selectinload(DatasetModel.extra_field_values),
             )
-            .distinct()
-            .where(*whereclauses)
-            .order_by(*orderbyclauses, CatalogRecordModel.created_at.desc())
         )
 
+        if by_organization:
+            stmt = stmt.order_by(CatalogRecordModel.organization_siret)
+
+        stmt = stmt.order_by(*(ids.c[name].desc() for name in self._sort_key_names))
+
+        if with_count and self.count_strategy != CountStrategy.ESTIMATED:
+            stmt = stmt.add_columns(
+                self.count_statement.scalar_subquery().label(_TOTAL_ITEMS_COL)
+            )
+
+        return stmt
+
+    def facets_statement(self, facets: Sequence[DatasetFacet]) -> Select:
+        """
+        Return the statement counting matching datasets for each value of the given
+        facets, as (facet, value, count) rows. Values are returned as text.
+        """
+        matches = self._matches_statement.with_only_columns(
+            DatasetModel.id,
+            DatasetModel.geographical_coverage,
+            DatasetModel.service,
+            DatasetModel.license,
+        ).cte("matches")
+
+        # Values of each facet, along with the tables to join to get them.
+        facet_columns: Dict[DatasetFacet, Tuple[Any, List[Tuple[Any, Any]]]] = {
+            DatasetFacet.GEOGRAPHICAL_COVERAGE: (matches.c.geographical_coverage, []),
+            DatasetFacet.SERVICE: (matches.c.service, []),
+            DatasetFacet.FORMAT_ID: (
+                dataset_dataformat.c.dataformat_id,
+                [(dataset_dataformat, dataset_dataformat.c.dataset_id == matches.c.id)],
+            ),
+            DatasetFacet.TAG_ID: (
+                dataset_tag.c.tag_id,
+                [(dataset_tag, dataset_tag.c.dataset_id == matches.c.id)],
+            ),
+            DatasetFacet.LICENSE: (matches.c.license, []),
+        }
+
+        statements = []
+
+        for facet in facets:
+            value, joins = facet_columns[facet]
+
+            stmt = select(
+                literal(facet.value).label("facet"),
+                cast(value, String).label("value"),
+                func.count().label("count"),
+            ).select_from(matches)
+
+            for table, onclause in joins:
+                stmt = stmt.join(table, onclause)
+
+            statements.append(stmt.where(value.is_not(None)).group_by(value))
+
+        # Matching datasets are read once, then counted by each facet, all within
+        # a single statement.
+        counts = union_all(*statements).subquery()
+
+        return select(counts).order_by(
+            counts.c.facet, counts.c.count.desc(), counts.c.value
+        )
+
+    def _seek(self, cursor: str) -> Any:
+        # Restrict to rows that come after the row `cursor` points to (keyset
+        # pagination). Unlike OFFSET, this lets the database skip preceding rows
+        # instead of sorting and discarding them.
+        values = decode_cursor(cursor)
+
+        if len(values) != len(self._sort_keys):
+            raise InvalidCursor(cursor)
+
+        *ranks, created_at, id_ = values
+
+        try:
+            params: List[Any] = [
+                *(float(rank) for rank in ranks),
+                dtutil.parse(created_at),
+                uuid.UUID(id_),
+            ]
+        except (AttributeError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+
+        return tuple_(*self._sort_keys) < tuple_(*params)
+
+    def cursor(self, row: Row) -> str:
+        values: List[Any] = [row.created_at.isoformat(), str(self.instance(row).id)]
+
+        if len(self._sort_keys) > len(values):
+            values.insert(0, row.rank)
+
+        return encode_cursor(values)
+
     def instance(self, row: Row) -> DatasetModel:
         return row[0]
 
+    def total_items(self, row: Row) -> Optional[int]:
+        # Estimated counts do not come along with rows.
+        return getattr(row, _TOTAL_ITEMS_COL, None)
+
     def extras(self, row: Row) -> DatasetGetAllExtras:
+        extras: DatasetGetAllExtras = {"cursor": self.cursor(row)}
+
         try:
             h_title = getattr(row, _TS_HEADLINE_TITLE_COL)
             h_description = getattr(row, _TS_HEADLINE_DESCRIPTION_COL)
         except AttributeError:
-            return {}
+            return extras
 
-        return {
-            "headlines": {
-                "title": h_title,
-                "description": h_description if "<mark>" in h_description else None,
-            }
+        extras["headlines"] = {
+            "title": h_title,
+            "description": h_description if "<mark>" in h_description else None,
         }
+
+        return extras
@@ -0,0 +1,112 @@
+import re
+from typing import Any, List, Sequence, Union
+
+from sqlalchemy import String, and_, column, func, or_, select, text
+from sqlalchemy.sql import ColumnElement, Select
+
+from server.domain.auth.entities import Account
+from server.domain.common.types import Skip
+from server.domain.datasets.entities import PublicationRestriction
+
+from ...catalog_records.models import CatalogRecordModel
+from ..models import DatasetModel, DatasetTitleLexemeModel
+
+# Number of lexicon words the term being typed is completed into.
+MAX_COMPLETIONS = 20
+
+# Sorts after any other character, see `_starts_with()`.
+_MAX_CHAR = "\U0010ffff"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def get_words(q: str) -> List[str]:
+    return _WORD_RE.findall(q.lower())
+
+
+def _starts_with(col: Any, prefix: Any) -> ColumnElement:
+    # Unlike LIKE, a range remains usable as an index condition when the prefix
+    # isn't a literal, e.g. when it is computed or the statement is prepared.
+    return and_(col >= prefix, col < prefix + _MAX_CHAR)
+
+
+def get_completions_statement(fragment: str) -> Select:
+    """
+    Return the statement fetching the most frequent words of dataset titles which
+    complete the given fragment of a search term.
+    """
+    # Titles are indexed using their stemmed words, e.g. 'national' for 'nationale',
+    # so complete the stem of the fragment as well.
+    stem = (
+        select(column("lexeme", String))
+        .select_from(func.unnest(func.to_tsvector(text("'french'"), fragment)))
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    return (
+        select(DatasetTitleLexemeModel.word)
+        .where(
+            or_(
+                _starts_with(DatasetTitleLexemeModel.word, fragment),
+                _starts_with(DatasetTitleLexemeModel.word, stem),
+            )
+        )
+        .order_by(DatasetTitleLexemeModel.ndoc.desc())
+        .limit(MAX_COMPLETIONS)
+    )
+
+
+def _quote(word: str) -> str:
+    # See: https://www.postgresql.org/docs/12/datatype-textsearch.html#DATATYPE-TSQUERY
+    escaped = word.replace("\\", "\\\\").replace("'", "''")
+    return f"'{escaped}'"
+
+
+def get_suggestions_statement(
+    words: Sequence[str],
+    completions: Sequence[str],
+    account: Union[Account, Skip],
+    limit: int,
+) -> Select:
+    """
+    Return the statement fetching datasets whose title contains all given words,
+    as well as one of the completions of the term being typed.
+    """
+    # Completions are lexicon words already, so they must not be normalized again.
+    ts_query: ColumnElement = func.to_tsquery(
+        text("'simple'"), " | ".join(_quote(word) for word in completions)
+    )
+
+    if words:
+        ts_query = func.plainto_tsquery(text("'french'"), " ".join(words)).op("&&")(
+            ts_query
+        )
+
+    is_public = (
+        DatasetModel.publication_restriction == PublicationRestriction.NO_RESTRICTION
+    )
+
+    visibility_clause: ColumnElement
+
+    if isinstance(account, Account):
+        visibility_clause = or_(
+            is_public,
+            CatalogRecordModel.organization_siret == account.organization_siret,
+        )
+    else:
+        visibility_clause = is_public
+
+    # Sort by recency rather than by rank: the first matches are then found by
+    # walking the index of creation dates, instead of ranking all matches, which
+    # may be most datasets when only a few letters were typed.
+    return (
+        select(DatasetModel.id, DatasetModel.title)
+        .join(DatasetModel.catalog_record)
+        .where(
+            func.to_tsvector(text("'french'"), DatasetModel.title).op("@@")(ts_query),
+            visibility_clause,
+        )
+        .order_by(CatalogRecordModel.created_at.desc(), DatasetModel.id.desc())
+        .limit(limit)
+    )
@@ -1,31 +1,75 @@
-from typing import List, Optional, Set, Tuple, Union
+import uuid
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import contains_eager, selectinload
 
 from server.domain.auth.entities import Account
-from server.domain.common.pagination import Page
+from server.domain.common.pagination import CountStrategy, Page
 from server.domain.common.types import ID, Skip
-from server.domain.datasets.entities import Dataset
-from server.domain.datasets.repositories import DatasetGetAllExtras, DatasetRepository
-from server.domain.datasets.specifications import DatasetSpec
+from server.domain.datasets.entities import Dataset, PublicationRestriction
+from server.domain.datasets.repositories import (
+    DatasetGetAllExtras,
+    DatasetRepository,
+    DatasetSuggestion,
+)
+from server.domain.datasets.specifications import DatasetFacet, DatasetSpec
+from server.domain.extra_fields.entities import ExtraFieldType
+from server.domain.organizations.types import Siret
 
 from ..catalog_records.models import CatalogRecordModel
 from ..catalog_records.raw_queries import get_catalog_record_instance_by_id
+from ..catalogs.caching import ExportCache
 from ..catalogs.models import CatalogModel
 from ..database import Database
 from ..dataformats.raw_queries import get_all_dataformat_instances_by_ids
-from ..helpers.sqlalchemy import get_count_from, to_limit_offset
+from ..extra_fields.models import ExtraFieldModel
+from ..helpers.sqlalchemy import get_estimated_count_from
 from ..tags.raw_queries import get_all_tag_instances_by_ids
+from .caching import DatasetFiltersCache, DatasetListCache, DatasetListCacheKey
 from .models import DatasetModel
 from .queries.get_all import GetAllQuery
+from .queries.suggest import (
+    get_completions_statement,
+    get_suggestions_statement,
+    get_words,
+)
 from .transformers import make_entity, make_instance, update_instance
 
+# Number of datasets fetched at once by `stream_all()`.
+_STREAM_BATCH_SIZE = 500
+
+# Facet values come out of the database as text.
+_FACET_VALUE_TYPES: Dict[DatasetFacet, Callable[[str], Any]] = {
+    DatasetFacet.FORMAT_ID: int,
+    DatasetFacet.TAG_ID: lambda value: ID(uuid.UUID(value)),
+}
+
 
 class SqlDatasetRepository(DatasetRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self,
+        db: Database,
+        cache: Optional[DatasetListCache] = None,
+        filters_cache: Optional[DatasetFiltersCache] = None,
+        export_cache: Optional[ExportCache] = None,
+    ) -> None:
         self._db = db
+        self._cache = cache
+        self._filters_cache = filters_cache
+        self._export_cache = export_cache
 
     async def get_all(
         self,
@@ -34,25 +78,160 @@ class SqlDatasetRepository(DatasetRepository):
         page: Optional[Page] = Page(),
         spec: DatasetSpec = DatasetSpec(),
     ) -> Tuple[List[Tuple[Dataset, DatasetGetAllExtras]], int]:
+        if self._cache is None:
+            return await self._get_all(account=account, page=page, spec=spec)
 
-        async with self._db.session() as session:
-            query = GetAllQuery(spec, account=account)
-            stmt = query.statement
+        key = DatasetListCacheKey.build(spec, page, account)
 
-            count = await get_count_from(stmt, session)
+        if (result := self._cache.get(key)) is not None:
+            return result
 
-            if page is not None:
-                limit, offset = to_limit_offset(page)
-                stmt = stmt.limit(limit).offset(offset)
+        generation = self._cache.generation
 
-            result = await session.stream(stmt)
+        with self._db.primary_reads():
+            result = await self._get_all(account=account, page=page, spec=spec)
+
+        self._cache.set(key, result, generation)
+
+        return result
+
+    async def _get_all(
+        self,
+        *,
+        account: Union[Account, Skip],
+        page: Optional[Page],
+        spec: DatasetSpec,
+    ) -> Tuple[List[Tuple[Dataset, DatasetGetAllExtras]], int]:
+        async with self._db.read_session() as session:
+            query = GetAllQuery(
+                spec,
+                account=account,
+                count_strategy=(
+                    page.count_strategy if page is not None else CountStrategy.EXACT
+                ),
+                exact_match_extra_field_ids=(
+                    await self._get_exact_match_extra_field_ids(session, spec)
+                ),
+            )
+            result = await session.stream(query.paginate(page))
+
+            items = []
+            count: Optional[int] = 0
+
+            async for row in result:
+                items.append((make_entity(query.instance(row)), query.extras(row)))
+                count = query.total_items(row)
+
+            if query.count_strategy == CountStrategy.ESTIMATED:
+                count = await get_estimated_count_from(
+                    query.estimate_statement, session
+                )
+            elif not items:
+                # The total count comes along with rows, so it must be queried
+                # separately when there are none, e.g. past the last page.
+                count = (await session.execute(query.count_statement)).scalar_one()
 
-            items = [
-                (make_entity(query.instance(row)), query.extras(row))
-                async for row in result
-            ]
+            assert count is not None
             return items, count
 
+    async def stream_all(
+        self,
+        *,
+        account: Union[Account, Skip] = Skip(),
+        spec: DatasetSpec = DatasetSpec(),
+        by_organization: bool = False,
+    ) -> AsyncIterator[Dataset]:
+        async with self._db.read_session() as session:
+            query = GetAllQuery(
+                spec,
+                account=account,
+                exact_match_extra_field_ids=(
+                    await self._get_exact_match_extra_field_ids(session, spec)
+                ),
+            )
+            # Rows are fetched from a server-side cursor, and related objects are
+            # loaded for each batch of rows, so that memory usage does not grow
+            # with the number of datasets.
+            stmt = query.paginate(
+                None, with_count=False, by_organization=by_organization
+            ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+            result = await session.stream(stmt)
+
+            async for row in result:
+                yield make_entity(query.instance(row))
+
+    async def _get_exact_match_extra_field_ids(
+        self, session: AsyncSession, spec: DatasetSpec
+    ) -> Set[ID]:
+        if not spec.extra_field_values:
+            return set()
+
+        stmt = select(ExtraFieldModel.id).where(
+            ExtraFieldModel.id.in_(
+                [value.extra_field_id for value in spec.extra_field_values]
+            ),
+            ExtraFieldModel.type.in_([ExtraFieldType.ENUM, ExtraFieldType.BOOL]),
+        )
+        result = await session.execute(stmt)
+        return set(result.scalars())
+
+    async def get_facets(
+        self,
+        facets: Sequence[DatasetFacet],
+        *,
+        account: Union[Account, Skip] = Skip(),
+        spec: DatasetSpec = DatasetSpec(),
+    ) -> Dict[DatasetFacet, List[Tuple[Any, int]]]:
+        counts: Dict[DatasetFacet, List[Tuple[Any, int]]] = {
+            facet: [] for facet in facets
+        }
+
+        if not facets:
+            return counts
+
+        async with self._db.read_session() as session:
+            query = GetAllQuery(
+                spec,
+                account=account,
+                exact_match_extra_field_ids=(
+                    await self._get_exact_match_extra_field_ids(session, spec)
+                ),
+            )
+            result = await session.execute(query.facets_statement(facets))
+
+            for name, value, count in result:
+                facet = DatasetFacet(name)
+                counts[facet].append((_FACET_VALUE_TYPES.get(facet, str)(value), count))
+
+        return counts
+
+    async def get_suggestions(
+        self,
+        q: str,
+        *,
+        account: Union[Account, Skip] = Skip(),
+        limit: int = 10,
+    ) -> List[DatasetSuggestion]:
+        words = get_words(q)
+
+        if not words:
+            return []
+
+        *words, fragment = words
+
+        async with self._db.read_session() as session:
+            result = await session.execute(get_completions_statement(fragment))
+            completions = result.scalars().all()
+
+            if not completions:
+                # No dataset title can match, no need to look further.
+                return []
+
+            stmt = get_suggestions_statement(words, completions, account, limit)
+            result = await session.execute(stmt)
+
+            return [DatasetSuggestion(id=row.id, title=row.title) for row in result]
+
     async def _maybe_get_by_id(
         self, session: AsyncSession, id: ID
     ) -> Optional[DatasetModel]:
@@ -85,19 +264,19 @@ class SqlDatasetRepository(DatasetRepository):
             return make_entity(instance)
 
     async def get_geographical_coverage_set(self) -> Set[str]:
-        async with self._db.session() as session:
+        async with self._db.read_session() as session:
             stmt = select(DatasetModel.geographical_coverage.distinct())
             result = await session.execute(stmt)
             return set(result.scalars())
 
     async def get_service_set(self) -> Set[str]:
-        async with self._db.session() as session:
+        async with self._db.read_session() as session:
             stmt = select(DatasetModel.service.distinct())
             result = await session.execute(stmt)
             return set(result.scalars())
 
     async def get_technical_source_set(self) -> Set[str]:
-        async with self._db.session() as session:
+        async with self._db.read_session() as session:
             stmt = select(DatasetModel.technical_source.distinct()).where(
                 DatasetModel.technical_source.is_not(None)
             )
@@ -105,7 +284,7 @@ class SqlDatasetRepository(DatasetRepository):
             return set(result.scalars())
 
     async def get_license_set(self) -> Set[str]:
-        async with self._db.session() as session:
+        async with self._db.read_session() as session:
             stmt = select(DatasetModel.license.distinct()).where(
                 DatasetModel.license.is_not(None)
             )
@@ -131,7 +310,12 @@ class SqlDatasetRepository(DatasetRepository):
 
             await session.refresh(instance)
 
-            return ID(instance.id)
+        await self._invalidate_cache(
+            entity.catalog_record.organization.siret,
+            entity.publication_restriction,
+        )
+
+        return ID(instance.id)
 
     async def update(self, entity: Dataset) -> None:
         async with self._db.session() as session:
@@ -141,6 +325,8 @@ class SqlDatasetRepository(DatasetRepository):
                 if instance is None:
                     return
 
+                previous_publication_restriction = instance.publication_restriction
+
                 formats = await get_all_dataformat_instances_by_ids(
                     session, [format.id for format in entity.formats]
                 )
@@ -149,6 +335,12 @@ class SqlDatasetRepository(DatasetRepository):
                 )
                 update_instance(instance, entity, formats, tags)
 
+        await self._invalidate_cache(
+            entity.catalog_record.organization.siret,
+            previous_publication_restriction,
+            entity.publication_restriction,
+        )
+
     async def delete(self, id: ID) -> None:
         async with self._db.session() as session:
             instance = await self._maybe_get_by_id(session, id)
@@ -156,6 +348,31 @@ class SqlDatasetRepository(DatasetRepository):
             if instance is None:
                 return
 
+            organization_siret = instance.catalog_record.organization_siret
+            publication_restriction = instance.publication_restriction
+
             await session.delete(instance)
 
             await session.commit()
+
+        await self._invalidate_cache(organization_siret, publication_restriction)
+
+    async def _invalidate_cache(
+        self,
+        organization_siret: Siret,
+        *publication_restrictions: Optional[PublicationRestriction],
+    ) -> None:
+        if self._filters_cache is not None:
+            self._filters_cache.invalidate()
+
+        if self._export_cache is not None:
+            await self._export_cache.invalidate(organization_siret)
+
+        if self._cache is None:
+            return
+
+        restricted = all(
+            restriction != PublicationRestriction.NO_RESTRICTION
+            for restriction in publication_restrictions
+        )
+        self._cache.invalidate(organization_siret, restricted=restricted)
@@ -65,3 +65,18 @@ class ExtraFieldValueModel(Base):
         "ExtraFieldModel", back_populates="values"
     )
     value: str = Column(String(), nullable=False)
+
+    __table_args__ = (
+        # For exact matches, e.g. on ENUM or BOOL extra fields.
+        # A hash index only stores hash codes, so unlike a b-tree it accepts
+        # values of any length.
+        Index("ix_extra_field_value_value_hash", value, postgresql_using="hash"),
+        # For substring matches (LIKE '%...%').
+        # See: https://www.postgresql.org/docs/12/pgtrgm.html
+        Index(
+            "ix_extra_field_value_value_trgm",
+            value,
+            postgresql_using="GIN",
+            postgresql_ops={"value": "gin_trgm_ops"},
+        ),
+    )
@@ -1,19 +1,62 @@
-from typing import Tuple
+import json
+from typing import Any, Tuple
 
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import Select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ClauseElement, Select
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.compiler import SQLCompiler
 
 from server.domain.common.pagination import Page
 
 
 def to_limit_offset(page: Page) -> Tuple[int, int]:
     limit = page.size
+
+    if page.cursor is not None:
+        # Keyset pagination: preceding rows are already filtered out by the cursor.
+        return limit, 0
+
     offset = page.size * (page.number - 1)
     return limit, offset
 
 
-async def get_count_from(stmt: Select, session: AsyncSession) -> int:
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    result = await session.execute(count_stmt)
-    return result.scalar_one()
+class Explain(Executable, ClauseElement):
+    """
+    An EXPLAIN statement, showing how PostgreSQL plans (and runs, if `analyze` is
+    set) another statement.
+
+    See: https://www.postgresql.org/docs/12/sql-explain.html
+    """
+
+    inherit_cache = False
+
+    def __init__(
+        self, stmt: Select, *, analyze: bool = False, format: str = "text"
+    ) -> None:
+        self.stmt = stmt
+        self.analyze = analyze
+        self.format = format
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    options = ["ANALYZE"] if element.analyze else []
+    options.append(f"FORMAT {element.format.upper()}")
+    return f"EXPLAIN ({', '.join(options)}) " + compiler.process(element.stmt, **kw)
+
+
+async def get_estimated_count_from(stmt: Select, session: AsyncSession) -> int:
+    """
+    Return the number of rows the query planner expects `stmt` to return.
+
+    The query is planned, but not executed, so this is much cheaper than counting
+    on large result sets, but only as accurate as table statistics are.
+    """
+    result = await session.execute(Explain(stmt, format="json"))
+    plan = result.scalar_one()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -8,13 +8,17 @@ from server.domain.tags.entities import Tag
 from server.domain.tags.repositories import TagRepository
 
 from ..database import Database
+from ..datasets.caching import DatasetFiltersCache
 from .models import TagModel
 from .transformers import make_entity, make_instance
 
 
 class SqlTagRepository(TagRepository):
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self, db: Database, filters_cache: Optional[DatasetFiltersCache] = None
+    ) -> None:
         self._db = db
+        self._filters_cache = filters_cache
 
     def make_id(self) -> ID:
         return id_factory()
@@ -52,7 +56,13 @@ class SqlTagRepository(TagRepository):
 
             await session.commit()
 
-            return ids_
+        # Tags still used by datasets can't be deleted (see the foreign key of
+        # `dataset_tag`), so they must be removed from datasets beforehand, which
+        # invalidates listings and exports. Neither changes here.
+        if self._filters_cache is not None:
+            self._filters_cache.invalidate()
+
+        return ids_
 
     async def insert(self, entity: Tag) -> ID:
         async with self._db.session() as session:
@@ -62,4 +72,9 @@ class SqlTagRepository(TagRepository):
 
             await session.refresh(instance)
 
-            return ID(instance.id)
+        # New tags aren't used by any dataset yet, so listings and exports don't
+        # change.
+        if self._filters_cache is not None:
+            self._filters_cache.invalidate()
+
+        return ID(instance.id)
@@ -29,9 +29,10 @@ config.set_main_option("sqlalchemy.url", database_url)
 config.set_main_option("sqlalchemy.echo", str(settings.debug))
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
+# This line sets up loggers basically. Loggers of the server must not be
+# disabled when migrations run in-process (e.g. in tests).
 assert config.config_file_name
-fileConfig(config.config_file_name)
+fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
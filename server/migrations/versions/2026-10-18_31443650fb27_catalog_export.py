@@ -0,0 +1,29 @@
+"""catalog-export
+
+Revision ID: 31443650fb27
+Revises: d438309012b7
+Create Date: 2026-10-18 21:28:04.704780
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "31443650fb27"
+down_revision = "d438309012b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "catalog_export",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("expiry_date", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+
+def downgrade():
+    op.drop_table("catalog_export")
@@ -0,0 +1,213 @@
+"""dataset-search-tsv-trigger
+
+Revision ID: 34fbef87b24b
+Revises: e229f84d6ff0
+Create Date: 2026-10-18 20:04:29.501318
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "34fbef87b24b"
+down_revision = "e229f84d6ff0"
+branch_labels = None
+depends_on = None
+
+# Tables holding rows that contribute to the search vector of a dataset.
+_DATASET_RELATED_TABLES = ["dataset_tag", "dataset_dataformat", "extra_field_value"]
+
+
+def upgrade():
+    # The search vector now also covers related rows (tags, formats, extra field
+    # values), which a generated column cannot refer to: it is maintained by
+    # triggers instead.
+    op.drop_index("ix_dataset_search_tsv", table_name="dataset", postgresql_using="GIN")
+    op.drop_column("dataset", "search_tsv")
+    op.add_column(
+        "dataset",
+        sa.Column("search_tsv", postgresql.TSVECTOR(), nullable=True),
+    )
+
+    # Weights, by decreasing relevance:
+    # A: title
+    # B: tag names
+    # C: description
+    # D: service, geographical coverage, format names, text extra field values
+    op.execute(
+        """
+        CREATE FUNCTION dataset_search_tsv(d dataset) RETURNS tsvector AS $$
+        SELECT
+            setweight(to_tsvector('french', d.title), 'A')
+            || setweight(
+                to_tsvector(
+                    'french',
+                    coalesce(
+                        (
+                            SELECT string_agg(tag.name, ' ')
+                            FROM dataset_tag
+                            JOIN tag ON tag.id = dataset_tag.tag_id
+                            WHERE dataset_tag.dataset_id = d.id
+                        ),
+                        ''
+                    )
+                ),
+                'B'
+            )
+            || setweight(to_tsvector('french', d.description), 'C')
+            || setweight(
+                to_tsvector(
+                    'french',
+                    concat_ws(
+                        ' ',
+                        d.service,
+                        d.geographical_coverage,
+                        (
+                            SELECT string_agg(dataformat.name, ' ')
+                            FROM dataset_dataformat
+                            JOIN dataformat
+                                ON dataformat.id = dataset_dataformat.dataformat_id
+                            WHERE dataset_dataformat.dataset_id = d.id
+                        ),
+                        (
+                            SELECT string_agg(extra_field_value.value, ' ')
+                            FROM extra_field_value
+                            JOIN extra_field
+                                ON extra_field.id = extra_field_value.extra_field_id
+                            WHERE extra_field_value.dataset_id = d.id
+                            AND extra_field.type = 'TEXT'
+                        )
+                    )
+                ),
+                'D'
+            )
+        $$ LANGUAGE sql STABLE;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION dataset_search_tsv_trigger() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_tsv := dataset_search_tsv(NEW);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TRIGGER dataset_search_tsv_update
+        BEFORE INSERT OR UPDATE OF title, description, service, geographical_coverage
+        ON dataset
+        FOR EACH ROW EXECUTE FUNCTION dataset_search_tsv_trigger();
+        """
+    )
+
+    # Related rows are usually written in bulk, e.g. all tags of a dataset at once,
+    # so refresh affected datasets once per statement, using transition tables.
+    op.execute(
+        """
+        CREATE FUNCTION dataset_search_tsv_refresh() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE dataset SET search_tsv = dataset_search_tsv(dataset)
+                WHERE id IN (SELECT dataset_id FROM old_rows);
+            ELSE
+                UPDATE dataset SET search_tsv = dataset_search_tsv(dataset)
+                WHERE id IN (SELECT dataset_id FROM new_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    for table in _DATASET_RELATED_TABLES:
+        for event, transition in [
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ]:
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_search_tsv_{event.lower()}
+                AFTER {event} ON {table}
+                REFERENCING {transition}
+                FOR EACH STATEMENT EXECUTE FUNCTION dataset_search_tsv_refresh();
+                """
+            )
+
+    # Renaming a tag or a format changes the search vector of datasets using it.
+    for table, association_table, fk in [
+        ("tag", "dataset_tag", "tag_id"),
+        ("dataformat", "dataset_dataformat", "dataformat_id"),
+    ]:
+        op.execute(
+            f"""
+            CREATE FUNCTION {table}_search_tsv_trigger() RETURNS trigger AS $$
+            BEGIN
+                UPDATE dataset SET search_tsv = dataset_search_tsv(dataset)
+                WHERE id IN (
+                    SELECT dataset_id FROM {association_table} WHERE {fk} = NEW.id
+                );
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_search_tsv_update
+            AFTER UPDATE OF name ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_tsv_trigger();
+            """
+        )
+
+    op.execute("UPDATE dataset SET search_tsv = dataset_search_tsv(dataset);")
+
+    op.create_index(
+        "ix_dataset_search_tsv",
+        "dataset",
+        ["search_tsv"],
+        unique=False,
+        postgresql_using="GIN",
+    )
+
+
+def downgrade():
+    for table in ["tag", "dataformat"]:
+        op.execute(f"DROP TRIGGER {table}_search_tsv_update ON {table};")
+        op.execute(f"DROP FUNCTION {table}_search_tsv_trigger();")
+
+    for table in _DATASET_RELATED_TABLES:
+        for event in ["insert", "update", "delete"]:
+            op.execute(f"DROP TRIGGER {table}_search_tsv_{event} ON {table};")
+
+    op.execute("DROP FUNCTION dataset_search_tsv_refresh();")
+    op.execute("DROP TRIGGER dataset_search_tsv_update ON dataset;")
+    op.execute("DROP FUNCTION dataset_search_tsv_trigger();")
+    op.execute("DROP FUNCTION dataset_search_tsv(dataset);")
+
+    op.drop_index("ix_dataset_search_tsv", table_name="dataset", postgresql_using="GIN")
+    op.drop_column("dataset", "search_tsv")
+    op.add_column(
+        "dataset",
+        sa.Column(
+            "search_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('french', title || ' ' || description)", persisted=True
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_dataset_search_tsv",
+        "dataset",
+        ["search_tsv"],
+        unique=False,
+        postgresql_using="GIN",
+    )
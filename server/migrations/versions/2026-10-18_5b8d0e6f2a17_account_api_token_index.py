@@ -0,0 +1,28 @@
+"""account-api-token-index
+
+Revision ID: 5b8d0e6f2a17
+Revises: 7c2e91d4a5b3
+Create Date: 2026-10-18 23:12:45.208114
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b8d0e6f2a17"
+down_revision = "7c2e91d4a5b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_account_api_token",
+        "account",
+        ["api_token"],
+        unique=False,
+        postgresql_using="HASH",
+    )
+
+
+def downgrade():
+    op.drop_index("ix_account_api_token", table_name="account", postgresql_using="HASH")
@@ -0,0 +1,30 @@
+"""catalog-export-validators
+
+Revision ID: 7c2e91d4a5b3
+Revises: 31443650fb27
+Create Date: 2026-10-18 22:04:17.318042
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c2e91d4a5b3"
+down_revision = "31443650fb27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cached exports lack the new columns. They will be generated again.
+    op.execute("DELETE FROM catalog_export")
+    op.add_column("catalog_export", sa.Column("etag", sa.String(), nullable=False))
+    op.add_column(
+        "catalog_export",
+        sa.Column("last_modified", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column("catalog_export", "last_modified")
+    op.drop_column("catalog_export", "etag")
@@ -0,0 +1,44 @@
+"""extra-field-value-indexes
+
+Revision ID: 7f0901bb9284
+Revises: 34fbef87b24b
+Create Date: 2026-10-18 21:02:11.482906
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7f0901bb9284"
+down_revision = "34fbef87b24b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    op.create_index(
+        "ix_extra_field_value_extra_field_id_value",
+        "extra_field_value",
+        ["extra_field_id", "value"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_extra_field_value_value_trgm",
+        "extra_field_value",
+        ["value"],
+        unique=False,
+        postgresql_using="GIN",
+        postgresql_ops={"value": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_extra_field_value_value_trgm",
+        table_name="extra_field_value",
+        postgresql_using="GIN",
+    )
+    op.drop_index(
+        "ix_extra_field_value_extra_field_id_value", table_name="extra_field_value"
+    )
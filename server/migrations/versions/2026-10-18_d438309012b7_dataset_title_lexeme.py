@@ -0,0 +1,135 @@
+"""dataset-title-lexeme
+
+Revision ID: d438309012b7
+Revises: 7f0901bb9284
+Create Date: 2026-10-18 21:49:05.248288
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d438309012b7"
+down_revision = "7f0901bb9284"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Titles are matched on their own when making suggestions as search terms are
+    # typed. Index them separately for accurate selectivity estimates.
+    op.create_index(
+        "ix_dataset_title_tsv",
+        "dataset",
+        [sa.text("to_tsvector('french', title)")],
+        unique=False,
+        postgresql_using="GIN",
+    )
+
+    # Lexicon of dataset titles (lexemes of weight A in search vectors), used to
+    # complete the last search term being typed.
+    # "C" collation allows prefix matches (LIKE 'abc%') to use the index.
+    op.create_table(
+        "dataset_title_lexeme",
+        sa.Column("word", sa.String(collation="C"), nullable=False),
+        sa.Column("ndoc", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("word"),
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION dataset_title_lexeme_add(lexemes text[], deltas bigint[])
+        RETURNS void AS $$
+            INSERT INTO dataset_title_lexeme (word, ndoc)
+            SELECT lexeme, delta FROM unnest(lexemes, deltas) AS t (lexeme, delta)
+            WHERE delta <> 0
+            ORDER BY lexeme
+            ON CONFLICT (word) DO UPDATE
+            SET ndoc = dataset_title_lexeme.ndoc + EXCLUDED.ndoc;
+
+            DELETE FROM dataset_title_lexeme
+            WHERE word = ANY(lexemes) AND ndoc <= 0;
+        $$ LANGUAGE sql;
+        """
+    )
+
+    # Apply changes to search vectors as a whole for each statement, as they are
+    # typically refreshed in bulk by triggers on related tables.
+    # See migration `34fbef87b24b` (dataset-search-tsv-trigger).
+    op.execute(
+        """
+        CREATE FUNCTION dataset_title_lexeme_refresh() RETURNS trigger AS $$
+        DECLARE
+            lexemes text[];
+            deltas bigint[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(lexeme), array_agg(n) INTO lexemes, deltas FROM (
+                    SELECT lexeme, count(*) AS n
+                    FROM new_rows, unnest(new_rows.search_tsv)
+                    WHERE 'A' = ANY(weights)
+                    GROUP BY lexeme
+                ) AS changes;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(lexeme), array_agg(n) INTO lexemes, deltas FROM (
+                    SELECT lexeme, -count(*) AS n
+                    FROM old_rows, unnest(old_rows.search_tsv)
+                    WHERE 'A' = ANY(weights)
+                    GROUP BY lexeme
+                ) AS changes;
+            ELSE
+                SELECT array_agg(lexeme), array_agg(n) INTO lexemes, deltas FROM (
+                    SELECT lexeme, sum(n) AS n FROM (
+                        SELECT lexeme, 1 AS n
+                        FROM new_rows, unnest(new_rows.search_tsv)
+                        WHERE 'A' = ANY(weights)
+                        UNION ALL
+                        SELECT lexeme, -1 AS n
+                        FROM old_rows, unnest(old_rows.search_tsv)
+                        WHERE 'A' = ANY(weights)
+                    ) AS rows
+                    GROUP BY lexeme
+                ) AS changes;
+            END IF;
+
+            IF lexemes IS NOT NULL THEN
+                PERFORM dataset_title_lexeme_add(lexemes, deltas);
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    # Transition tables are not available to all events, hence one trigger each.
+    for event, transition in [
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ]:
+        op.execute(
+            f"""
+            CREATE TRIGGER dataset_title_lexeme_{event.lower()}
+            AFTER {event} ON dataset
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION dataset_title_lexeme_refresh();
+            """
+        )
+
+    op.execute(
+        """
+        INSERT INTO dataset_title_lexeme (word, ndoc)
+        SELECT word, ndoc FROM ts_stat('SELECT search_tsv FROM dataset', 'A');
+        """
+    )
+
+
+def downgrade():
+    for event in ["insert", "update", "delete"]:
+        op.execute(f"DROP TRIGGER dataset_title_lexeme_{event} ON dataset;")
+
+    op.execute("DROP FUNCTION dataset_title_lexeme_refresh();")
+    op.execute("DROP FUNCTION dataset_title_lexeme_add(text[], bigint[]);")
+    op.drop_table("dataset_title_lexeme")
+    op.drop_index("ix_dataset_title_tsv", table_name="dataset", postgresql_using="GIN")
@@ -0,0 +1,27 @@
+"""add_catalog_record_created_at_index
+
+Revision ID: e229f84d6ff0
+Revises: c5bc235fa223
+Create Date: 2026-10-18 18:47:21.653584
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e229f84d6ff0"
+down_revision = "c5bc235fa223"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f("ix_catalog_record_created_at"),
+        "catalog_record",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_catalog_record_created_at"), table_name="catalog_record")
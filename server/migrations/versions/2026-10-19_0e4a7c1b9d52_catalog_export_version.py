@@ -0,0 +1,28 @@
+"""catalog-export-version
+
+Revision ID: 0e4a7c1b9d52
+Revises: 5b8d0e6f2a17
+Create Date: 2026-10-19 10:04:31.517920
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0e4a7c1b9d52"
+down_revision = "5b8d0e6f2a17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "catalog_export_version",
+        sa.Column("organization_siret", sa.CHAR(length=14), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("organization_siret"),
+    )
+
+
+def downgrade():
+    op.drop_table("catalog_export_version")
@@ -0,0 +1,25 @@
+"""catalog-export-encoding
+
+Revision ID: a3f6d2c8e41b
+Revises: 0e4a7c1b9d52
+Create Date: 2026-10-19 14:22:09.604318
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3f6d2c8e41b"
+down_revision = "0e4a7c1b9d52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The encoding of cached exports is unknown. They will be generated again.
+    op.execute("DELETE FROM catalog_export")
+    op.add_column("catalog_export", sa.Column("encoding", sa.String(), nullable=False))
+
+
+def downgrade():
+    op.drop_column("catalog_export", "encoding")
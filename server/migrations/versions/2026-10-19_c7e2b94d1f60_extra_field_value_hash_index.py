@@ -0,0 +1,42 @@
+"""extra-field-value-hash-index
+
+Revision ID: c7e2b94d1f60
+Revises: a3f6d2c8e41b
+Create Date: 2026-10-19 16:41:37.218054
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c7e2b94d1f60"
+down_revision = "a3f6d2c8e41b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # B-tree entries are limited to about 2.7 KB, which text values may exceed.
+    op.drop_index(
+        "ix_extra_field_value_extra_field_id_value", table_name="extra_field_value"
+    )
+    op.create_index(
+        "ix_extra_field_value_value_hash",
+        "extra_field_value",
+        ["value"],
+        unique=False,
+        postgresql_using="hash",
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_extra_field_value_value_hash",
+        table_name="extra_field_value",
+        postgresql_using="hash",
+    )
+    op.create_index(
+        "ix_extra_field_value_extra_field_id_value",
+        "extra_field_value",
+        ["extra_field_id", "value"],
+        unique=False,
+    )
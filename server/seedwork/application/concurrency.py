@@ -0,0 +1,29 @@
+import asyncio
+from typing import Any, Coroutine, List
+
+
+async def gather_bounded(*coros: Coroutine[Any, Any, Any], limit: int) -> List[Any]:
+    """
+    Run coroutines concurrently, with at most `limit` of them running at a time,
+    and return their results in order.
+
+    If one of them fails, others are cancelled and the error is raised.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro: Coroutine[Any, Any, Any]) -> Any:
+        try:
+            async with semaphore:
+                return await coro
+        finally:
+            # Avoid 'never awaited' warnings for coroutines cancelled while waiting.
+            coro.close()
+
+    tasks = [asyncio.ensure_future(run(coro)) for coro in coros]
+
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -2,8 +2,9 @@ from typing import Callable, List
 
 import httpx
 import pytest
-from pydantic import EmailStr
+from pydantic import EmailStr, SecretStr
 
+from server.application.auth.commands import ChangePassword
 from server.application.auth.queries import GetAccountByEmail
 from server.application.organizations.views import OrganizationView
 from server.config.di import resolve
@@ -255,6 +256,29 @@ async def test_delete_user(
     with pytest.raises(AccountDoesNotExist):
         await bus.execute(query)
 
+    # API token is revoked.
+    response = await client.get("/auth/users/me/", auth=temp_user.auth)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_change_password_revokes_api_token(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    response = await client.get("/auth/users/me/", auth=temp_user.auth)
+    assert response.status_code == 200
+
+    await bus.execute(
+        ChangePassword(
+            email=EmailStr(temp_user.account.email), password=SecretStr("newpwd")
+        )
+    )
+
+    response = await client.get("/auth/users/me/", auth=temp_user.auth)
+    assert response.status_code == 401
+
 
 @pytest.mark.asyncio
 async def test_delete_user_idempotent(
@@ -1,15 +1,19 @@
 import csv
 import datetime as dt
+import json
 from typing import List
 
 import httpx
 import pytest
 
+from server.api.catalogs import routes
+from server.api.catalogs.rendering import iter_csv, iter_export
 from server.application.catalogs.commands import CreateCatalog
-from server.application.catalogs.queries import GetCatalogBySiret
+from server.application.catalogs.queries import GetCatalogBySiret, GetCatalogExport
 from server.application.datasets.queries import GetDatasetByID
 from server.application.organizations.views import OrganizationView
 from server.config.di import resolve
+from server.domain.catalogs.entities import ExportFormat
 from server.domain.common.types import Skip, id_factory
 from server.domain.datasets.entities import PublicationRestriction, UpdateFrequency
 from server.domain.extra_fields.entities import (
@@ -18,6 +22,7 @@ from server.domain.extra_fields.entities import (
     TextExtraField,
 )
 from server.domain.organizations.types import Siret
+from server.infrastructure.catalogs.caching import ExportCache
 from server.seedwork.application.messages import MessageBus
 
 from ..factories import (
@@ -518,6 +523,284 @@ async def test_export_catalog(client: httpx.AsyncClient) -> None:
     }
 
 
+@pytest.mark.asyncio
+async def test_export_catalog_jsonl(client: httpx.AsyncClient) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build(name="Org 1"))
+    domaine_id = id_factory()
+
+    await bus.execute(
+        CreateCatalog(
+            organization_siret=siret,
+            extra_fields=[
+                TextExtraField(
+                    organization_siret=siret,
+                    name="domaine",
+                    title="Domaine",
+                    hint_text="Domaine associé au jeu de données",
+                )
+            ],
+        ),
+        extra_field_ids_by_name={"domaine": domaine_id},
+    )
+
+    tag_id = await bus.execute(CreateTagFactory.build(name="Musées"))
+
+    await bus.execute(
+        CreateDatasetFactory.build(
+            account=Skip(),
+            organization_siret=siret,
+            title="Example title",
+            description="Example description",
+            service="Example service",
+            geographical_coverage="France métropolitaine",
+            format_ids=[1, 2],
+            technical_source=None,
+            producer_email="example.service@mydomain.org",
+            contact_emails=["example.person@mydomain.org"],
+            update_frequency=UpdateFrequency.WEEKLY,
+            last_updated_at=dt.datetime(2022, 10, 6, 15, 0, 0, tzinfo=dt.timezone.utc),
+            url="https://example.org",
+            license="Licence Ouverte",
+            tag_ids=[tag_id],
+            extra_field_values=[
+                ExtraFieldValue(extra_field_id=domaine_id, value="Patrimoine"),
+            ],
+        )
+    )
+
+    response = await client.get(f"/catalogs/{siret}/export.jsonl")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+
+    assert json.loads(lines[0]) == {
+        "title": "Example title",
+        "description": "Example description",
+        "service": "Example service",
+        "geographical_coverage": "France métropolitaine",
+        "formats": [
+            "Fichier tabulaire (XLS, XLSX, CSV, ...)",
+            "Fichier SIG (Shapefile, ...)",
+        ],
+        "technical_source": None,
+        "producer_email": "example.service@mydomain.org",
+        "contact_emails": ["example.person@mydomain.org"],
+        "update_frequency": "weekly",
+        "last_updated_at": "2022-10-06T15:00:00+00:00",
+        "url": "https://example.org",
+        "license": "Licence Ouverte",
+        "tags": ["Musées"],
+        "extra_fields": {"domaine": "Patrimoine"},
+    }
+
+    response = await client.get(f"/catalogs/{siret}/export.jsonld")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/ld+json"
+
+    catalog = response.json()
+    assert catalog["@type"] == "dcat:Catalog"
+    assert catalog["dct:publisher"] == {
+        "@type": "foaf:Organization",
+        "foaf:name": "Org 1",
+        "dct:identifier": siret,
+    }
+
+    (dataset,) = catalog["dcat:dataset"]
+    assert dataset == {
+        "@type": "dcat:Dataset",
+        "dct:title": "Example title",
+        "dct:description": "Example description",
+        "dct:creator": {"@type": "foaf:Organization", "foaf:name": "Example service"},
+        "dct:spatial": "France métropolitaine",
+        "dcat:keyword": ["Musées"],
+        "dcat:distribution": [
+            {
+                "@type": "dcat:Distribution",
+                "dct:format": "Fichier tabulaire (XLS, XLSX, CSV, ...)",
+            },
+            {
+                "@type": "dcat:Distribution",
+                "dct:format": "Fichier SIG (Shapefile, ...)",
+            },
+        ],
+        "dcat:contactPoint": [
+            {
+                "@type": "vcard:Kind",
+                "vcard:hasEmail": {"@id": "mailto:example.service@mydomain.org"},
+            },
+            {
+                "@type": "vcard:Kind",
+                "vcard:hasEmail": {"@id": "mailto:example.person@mydomain.org"},
+            },
+        ],
+        "dct:accrualPeriodicity": "weekly",
+        "dct:modified": {
+            "@value": "2022-10-06T15:00:00+00:00",
+            "@type": "xsd:dateTime",
+        },
+        "dcat:landingPage": {"@id": "https://example.org"},
+        "dct:license": "Licence Ouverte",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", list(ExportFormat))
+async def test_export_catalog_chunks_formats(
+    temp_org: OrganizationView, fmt: ExportFormat
+) -> None:
+    bus = resolve(MessageBus)
+
+    for title in ("A", "B", "C"):
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=Skip(), organization_siret=temp_org.siret, title=title
+            )
+        )
+
+    export = await bus.execute(GetCatalogExport(siret=temp_org.siret))
+    content = "".join([chunk async for chunk in iter_export(export, fmt, chunk_rows=2)])
+
+    if fmt == ExportFormat.CSV:
+        titles = [row["titre"] for row in csv.DictReader(content.splitlines())]
+    elif fmt == ExportFormat.JSONL:
+        titles = [json.loads(line)["title"] for line in content.splitlines()]
+    else:
+        titles = [item["dct:title"] for item in json.loads(content)["dcat:dataset"]]
+
+    assert titles == ["C", "B", "A"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", list(ExportFormat))
+async def test_export_catalog_empty(
+    temp_org: OrganizationView, fmt: ExportFormat
+) -> None:
+    export = await resolve(MessageBus).execute(GetCatalogExport(siret=temp_org.siret))
+    content = "".join([chunk async for chunk in iter_export(export, fmt)])
+
+    if fmt == ExportFormat.JSONLD:
+        assert json.loads(content)["dcat:dataset"] == []
+    elif fmt == ExportFormat.JSONL:
+        assert content == ""
+    else:
+        assert content.splitlines()[0].startswith("titre,")
+
+
+@pytest.mark.asyncio
+async def test_export_catalog_cache_per_format(client: httpx.AsyncClient) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build(name="Org 1"))
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+    response = await client.get(f"/catalogs/{siret}/export.csv")
+    assert "X-Cache" not in response.headers
+
+    response = await client.get(f"/catalogs/{siret}/export.jsonld")
+    assert response.headers["content-type"] == "application/ld+json"
+    assert "X-Cache" not in response.headers
+
+    response = await client.get(f"/catalogs/{siret}/export.jsonld")
+    assert response.headers["content-type"] == "application/ld+json"
+    assert "X-Cache" in response.headers
+    assert response.json()["@type"] == "dcat:Catalog"
+
+
+@pytest.mark.asyncio
+async def test_export_catalog_too_large_to_cache(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build(name="Org 1"))
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+    # Spill the export to disk, and send it in several chunks.
+    monkeypatch.setattr(routes, "EXPORT_SPOOL_MAX_SIZE", 16)
+    monkeypatch.setattr(routes, "EXPORT_SEND_CHUNK_SIZE", 16)
+    monkeypatch.setattr(resolve(ExportCache), "_max_entry_bytes", 16)
+
+    for _ in range(2):
+        response = await client.get(f"/catalogs/{siret}/export.csv")
+        assert response.status_code == 200
+        assert "X-Cache" not in response.headers
+        assert response.text.splitlines()[0].startswith("titre,")
+
+
+@pytest.mark.asyncio
+async def test_export_catalog_compressed(client: httpx.AsyncClient) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build(name="Org 1"))
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+    for _ in range(5):
+        await bus.execute(
+            CreateDatasetFactory.build(account=Skip(), organization_siret=siret)
+        )
+
+    url = f"/catalogs/{siret}/export.csv"
+
+    # Exports are streamed uncompressed while they are generated.
+    response = await client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert "X-Cache" not in response.headers
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    content = response.content
+
+    etags = set()
+
+    for accept_encoding, encoding in (
+        ("br, gzip", "br"),
+        ("gzip", "gzip"),
+        ("identity", None),
+    ):
+        response = await client.get(url, headers={"Accept-Encoding": accept_encoding})
+        assert response.status_code == 200
+        assert "X-Cache" in response.headers
+        assert response.headers.get("Content-Encoding") == encoding
+        assert response.headers["Vary"] == "Accept-Encoding"
+        # Decoded by the client.
+        assert response.content == content
+        etags.add(response.headers["ETag"])
+
+        response = await client.get(
+            url,
+            headers={
+                "Accept-Encoding": accept_encoding,
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+        assert response.status_code == 304
+
+    assert len(etags) == 3
+
+
+@pytest.mark.asyncio
+async def test_export_catalog_chunks(temp_org: OrganizationView) -> None:
+    bus = resolve(MessageBus)
+
+    for title in ("A", "B", "C"):
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=Skip(), organization_siret=temp_org.siret, title=title
+            )
+        )
+
+    export = await bus.execute(GetCatalogExport(siret=temp_org.siret))
+    chunks = [chunk async for chunk in iter_csv(export, chunk_rows=2)]
+
+    assert len(chunks) == 2
+    rows = list(csv.DictReader("".join(chunks).splitlines()))
+    assert [row["titre"] for row in rows] == ["C", "B", "A"]
+
+
 @pytest.mark.asyncio
 async def test_export_catalog_not_found(client: httpx.AsyncClient) -> None:
     bus = resolve(MessageBus)
@@ -542,8 +825,65 @@ async def test_export_catalog_cache(client: httpx.AsyncClient) -> None:
 
     assert response.status_code == 200
     assert "X-Cache" not in response.headers
-    assert response.headers["Cache-Control"] == "max-age=86400"
+    assert response.headers["Cache-Control"] == "no-cache"
+    last_modified = response.headers["Last-Modified"]
 
     response = await client.get(f"/catalogs/{siret}/export.csv")
     assert "X-Cache" in response.headers
-    assert response.headers["Cache-Control"] == "max-age=86400"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["Last-Modified"] == last_modified
+    etag = response.headers["ETag"]
+
+    for headers in (
+        {"If-None-Match": etag},
+        {"If-None-Match": f"W/{etag}"},
+        {"If-Modified-Since": last_modified},
+        # 'If-Modified-Since' is ignored if 'If-None-Match' is present.
+        {
+            "If-None-Match": etag,
+            "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT",
+        },
+    ):
+        response = await client.get(f"/catalogs/{siret}/export.csv", headers=headers)
+        assert response.status_code == 304, headers
+        assert response.headers["ETag"] == etag
+        assert not response.content
+
+    for headers in (
+        {"If-None-Match": '"other"'},
+        {"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+        {"If-Modified-Since": "invalid"},
+        {"If-None-Match": '"other"', "If-Modified-Since": last_modified},
+    ):
+        response = await client.get(f"/catalogs/{siret}/export.csv", headers=headers)
+        assert response.status_code == 200, headers
+
+
+@pytest.mark.asyncio
+async def test_export_catalog_cache_invalidated_on_dataset_change(
+    client: httpx.AsyncClient,
+) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build(name="Org 1"))
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+    await client.get(f"/catalogs/{siret}/export.csv")
+    response = await client.get(f"/catalogs/{siret}/export.csv")
+    assert "X-Cache" in response.headers
+    etag = response.headers["ETag"]
+
+    await bus.execute(
+        CreateDatasetFactory.build(
+            account=Skip(),
+            organization_siret=siret,
+            title="New dataset",
+        )
+    )
+
+    response = await client.get(
+        f"/catalogs/{siret}/export.csv", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert "X-Cache" not in response.headers
+    assert "New dataset" in response.text
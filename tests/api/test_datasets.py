@@ -1,6 +1,6 @@
 import json
 import random
-from typing import Any, List, Tuple
+from typing import Any, List, Optional, Tuple
 
 import httpx
 import pytest
@@ -21,6 +21,7 @@ from server.domain.datasets.entities import PublicationRestriction, UpdateFreque
 from server.domain.datasets.exceptions import DatasetDoesNotExist
 from server.domain.extra_fields.entities import (
     BoolExtraField,
+    EnumExtraField,
     ExtraField,
     ExtraFieldValue,
     TextExtraField,
@@ -466,6 +467,178 @@ async def test_dataset_pagination(
     assert data["total_pages"] == expected_total_pages
 
 
+@pytest.mark.asyncio
+async def test_dataset_pagination_cursor(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    n_datasets = 7
+    for k in range(1, n_datasets + 1):
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=temp_user.account,
+                organization_siret=temp_org.siret,
+                title=f"Dataset {k}",
+                publication_restriction=PublicationRestriction.NO_RESTRICTION,
+            )
+        )
+
+    titles: List[str] = []
+    params: dict = {"page_size": 3}
+
+    for expected_num_items in (3, 3, 1):
+        response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == expected_num_items
+        assert data["total_items"] == n_datasets
+        titles.extend(item["title"] for item in data["items"])
+        params["cursor"] = data["next_cursor"]
+
+    assert params["cursor"] is None
+    assert titles == [f"Dataset {k}" for k in range(n_datasets, 0, -1)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "count_strategy, pages",
+    [
+        pytest.param(
+            "exact",
+            [(1, 7, True), (4, 7, True), (5, 7, True)],
+            id="exact",
+        ),
+        pytest.param(
+            "capped",
+            [
+                (1, 5, False),
+                # Past the cap, the count covers the page being served, and more.
+                (3, 7, False),
+                (4, 7, True),
+                (5, 5, False),
+            ],
+            id="capped",
+        ),
+        pytest.param(
+            "estimated",
+            [(1, None, False), (4, 7, True)],
+            id="estimated",
+        ),
+    ],
+)
+async def test_dataset_pagination_count_strategy(
+    client: httpx.AsyncClient,
+    temp_org: OrganizationView,
+    temp_user: TestPasswordUser,
+    monkeypatch: pytest.MonkeyPatch,
+    count_strategy: str,
+    pages: List[Tuple[int, Optional[int], bool]],
+) -> None:
+    for module in (
+        "server.application.datasets.handlers",
+        "server.infrastructure.datasets.queries.get_all",
+    ):
+        monkeypatch.setattr(f"{module}.CAPPED_COUNT_LIMIT", 5)
+
+    bus = resolve(MessageBus)
+
+    n_datasets = 7
+    for _ in range(n_datasets):
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=temp_user.account,
+                organization_siret=temp_org.siret,
+                publication_restriction=PublicationRestriction.NO_RESTRICTION,
+            )
+        )
+
+    for page_number, total_items, total_items_exact in pages:
+        response = await client.get(
+            "/datasets/",
+            params={
+                "page_size": 2,
+                "page_number": page_number,
+                "count_strategy": count_strategy,
+                "organization_siret": str(temp_org.siret),
+            },
+            auth=temp_user.auth,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_items_exact"] is total_items_exact
+        if total_items is None:
+            # Estimates are not reliable, but never below what has been seen.
+            assert data["total_items"] >= 2
+        else:
+            assert data["total_items"] == total_items
+
+        if data["items"]:
+            assert data["total_pages"] >= page_number
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count_strategy", ["capped", "estimated"])
+async def test_dataset_pagination_count_past_last_page(
+    client: httpx.AsyncClient,
+    temp_org: OrganizationView,
+    temp_user: TestPasswordUser,
+    count_strategy: str,
+) -> None:
+    bus = resolve(MessageBus)
+
+    n_datasets = 7
+    for _ in range(n_datasets):
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=temp_user.account,
+                organization_siret=temp_org.siret,
+                publication_restriction=PublicationRestriction.NO_RESTRICTION,
+            )
+        )
+
+    response = await client.get(
+        "/datasets/",
+        params={
+            "page_size": 10,
+            "page_number": 100,
+            "count_strategy": count_strategy,
+            "organization_siret": str(temp_org.siret),
+        },
+        auth=temp_user.auth,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == []
+
+    # Skipped pages must not count as seen items.
+    if count_strategy == "capped":
+        assert data["total_items"] == n_datasets
+        assert data["total_items_exact"] is True
+    else:
+        assert data["total_items"] < 10 * 99
+        assert data["total_items_exact"] is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        pytest.param("garbage!", id="not-base64"),
+        pytest.param("e30", id="not-a-list"),
+        pytest.param("WzFd", id="wrong-length"),
+        pytest.param("WzEsMl0", id="wrong-types"),
+    ],
+)
+async def test_dataset_pagination_invalid_cursor(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser, cursor: str
+) -> None:
+    response = await client.get(
+        "/datasets/", params={"cursor": cursor}, auth=temp_user.auth
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_dataset_get_all_uses_reverse_chronological_order(  # noqa: E501
     client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
@@ -1061,6 +1234,26 @@ class TestExtraFieldValues:
             }
         ]
 
+    async def test_create_dataset_with_long_extra_field_value(
+        self, client: httpx.AsyncClient
+    ) -> None:
+        siret, user, extra_field_id = await self._setup()
+
+        # Larger than what a b-tree index entry can hold, even once compressed.
+        value = fake.pystr(min_chars=8000, max_chars=8000)
+
+        payload = to_payload(
+            CreateDatasetPayloadFactory.build(
+                organization_siret=siret,
+                extra_field_values=[
+                    ExtraFieldValue(extra_field_id=extra_field_id, value=value)
+                ],
+            )
+        )
+        response = await client.post("/datasets/", json=payload, auth=user.auth)
+        assert response.status_code == 201
+        assert response.json()["extra_field_values"][0]["value"] == value
+
     async def test_add_extra_field_value(self, client: httpx.AsyncClient) -> None:
         bus = resolve(MessageBus)
         siret, user, extra_field_id = await self._setup()
@@ -1240,6 +1433,75 @@ class TestExtraFieldValues:
 
         assert data["total_items"] == 1
 
+    async def test_fetch_dataset_filtered_by_extra_field_value_match(
+        self, client: httpx.AsyncClient
+    ) -> None:
+        bus = resolve(MessageBus)
+        siret = await bus.execute(CreateOrganizationFactory.build())
+
+        extra_fields: List[ExtraField] = [
+            TextExtraField(
+                title="Référent",
+                hint_text="Personne référente",
+                name="referent",
+                organization_siret=siret,
+            ),
+            EnumExtraField(
+                title="Fréquence",
+                hint_text="Fréquence de mise à jour",
+                name="frequence",
+                organization_siret=siret,
+                data={"values": ["Mensuel", "Mensuel ou moins"]},
+            ),
+        ]
+
+        await bus.execute(
+            CreateCatalog(organization_siret=siret, extra_fields=extra_fields)
+        )
+
+        catalog = await bus.execute(GetCatalogBySiret(siret=siret))
+        text_field, enum_field = catalog.extra_fields
+
+        user = await create_test_password_user(
+            CreatePasswordUserFactory.build(organization_siret=siret)
+        )
+
+        titles_by_values = {
+            ("Camille Dupont", "Mensuel"): "A",
+            ("Dominique Dupond", "Mensuel ou moins"): "B",
+        }
+
+        for (text_value, enum_value), title in titles_by_values.items():
+            await bus.execute(
+                CreateDatasetFactory.build(
+                    title=title,
+                    account=user.account,
+                    organization_siret=siret,
+                    extra_field_values=[
+                        ExtraFieldValue(extra_field_id=text_field.id, value=text_value),
+                        ExtraFieldValue(extra_field_id=enum_field.id, value=enum_value),
+                    ],
+                )
+            )
+
+        for extra_field_id, value, expected_titles in [
+            # Text values match on substrings...
+            (text_field.id, "Dupon", ["B", "A"]),
+            (text_field.id, "Camille", ["A"]),
+            # ... but ENUM and BOOL values match as a whole.
+            (enum_field.id, "Mensuel", ["A"]),
+            (enum_field.id, "Mensuel ou moins", ["B"]),
+        ]:
+            params = {
+                "extra_field_values": json.dumps(
+                    [{"extra_field_id": str(extra_field_id), "value": value}]
+                )
+            }
+            response = await client.get("/datasets/", params=params, auth=user.auth)
+            assert response.status_code == 200
+            titles = [item["title"] for item in response.json()["items"]]
+            assert titles == expected_titles, value
+
 
 @pytest.mark.asyncio
 class TestDeleteDataset:
@@ -1,10 +1,11 @@
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Any, Awaitable, Callable, List, Optional
 
 import httpx
 import pytest
 
 from server.application.catalogs.commands import CreateCatalog
+from server.application.datasets.commands import DeleteDataset
 from server.application.organizations.views import OrganizationView
 from server.config.di import resolve
 from server.domain.common.types import ID, id_factory
@@ -26,8 +27,9 @@ from ..factories import (
     CreateOrganizationFactory,
     CreatePasswordUserFactory,
     CreateTagFactory,
+    UpdateDatasetPayloadFactory,
 )
-from ..helpers import TestPasswordUser, create_test_password_user
+from ..helpers import TestPasswordUser, create_test_password_user, to_payload
 
 
 @pytest.mark.asyncio
@@ -269,6 +271,31 @@ async def test_dataset_filters_apply(
     assert data["items"][0]["id"] == str(dataset_id)
 
 
+@pytest.mark.asyncio
+async def test_dataset_filters_multiple_matches_no_duplicates(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    tag_ids = [await bus.execute(CreateTagFactory.build()) for _ in range(2)]
+
+    dataset_id = await bus.execute(
+        CreateDatasetFactory.build(
+            account=temp_user.account,
+            organization_siret=temp_org.siret,
+            format_ids=[1, 2],
+            tag_ids=tag_ids,
+        )
+    )
+
+    params: dict = {"tag_id": [str(tag_id) for tag_id in tag_ids], "format_id": [1, 2]}
+    response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [str(dataset_id)]
+    assert data["total_items"] == 1
+
+
 @pytest.mark.asyncio
 async def test_dataset_filters_license_any(
     client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
@@ -378,3 +405,215 @@ async def test_dataset_filters_with_extra_fields(
 
     assert response_enum_extra_field["type"] == ExtraFieldType.ENUM.value
     assert response_enum_extra_field["data"] == enum_extra_field.data
+
+
+@pytest.mark.asyncio
+async def test_dataset_filters_etag(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser
+) -> None:
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = await client.get(
+            "/datasets/filters/",
+            headers={"If-None-Match": if_none_match},
+            auth=temp_user.auth,
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.content
+
+    response = await client.get(
+        "/datasets/filters/",
+        headers={"If-None-Match": '"other"'},
+        auth=temp_user.auth,
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_dataset_filters_cached(
+    client: httpx.AsyncClient,
+    temp_user: TestPasswordUser,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    data = response.json()
+
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("Filters should be served from cache")
+
+    monkeypatch.setattr(resolve(MessageBus), "execute", fail)
+
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    assert response.json() == data
+
+
+async def _create_tag() -> None:
+    bus = resolve(MessageBus)
+    await bus.execute(CreateTagFactory.build(name="New tag"))
+
+
+async def _create_format() -> None:
+    repository = resolve(DataFormatRepository)
+    await repository.insert(DataFormat(name="New format"))
+
+
+async def _create_catalog() -> None:
+    bus = resolve(MessageBus)
+    siret = await bus.execute(CreateOrganizationFactory.build())
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "write",
+    [
+        pytest.param(_create_tag, id="tag"),
+        pytest.param(_create_format, id="format"),
+        pytest.param(_create_catalog, id="catalog"),
+    ],
+)
+async def test_dataset_filters_invalidated(
+    client: httpx.AsyncClient,
+    temp_user: TestPasswordUser,
+    write: Callable[[], Awaitable[None]],
+) -> None:
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    data = response.json()
+
+    await write()
+
+    response = await client.get(
+        "/datasets/filters/", headers={"If-None-Match": etag}, auth=temp_user.auth
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json() != data
+
+
+@pytest.mark.asyncio
+async def test_dataset_filters_invalidated_by_dataset_writes(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    command = CreateDatasetFactory.build(
+        account=temp_user.account,
+        organization_siret=temp_org.siret,
+        service="Service A",
+    )
+    dataset_id = await bus.execute(command)
+
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    assert "Service A" in response.json()["service"]
+
+    payload = to_payload(UpdateDatasetPayloadFactory.build_from_create_command(command))
+    payload["service"] = "Service B"
+    response = await client.put(
+        f"/datasets/{dataset_id}/", json=payload, auth=temp_user.auth
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    assert "Service A" not in response.json()["service"]
+    assert "Service B" in response.json()["service"]
+
+    await bus.execute(DeleteDataset(id=dataset_id))
+
+    response = await client.get("/datasets/filters/", auth=temp_user.auth)
+    assert response.status_code == 200
+    assert "Service B" not in response.json()["service"]
+
+
+@pytest.mark.asyncio
+async def test_dataset_facets(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    tag_a, tag_b = [await bus.execute(CreateTagFactory.build()) for _ in range(2)]
+
+    items: List[dict] = [
+        dict(
+            service="A",
+            geographical_coverage="Monde",
+            format_ids=[1],
+            tag_ids=[],
+            license="ODbL",
+        ),
+        dict(
+            service="A",
+            geographical_coverage="Monde",
+            format_ids=[1, 2],
+            tag_ids=[tag_a],
+            license=None,
+        ),
+        dict(
+            service="B",
+            geographical_coverage="France",
+            format_ids=[2],
+            tag_ids=[tag_a, tag_b],
+            license="Licence Ouverte",
+        ),
+    ]
+
+    for kwargs in items:
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=temp_user.account, organization_siret=temp_org.siret, **kwargs
+            )
+        )
+
+    # Facets are opt-in.
+    response = await client.get("/datasets/", auth=temp_user.auth)
+    assert response.status_code == 200
+    assert response.json()["facets"] is None
+
+    params: dict = {"facets": ["service", "format_id", "tag_id", "license"]}
+    response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+    assert response.status_code == 200
+    assert response.json()["facets"] == {
+        "geographical_coverage": None,
+        "service": [{"value": "A", "count": 2}, {"value": "B", "count": 1}],
+        "format_id": [{"value": 1, "count": 2}, {"value": 2, "count": 2}],
+        "tag_id": [
+            {"value": str(tag_a), "count": 2},
+            {"value": str(tag_b), "count": 1},
+        ],
+        # Datasets without a license are not counted.
+        "license": [
+            {"value": "Licence Ouverte", "count": 1},
+            {"value": "ODbL", "count": 1},
+        ],
+    }
+
+    # Counts apply to matching datasets only.
+    params = {"facets": ["geographical_coverage", "tag_id"], "format_id": [2]}
+    response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_items"] == 2
+    assert data["facets"]["geographical_coverage"] == [
+        {"value": "France", "count": 1},
+        {"value": "Monde", "count": 1},
+    ]
+    assert data["facets"]["tag_id"] == [
+        {"value": str(tag_a), "count": 2},
+        {"value": str(tag_b), "count": 1},
+    ]
+
+    response = await client.get(
+        "/datasets/", params={"facets": "unknown"}, auth=temp_user.auth
+    )
+    assert response.status_code == 422
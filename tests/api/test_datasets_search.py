@@ -4,14 +4,23 @@ from typing import List, Optional, Tuple
 import httpx
 import pytest
 
+from server.application.catalogs.commands import CreateCatalog
+from server.application.catalogs.queries import GetCatalogBySiret
 from server.application.datasets.commands import DeleteDataset
 from server.application.datasets.queries import GetDatasetByID
 from server.application.organizations.views import OrganizationView
 from server.config.di import resolve
+from server.domain.datasets.entities import PublicationRestriction
+from server.domain.extra_fields.entities import ExtraFieldValue, TextExtraField
 from server.seedwork.application.messages import MessageBus
 from tests.factories import CreateDatasetFactory, UpdateDatasetFactory
 
-from ..helpers import TestPasswordUser
+from ..factories import (
+    CreateOrganizationFactory,
+    CreatePasswordUserFactory,
+    CreateTagFactory,
+)
+from ..helpers import TestPasswordUser, create_test_password_user
 
 DEFAULT_CORPUS_ITEMS = [
     ("Inventaire national forestier", "Ensemble des forêts de France"),
@@ -37,6 +46,10 @@ async def add_test_datasets(
             organization_siret=organization.siret,
             title=title,
             description=description,
+            # Other searchable fields must not interfere with test queries.
+            service="Direction des études",
+            geographical_coverage="Monde",
+            format_ids=[1],
         )
         pk = await bus.execute(command)
         query = GetDatasetByID(id=pk, account=user.account)
@@ -84,7 +97,7 @@ async def add_test_datasets(
         ),
         pytest.param(
             "base",
-            ["Cadastre national", "Base Carbone"],
+            ["Base Carbone", "Cadastre national"],
             id="terms:single-results:multiple-title-description",
         ),
         pytest.param(
@@ -272,6 +285,139 @@ async def test_search_ranking(
     assert titles == expected_titles
 
 
+@pytest.mark.asyncio
+async def test_search_related_fields(client: httpx.AsyncClient) -> None:
+    bus = resolve(MessageBus)
+
+    siret = await bus.execute(CreateOrganizationFactory.build())
+    await bus.execute(
+        CreateCatalog(
+            organization_siret=siret,
+            extra_fields=[
+                TextExtraField(
+                    organization_siret=siret,
+                    name="referent",
+                    title="Référent",
+                    hint_text="Personne référente",
+                )
+            ],
+        )
+    )
+    catalog = await bus.execute(GetCatalogBySiret(siret=siret))
+    extra_field_id = catalog.extra_fields[0].id
+
+    user = await create_test_password_user(
+        CreatePasswordUserFactory.build(organization_siret=siret)
+    )
+
+    tag_id = await bus.execute(CreateTagFactory.build(name="Hydrographie"))
+
+    command = CreateDatasetFactory.build(
+        account=user.account,
+        organization_siret=siret,
+        title="Cours d'eau",
+        description="Tracé des cours d'eau",
+        service="Direction de la cartographie",
+        geographical_coverage="Région Bretagne",
+        format_ids=[3],  # API (REST, GraphQL, ...)
+        tag_ids=[tag_id],
+        extra_field_values=[
+            ExtraFieldValue(extra_field_id=extra_field_id, value="Camille Dupont")
+        ],
+    )
+    pk = await bus.execute(command)
+
+    for q in ["hydrographie", "cartographie", "Bretagne", "GraphQL", "Dupont"]:
+        response = await client.get("/datasets/", params={"q": q}, auth=user.auth)
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data["items"]] == [str(pk)], q
+
+    # Search vector follows changes of related rows.
+    update_command = UpdateDatasetFactory.build(
+        id=pk,
+        tag_ids=[],
+        extra_field_values=[],
+        **command.dict(exclude={"tag_ids", "extra_field_values", "organization_siret"}),
+    )
+    await bus.execute(update_command)
+
+    for q in ["hydrographie", "Dupont"]:
+        response = await client.get("/datasets/", params={"q": q}, auth=user.auth)
+        assert response.status_code == 200
+        assert not response.json()["items"], q
+
+
+@pytest.mark.asyncio
+async def test_search_ranking_weights(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+
+    tag_id = await bus.execute(CreateTagFactory.build(name="Hydrographie"))
+
+    for title, description, tag_ids in [
+        ("In description", "Données d'hydrographie", []),
+        ("In title: hydrographie", "...", []),
+        ("In tags", "...", [tag_id]),
+    ]:
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=temp_user.account,
+                organization_siret=temp_org.siret,
+                title=title,
+                description=description,
+                service="Direction des études",
+                geographical_coverage="Monde",
+                format_ids=[1],
+                tag_ids=tag_ids,
+            )
+        )
+
+    response = await client.get(
+        "/datasets/", params={"q": "hydrographie"}, auth=temp_user.auth
+    )
+    assert response.status_code == 200
+    titles = [item["title"] for item in response.json()["items"]]
+    assert titles == ["In title: hydrographie", "In tags", "In description"]
+
+
+@pytest.mark.asyncio
+async def test_search_pagination_cursor(
+    client: httpx.AsyncClient, temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    items = [
+        ("A", "Forêt"),
+        ("B", "Forêt ancienne"),
+        ("C", "Historique des forêts anciennes"),
+        ("D", "Forêt"),
+    ]
+
+    await add_test_datasets(temp_org, temp_user, items=items)
+
+    params: dict = {"q": "Forêt ancienne"}
+    response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+    assert response.status_code == 200
+    expected_titles = [item["title"] for item in response.json()["items"]]
+    assert len(expected_titles) == 2
+
+    titles: List[str] = []
+    params["page_size"] = 1
+
+    while True:
+        response = await client.get("/datasets/", params=params, auth=temp_user.auth)
+        assert response.status_code == 200
+        data = response.json()
+        titles.extend(item["title"] for item in data["items"])
+
+        if data["next_cursor"] is None:
+            break
+
+        params["cursor"] = data["next_cursor"]
+
+    assert titles == expected_titles
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "corpus, q, expected_headlines",
@@ -318,3 +464,116 @@ async def test_search_highlight(
     assert len(items) == 1
 
     assert items[0]["headlines"] == expected_headlines
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "q, expected_titles",
+    [
+        pytest.param("", [], id="empty"),
+        pytest.param("?! &|'", [], id="garbage"),
+        pytest.param("tototitu", [], id="unknown"),
+        pytest.param(
+            "na",
+            ["Cadastre national", "Inventaire national forestier"],
+            id="prefix",
+        ),
+        pytest.param("carb", ["Base Carbone"], id="prefix-single-result"),
+        pytest.param(
+            "NATIONALE",
+            ["Cadastre national", "Inventaire national forestier"],
+            id="stem",
+        ),
+        pytest.param("cadastre nat", ["Cadastre national"], id="multiple-terms"),
+        pytest.param("cadastre for", [], id="multiple-terms-no-match"),
+        pytest.param("france", [], id="description-not-matched"),
+    ],
+)
+async def test_suggest(
+    client: httpx.AsyncClient,
+    temp_org: OrganizationView,
+    temp_user: TestPasswordUser,
+    q: str,
+    expected_titles: List[str],
+) -> None:
+    await add_test_datasets(temp_org, temp_user)
+
+    response = await client.get(
+        "/datasets/suggest/", params={"q": q}, auth=temp_user.auth
+    )
+    assert response.status_code == 200
+    data = response.json()
+    # Most recent first.
+    assert [item["title"] for item in data] == expected_titles
+    assert all(set(item) == {"id", "title"} for item in data)
+
+
+@pytest.mark.asyncio
+async def test_suggest_changes_when_data_changes(
+    client: httpx.AsyncClient,
+    temp_org: OrganizationView,
+    temp_user: TestPasswordUser,
+) -> None:
+    bus = resolve(MessageBus)
+
+    async def get_suggested_ids(q: str) -> List[str]:
+        response = await client.get(
+            "/datasets/suggest/", params={"q": q}, auth=temp_user.auth
+        )
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()]
+
+    command = CreateDatasetFactory.build(
+        account=temp_user.account,
+        organization_siret=temp_org.siret,
+        title="Arbres remarquables",
+    )
+    pk = await bus.execute(command)
+    assert await get_suggested_ids("arb") == [str(pk)]
+
+    update_command = UpdateDatasetFactory.build(
+        account=temp_user.account,
+        id=pk,
+        title="Monuments historiques",
+        **command.dict(exclude={"title", "account", "organization_siret"}),
+    )
+    await bus.execute(update_command)
+    assert await get_suggested_ids("arb") == []
+    assert await get_suggested_ids("monu") == [str(pk)]
+
+    await bus.execute(DeleteDataset(id=pk))
+    assert await get_suggested_ids("monu") == []
+
+
+@pytest.mark.asyncio
+async def test_suggest_restricted_datasets(
+    client: httpx.AsyncClient,
+    temp_org: OrganizationView,
+    temp_user: TestPasswordUser,
+) -> None:
+    bus = resolve(MessageBus)
+
+    command = CreateDatasetFactory.build(
+        account=temp_user.account,
+        organization_siret=temp_org.siret,
+        title="Brouillon confidentiel",
+        publication_restriction=PublicationRestriction.DRAFT,
+    )
+    pk = await bus.execute(command)
+
+    siret = await bus.execute(CreateOrganizationFactory.build())
+    other_user = await create_test_password_user(
+        CreatePasswordUserFactory.build(organization_siret=siret)
+    )
+
+    response = await client.get(
+        "/datasets/suggest/", params={"q": "brou"}, auth=temp_user.auth
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [str(pk)]
+
+    response = await client.get(
+        "/datasets/suggest/", params={"q": "brou"}, auth=other_user.auth
+    )
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,89 @@
+import httpx
+import pytest
+
+from server.application.catalogs.commands import CreateCatalog
+from server.config.di import resolve
+from server.seedwork.application.messages import MessageBus
+
+from ..factories import CreateOrganizationFactory
+from ..helpers import TestPasswordUser, api_key_auth
+
+
+@pytest.mark.asyncio
+async def test_database_pool_stats(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser
+) -> None:
+    response = await client.get("/monitoring/database-pool/")
+    assert response.status_code == 403
+
+    response = await client.get("/monitoring/database-pool/", auth=temp_user.auth)
+    assert response.status_code == 403
+
+    response = await client.get("/monitoring/database-pool/", auth=api_key_auth)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["size"] == 5
+    assert data["waits"] > 0
+    assert data["waiting"] == 0
+    assert list(data["wait_time_buckets"])[-1] == "+Inf"
+    assert data["wait_time_buckets"]["+Inf"] == data["waits"]
+
+
+@pytest.mark.asyncio
+async def test_export_cache_stats(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+    siret = await bus.execute(CreateOrganizationFactory.build())
+    await bus.execute(CreateCatalog(organization_siret=siret))
+
+    response = await client.get("/monitoring/export-cache/", auth=temp_user.auth)
+    assert response.status_code == 403
+
+    response = await client.get("/monitoring/export-cache/", auth=api_key_auth)
+    assert response.status_code == 200
+    stats = response.json()
+
+    # Miss, then hit.
+    for _ in range(2):
+        response = await client.get(f"/catalogs/{siret}/export.csv")
+        assert response.status_code == 200
+
+    response = await client.get("/monitoring/export-cache/", auth=api_key_auth)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["misses"] == stats["misses"] + 1
+    assert data["hits"] == stats["hits"] + 1
+    # Tests use the memory backend.
+    assert data["entries"] >= 1
+    assert data["bytes"] > 0
+    assert data["evictions"] >= 0
+    assert data["rejected"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_dataset_list_cache_stats(
+    client: httpx.AsyncClient, temp_user: TestPasswordUser
+) -> None:
+    response = await client.get("/monitoring/dataset-list-cache/", auth=temp_user.auth)
+    assert response.status_code == 403
+
+    response = await client.get("/monitoring/dataset-list-cache/", auth=api_key_auth)
+    assert response.status_code == 200
+    stats = response.json()
+
+    # Miss, then hit.
+    for _ in range(2):
+        response = await client.get("/datasets/", auth=temp_user.auth)
+        assert response.status_code == 200
+
+    response = await client.get("/monitoring/dataset-list-cache/", auth=api_key_auth)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["misses"] == stats["misses"] + 1
+    assert data["hits"] == stats["hits"] + 1
+    assert data["invalidations"] == stats["invalidations"]
+    assert data["size"] >= 1
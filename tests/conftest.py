@@ -21,6 +21,7 @@ from server.config import Settings
 from server.config.di import bootstrap, resolve
 from server.domain.auth.entities import UserRole
 from server.infrastructure.database import Database
+from server.infrastructure.datasets.caching import DatasetFiltersCache, DatasetListCache
 from server.seedwork.application.messages import MessageBus
 from tests.factories import CreateTagFactory
 
@@ -36,6 +37,8 @@ os.environ["APP_CLIENT_URL"] = "http://client.testserver"
 os.environ["APP_DATAPASS_URL"] = "https://auth-staging.api.gouv.fr"
 os.environ["APP_DATAPASS_CLIENT_ID"] = "<testing>"
 os.environ["APP_DATAPASS_CLIENT_SECRET"] = "<testing>"
+# Tests share a single connection, see `autorollback_db()`.
+os.environ["APP_QUERY_CONCURRENCY"] = "1"
 
 bootstrap()
 
@@ -64,6 +67,11 @@ async def autorollback_db() -> AsyncIterator[None]:
     async with db.autorollback():
         yield
 
+    # Rolled back writes don't go through repositories, so cached results may
+    # refer to data which doesn't exist anymore.
+    resolve(DatasetListCache).clear()
+    resolve(DatasetFiltersCache).invalidate()
+
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def warmup_db() -> None:
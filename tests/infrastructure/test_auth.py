@@ -0,0 +1,57 @@
+import datetime as dt
+
+from server.domain.auth.entities import Account, UserRole
+from server.domain.common.types import id_factory
+from server.domain.organizations.types import Siret
+from server.infrastructure.auth.caching import AccountTokenCache
+
+from ..factories import fake
+
+
+def _make_account(api_token: str) -> Account:
+    return Account(
+        id=id_factory(),
+        organization_siret=Siret(fake.siret()),
+        email=fake.email(),
+        role=UserRole.USER,
+        api_token=api_token,
+    )
+
+
+def test_account_token_cache() -> None:
+    now = dt.datetime(2022, 10, 11, 13, 0, 0, tzinfo=dt.timezone.utc)
+    cache = AccountTokenCache(
+        max_age=dt.timedelta(minutes=1), max_size=2, nowfunc=lambda: now
+    )
+
+    one, two, three = (_make_account(api_token) for api_token in ("1", "2", "3"))
+
+    cache.set(one, cache.generation)
+    cache.set(two, cache.generation)
+    assert cache.get("1") == one
+    assert cache.get("unknown") is None
+
+    # Cached accounts can't be modified by callers.
+    account = cache.get("1")
+    assert account is not None
+    account.update_api_token("other")
+    assert cache.get("1") == one
+
+    # Least recently used accounts are evicted.
+    cache.set(three, cache.generation)
+    assert cache.get("2") is None
+    assert cache.get("1") == one
+    assert cache.get("3") == three
+
+    cache.invalidate(one.id)
+    assert cache.get("1") is None
+    assert cache.get("3") == three
+
+    # Accounts fetched before an invalidation are not stored.
+    generation = cache.generation
+    cache.invalidate(one.id)
+    cache.set(one, generation)
+    assert cache.get("1") is None
+
+    now += dt.timedelta(minutes=1, seconds=1)
+    assert cache.get("3") is None
@@ -1,13 +1,28 @@
+import asyncio
 import datetime as dt
+import gzip
+from pathlib import Path
 from typing import Optional
 
+import brotli
 import pytest
 
 from server.application.datasets.queries import GetDatasetByID
 from server.config.di import resolve
+from server.domain.catalogs.entities import ExportFormat
 from server.domain.common.types import Skip
 from server.domain.organizations.types import Siret
-from server.infrastructure.catalogs.caching import ExportCache
+from server.infrastructure.catalogs.caching import (
+    ContentEncoding,
+    DirectoryExportCacheBackend,
+    ExportCache,
+    ExportCacheBackend,
+    ExportCacheStats,
+    ExportCacheUsage,
+    MemoryExportCacheBackend,
+    SqlExportCacheBackend,
+    _make_key,
+)
 from server.infrastructure.catalogs.models import CatalogModel
 from server.infrastructure.database import Database
 from server.infrastructure.organizations.models import OrganizationModel
@@ -50,28 +65,381 @@ async def test_catalog_creation_and_relationships() -> None:
     assert dataset.catalog_record.organization.siret == siret
 
 
+def _make_backend(backend_name: str, tmp_path: Path) -> ExportCacheBackend:
+    if backend_name == "directory":
+        return DirectoryExportCacheBackend(tmp_path / "exports")
+
+    if backend_name == "database":
+        return SqlExportCacheBackend(resolve(Database))
+
+    return MemoryExportCacheBackend()
+
+
 @pytest.mark.asyncio
+@pytest.mark.parametrize("backend_name", ["memory", "directory", "database"])
 @pytest.mark.parametrize(
     "max_age_delta, expected_value",
     [
-        pytest.param(-1, "<csv content>", id="fresh"),
-        pytest.param(0, "<csv content>", id="fresh-limit"),
+        pytest.param(-1, b"<csv content>", id="fresh"),
+        pytest.param(0, b"<csv content>", id="fresh-limit"),
         pytest.param(1, None, id="stale"),
     ],
 )
-async def test_export_cache(max_age_delta: int, expected_value: Optional[str]) -> None:
-    now = dt.datetime(2022, 10, 11, 13, 0, 0)
+async def test_export_cache(
+    tmp_path: Path,
+    backend_name: str,
+    max_age_delta: int,
+    expected_value: Optional[bytes],
+) -> None:
+    now = dt.datetime(2022, 10, 11, 13, 0, 0, tzinfo=dt.timezone.utc)
+
+    backend = _make_backend(backend_name, tmp_path)
 
-    export_cache = ExportCache(max_age=dt.timedelta(seconds=10), nowfunc=lambda: now)
+    export_cache = ExportCache(
+        max_age=dt.timedelta(seconds=10), backend=backend, nowfunc=lambda: now
+    )
 
     siret = Siret(fake.siret())
-    assert export_cache.get(siret) is None
-    assert export_cache.miss_headers == {"Cache-Control": "max-age=10"}
-    assert export_cache.hit_headers == {"Cache-Control": "max-age=10", "X-Cache": "HIT"}
+    assert await export_cache.get(siret) is None
 
-    export_cache.set(siret, "<csv content>")
+    await export_cache.set(
+        siret, b"<csv content>", now, await export_cache.get_generation(siret)
+    )
 
     # Simulate waiting for some time...
     now += dt.timedelta(seconds=10 + max_age_delta)
 
-    assert export_cache.get(siret) == expected_value
+    entry = await export_cache.get(siret)
+
+    if expected_value is None:
+        assert entry is None
+        # Stale entries are evicted from the backend.
+        assert await backend.get(f"{siret}.csv") is None
+    else:
+        assert entry is not None
+        assert entry.content == expected_value
+        assert entry.etag.startswith('"')
+        assert entry.last_modified == dt.datetime(
+            2022, 10, 11, 13, 0, 0, tzinfo=dt.timezone.utc
+        )
+        assert export_cache.hit_headers(entry) == {
+            "Cache-Control": "no-cache",
+            "Last-Modified": "Tue, 11 Oct 2022 13:00:00 GMT",
+            "ETag": entry.etag,
+            "X-Cache": "HIT",
+            "Vary": "Accept-Encoding",
+        }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend_name", ["memory", "directory", "database"])
+async def test_export_cache_invalidate(tmp_path: Path, backend_name: str) -> None:
+    backend = _make_backend(backend_name, tmp_path)
+
+    # Simulate two worker processes sharing the same backend.
+    one = ExportCache(max_age=dt.timedelta(days=1), backend=backend)
+    other = ExportCache(max_age=dt.timedelta(days=1), backend=backend)
+
+    siret = Siret(fake.siret())
+    last_modified = one.now()
+    content = b"titre,description\n" + b"Example,Example dataset\n" * 100
+
+    generation = await one.get_generation(siret)
+    await one.set(siret, content, last_modified, generation)
+
+    for encoding in ContentEncoding:
+        assert await other.get(siret, encoding=encoding) is not None
+
+    keys = [
+        _make_key(siret, ExportFormat.CSV, encoding) for encoding in ContentEncoding
+    ]
+
+    for key in keys:
+        assert await backend.get(key) is not None
+
+    # All variants are dropped.
+    await other.invalidate(siret)
+
+    for key in keys:
+        assert await backend.get(key) is None
+
+    for encoding in ContentEncoding:
+        assert await one.get(siret, encoding=encoding) is None
+
+    # Exports generated before the invalidation are not stored, even by other
+    # processes.
+    await one.set(siret, content, last_modified, generation)
+    assert await one.get(siret) is None
+
+    new_generation = await one.get_generation(siret)
+    assert new_generation != generation
+    await one.set(siret, content, last_modified, new_generation)
+    assert await other.get(siret) is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend_name", ["memory", "directory", "database"])
+async def test_export_cache_compressed_variants(
+    tmp_path: Path, backend_name: str
+) -> None:
+    backend = _make_backend(backend_name, tmp_path)
+    export_cache = ExportCache(max_age=dt.timedelta(days=1), backend=backend)
+    last_modified = export_cache.now()
+
+    siret = Siret(fake.siret())
+    content = b"titre,description\n" + b"Example,Example dataset\n" * 100
+    await export_cache.set(siret, content, last_modified, 0)
+
+    decompress = {
+        ContentEncoding.IDENTITY: lambda data: data,
+        ContentEncoding.GZIP: gzip.decompress,
+        ContentEncoding.BROTLI: brotli.decompress,
+    }
+    etags = set()
+
+    for encoding in ContentEncoding:
+        # Read back from the backend, as other processes would.
+        entry = await ExportCache(max_age=dt.timedelta(days=1), backend=backend).get(
+            siret, encoding=encoding
+        )
+        assert entry is not None
+        assert entry.encoding == encoding
+        assert entry.last_modified == last_modified
+        assert decompress[encoding](entry.content) == content
+        etags.add(entry.etag)
+
+        if encoding != ContentEncoding.IDENTITY:
+            assert len(entry.content) < len(content) / 10
+
+    # Each variant has its own ETag.
+    assert len(etags) == len(ContentEncoding)
+
+    # Small exports are not compressed.
+    await export_cache.set(siret, b"titre\n", last_modified, 0)
+    entry = await export_cache.get(siret, encoding=ContentEncoding.GZIP)
+    assert entry is not None
+    assert entry.encoding == ContentEncoding.IDENTITY
+    assert entry.content == b"titre\n"
+    # Compressed variants of the previous export are dropped.
+    for encoding in (ContentEncoding.GZIP, ContentEncoding.BROTLI):
+        assert await backend.get(_make_key(siret, ExportFormat.CSV, encoding)) is None
+
+
+@pytest.mark.asyncio
+async def test_export_cache_single_flight_encoding() -> None:
+    export_cache = ExportCache(max_age=dt.timedelta(days=1))
+
+    siret = Siret(fake.siret())
+    assert await export_cache.claim(siret) is None
+
+    waiter = asyncio.create_task(
+        export_cache.claim(siret, encoding=ContentEncoding.BROTLI)
+    )
+    await asyncio.sleep(0)
+
+    content = b"<csv content>" * 100
+    await export_cache.set(siret, content, export_cache.now(), 0)
+
+    entry = await waiter
+    assert entry is not None
+    assert entry.encoding == ContentEncoding.BROTLI
+    assert brotli.decompress(entry.content) == content
+
+
+@pytest.mark.asyncio
+async def test_export_cache_memory_backend_lru() -> None:
+    backend = MemoryExportCacheBackend(max_bytes=10)
+    export_cache = ExportCache(max_age=dt.timedelta(days=1), backend=backend)
+    last_modified = export_cache.now()
+
+    one, two, three = (Siret(fake.siret()) for _ in range(3))
+
+    await export_cache.set(one, b"1111", last_modified, 0)
+    await export_cache.set(two, b"2222", last_modified, 0)
+    assert backend.usage == ExportCacheUsage(
+        entries=2, bytes=8, evictions=0, rejected=0
+    )
+
+    # Use the first one, so that the second one is the least recently used.
+    assert await export_cache.get(one) is not None
+
+    await export_cache.set(three, b"3333", last_modified, 0)
+    assert backend.usage == ExportCacheUsage(
+        entries=2, bytes=8, evictions=1, rejected=0
+    )
+    assert await export_cache.get(two) is None
+    assert await export_cache.get(one) is not None
+    assert await export_cache.get(three) is not None
+
+    # Replacing an entry accounts for its new size.
+    await export_cache.set(one, b"1", last_modified, 0)
+    assert backend.usage == ExportCacheUsage(
+        entries=2, bytes=5, evictions=1, rejected=0
+    )
+
+    # Entries larger than the cap are not stored at all, and don't evict others.
+    await export_cache.set(two, b"2" * 11, last_modified, 0)
+    assert await export_cache.get(two) is None
+    assert backend.usage == ExportCacheUsage(
+        entries=2, bytes=5, evictions=1, rejected=1
+    )
+
+    await export_cache.invalidate(one)
+    assert backend.usage == ExportCacheUsage(
+        entries=1, bytes=4, evictions=1, rejected=1
+    )
+
+    assert export_cache.stats == ExportCacheStats(
+        hits=3, misses=2, entries=1, bytes=4, evictions=1, rejected=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_cache_stats_shared_backend(tmp_path: Path) -> None:
+    export_cache = ExportCache(
+        max_age=dt.timedelta(days=1), backend=DirectoryExportCacheBackend(tmp_path)
+    )
+
+    siret = Siret(fake.siret())
+    assert await export_cache.get(siret) is None
+    await export_cache.set(siret, b"<csv content>", export_cache.now(), 0)
+    assert await export_cache.get(siret) is not None
+
+    # Size of shared backends is not tracked by each process.
+    assert export_cache.stats == ExportCacheStats(
+        hits=1, misses=1, entries=None, bytes=None, evictions=None, rejected=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_cache_shared_by_directory_backends(tmp_path: Path) -> None:
+    # Simulate two worker processes sharing the same directory.
+    one = ExportCache(
+        max_age=dt.timedelta(days=1),
+        backend=DirectoryExportCacheBackend(tmp_path),
+    )
+    other = ExportCache(
+        max_age=dt.timedelta(days=1),
+        backend=DirectoryExportCacheBackend(tmp_path),
+    )
+
+    siret = Siret(fake.siret())
+    await one.set(siret, b"<csv content>", one.now(), await one.get_generation(siret))
+
+    entry = await other.get(siret)
+    assert entry is not None
+    assert entry.content == b"<csv content>"
+    assert [path.name for path in tmp_path.iterdir()] == [f"{siret}.csv"]
+
+
+@pytest.mark.asyncio
+async def test_export_cache_single_flight() -> None:
+    export_cache = ExportCache(max_age=dt.timedelta(days=1))
+    siret = Siret(fake.siret())
+
+    # The first request regenerates the export...
+    assert await export_cache.claim(siret) is None
+
+    # Others wait for it.
+    waiters = [asyncio.create_task(export_cache.claim(siret)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert not any(waiter.done() for waiter in waiters)
+
+    await export_cache.set(
+        siret,
+        b"<csv content>",
+        export_cache.now(),
+        await export_cache.get_generation(siret),
+    )
+
+    for entry in await asyncio.gather(*waiters):
+        assert entry is not None
+        assert entry.content == b"<csv content>"
+
+
+@pytest.mark.asyncio
+async def test_export_cache_single_flight_release() -> None:
+    export_cache = ExportCache(max_age=dt.timedelta(days=1))
+    siret = Siret(fake.siret())
+
+    assert await export_cache.claim(siret) is None
+
+    waiters = [asyncio.create_task(export_cache.claim(siret)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    # Regeneration failed: one of the waiters takes over.
+    export_cache.release(siret)
+    done, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    assert len(done) == 1
+    assert done.pop().result() is None
+
+    await export_cache.set(
+        siret,
+        b"<csv content>",
+        export_cache.now(),
+        await export_cache.get_generation(siret),
+    )
+    entry = await pending.pop()
+    assert entry is not None
+    assert entry.content == b"<csv content>"
+
+
+@pytest.mark.asyncio
+async def test_export_cache_single_flight_timeout() -> None:
+    export_cache = ExportCache(
+        max_age=dt.timedelta(days=1), claim_timeout=dt.timedelta(milliseconds=10)
+    )
+    siret = Siret(fake.siret())
+
+    assert await export_cache.claim(siret) is None
+
+    # The regeneration is abandoned without releasing it.
+    assert await export_cache.claim(siret) is None
+
+
+@pytest.mark.asyncio
+async def test_export_cache_stale_while_revalidate() -> None:
+    now = dt.datetime(2022, 10, 11, 13, 0, 0, tzinfo=dt.timezone.utc)
+
+    export_cache = ExportCache(
+        max_age=dt.timedelta(seconds=10),
+        stale_while_revalidate=dt.timedelta(seconds=10),
+        nowfunc=lambda: now,
+    )
+    siret = Siret(fake.siret())
+
+    calls = 0
+
+    async def revalidate() -> bytes:
+        nonlocal calls
+        calls += 1
+        return b"<new csv content>"
+
+    await export_cache.set(
+        siret, b"<csv content>", now, await export_cache.get_generation(siret)
+    )
+
+    now += dt.timedelta(seconds=15)
+
+    # Stale entries are only served if they can be revalidated.
+    assert await export_cache.get(siret) is None
+
+    for _ in range(3):
+        entry = await export_cache.get(siret, revalidate=revalidate)
+        assert entry is not None
+        assert entry.content == b"<csv content>"
+
+    # Wait for the background regeneration, which runs once.
+    entry = await export_cache.claim(siret)
+    assert entry is not None
+    assert entry.content == b"<new csv content>"
+    assert calls == 1
+
+    entry = await export_cache.get(siret)
+    assert entry is not None
+    assert entry.content == b"<new csv content>"
+
+    # Entries are dropped after the stale-while-revalidate window.
+    now += dt.timedelta(seconds=25)
+    assert await export_cache.get(siret, revalidate=revalidate) is None
+    assert calls == 1
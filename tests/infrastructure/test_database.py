@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import uuid
+
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.exc
+
+from server.config import Settings
+from server.config.di import resolve
+from server.infrastructure.database import Database
+from server.infrastructure.tags.models import TagModel
+
+
+@pytest.mark.asyncio
+async def test_database_pool_stats(caplog: pytest.LogCaptureFixture) -> None:
+    settings = resolve(Settings)
+    db = Database(
+        settings.env_database_url, pool_size=1, max_overflow=0, pool_timeout=0.2
+    )
+
+    caplog.set_level(logging.WARNING)
+
+    try:
+        stats = db.pool_stats
+        assert stats.size == 1
+        assert stats.checked_out == 0
+        assert stats.waits == 0
+
+        async with db.engine.connect():
+            stats = db.pool_stats
+            assert stats.checked_out == 1
+            assert stats.waits == 1
+
+            # The pool is exhausted: wait for a connection, until timeout.
+            task = asyncio.create_task(db.engine.connect().start())
+            await asyncio.sleep(0.1)
+            assert db.pool_stats.waiting == 1
+
+            with pytest.raises(sqlalchemy.exc.TimeoutError):
+                await task
+
+        # Slow waits are logged.
+        assert "for a database connection" in caplog.text
+
+        stats = db.pool_stats
+        assert stats.checked_out == 0
+        assert stats.waiting == 0
+        assert stats.waits == 2
+        assert stats.wait_time >= 0.2
+        assert stats.wait_time_buckets["0.1"] == 1
+        assert stats.wait_time_buckets["0.5"] == 2
+        assert stats.wait_time_buckets["+Inf"] == 2
+    finally:
+        await db.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_read_session_uses_replica() -> None:
+    settings = resolve(Settings)
+    # The test database stands in for the replica.
+    db = Database(
+        settings.env_database_url,
+        replica_url=settings.env_database_url,
+        replica_max_lag=60,
+    )
+    assert db.replica_engine is not None
+
+    try:
+        async with db.read_session() as session:
+            assert session.bind is db.replica_engine
+            assert (await session.execute(sa.select(1))).scalar_one() == 1
+
+        # Statements other than ORM writes, e.g. of caches, don't count as writes.
+        async with db.session() as session:
+            await session.execute(sa.select(1))
+            await session.commit()
+
+        async with db.read_session() as session:
+            assert session.bind is db.replica_engine
+
+        # Reads which fill caches are served by the primary.
+        with db.primary_reads():
+            async with db.read_session() as session:
+                assert session.bind is db.engine
+
+        async with db.read_session() as session:
+            assert session.bind is db.replica_engine
+
+        # Writes are read back from the primary, whatever the replication lag.
+        async with db.session() as session:
+            instance = TagModel(id=uuid.uuid4(), name="replica-test")
+            session.add(instance)
+            await session.flush()
+            await session.delete(instance)
+            await session.commit()
+
+        async with db.read_session() as session:
+            assert session.bind is db.engine
+    finally:
+        await db.engine.dispose()
+        await db.replica_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_read_session_without_replica() -> None:
+    settings = resolve(Settings)
+    db = Database(settings.env_database_url)
+    assert db.replica_engine is None
+
+    try:
+        async with db.read_session() as session:
+            assert session.bind is db.engine
+    finally:
+        await db.engine.dispose()
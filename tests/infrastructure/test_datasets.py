@@ -1,19 +1,43 @@
+import datetime as dt
+import uuid
+from typing import Optional, Union
+
 import pytest
+import sqlalchemy.exc
 from sqlalchemy import select
 from sqlalchemy.orm import contains_eager
 
 from server.application.datasets.commands import DeleteDataset
-from server.application.datasets.queries import GetDatasetByID
+from server.application.datasets.queries import GetAllDatasets, GetDatasetByID
 from server.application.organizations.views import OrganizationView
 from server.config.di import resolve
+from server.domain.auth.entities import Account, UserRole
 from server.domain.catalog_records.repositories import CatalogRecordRepository
+from server.domain.common import datetime as dtutil
+from server.domain.common.pagination import Page
+from server.domain.common.types import ID, Skip, id_factory
+from server.domain.datasets.repositories import DatasetRepository
+from server.domain.datasets.specifications import DatasetSpec
+from server.domain.organizations.types import Siret
+from server.domain.tags.repositories import TagRepository
 from server.infrastructure.database import Database
+from server.infrastructure.datasets.caching import (
+    DatasetFiltersCache,
+    DatasetListCache,
+    DatasetListCacheKey,
+    DatasetListCacheStats,
+)
 from server.infrastructure.datasets.models import DatasetModel
 from server.infrastructure.tags.models import TagModel, dataset_tag
 from server.seedwork.application.messages import MessageBus
 from tests.helpers import TestPasswordUser
 
-from ..factories import CreateDatasetFactory, CreateTagFactory
+from ..factories import (
+    CreateDatasetFactory,
+    CreateTagFactory,
+    UpdateDatasetFactory,
+    fake,
+)
 
 
 @pytest.mark.asyncio
@@ -54,3 +78,222 @@ async def test_dataset_cascades(
         tag = result.unique().scalar_one()
         assert tag.name == "Architecture"
         assert not tag.datasets
+
+
+@pytest.mark.asyncio
+async def test_dataset_list_cache(
+    temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    bus = resolve(MessageBus)
+    cache = resolve(DatasetListCache)
+
+    query = GetAllDatasets(account=temp_user.account)
+
+    pagination = await bus.execute(query)
+    assert pagination.total_items == 0
+    hits, misses, *_ = cache.stats
+
+    # Same listing, served from the cache.
+    assert await bus.execute(query) == pagination
+    assert cache.stats.hits == hits + 1
+    assert cache.stats.misses == misses
+
+    # Writes are reflected.
+    dataset_id = await bus.execute(
+        CreateDatasetFactory.build(
+            account=temp_user.account, organization_siret=temp_org.siret
+        )
+    )
+    pagination = await bus.execute(query)
+    assert [item.id for item in pagination.items] == [dataset_id]
+    assert cache.stats.misses == misses + 1
+
+    await bus.execute(
+        UpdateDatasetFactory.build(
+            account=temp_user.account, id=dataset_id, title="Updated title"
+        )
+    )
+    pagination = await bus.execute(query)
+    assert [item.title for item in pagination.items] == ["Updated title"]
+
+    await bus.execute(DeleteDataset(id=dataset_id))
+    pagination = await bus.execute(query)
+    assert pagination.total_items == 0
+
+
+_SIRET_A = Siret("123 456 789 12345")
+_SIRET_B = Siret("987 654 321 54321")
+
+
+def _make_account(organization_siret: Siret) -> Account:
+    return Account(
+        id=id_factory(),
+        organization_siret=organization_siret,
+        email=fake.email(),
+        role=UserRole.USER,
+        api_token="<token>",
+    )
+
+
+def test_dataset_list_cache_key() -> None:
+    tag_ids = [ID(uuid.uuid4()), ID(uuid.uuid4())]
+
+    # Equivalent listings share the same key.
+    assert DatasetListCacheKey.build(
+        DatasetSpec(search_term=" forêt  national", tag__id__in=tag_ids),
+        Page(cursor="abc", number=3),
+        Skip(),
+    ) == DatasetListCacheKey.build(
+        DatasetSpec(search_term="forêt national", tag__id__in=tag_ids[::-1]),
+        Page(cursor="abc"),
+        Skip(),
+    )
+
+    # Accounts of the same organization see the same datasets.
+    account = _make_account(_SIRET_A)
+    other_account = _make_account(account.organization_siret)
+
+    assert DatasetListCacheKey.build(
+        DatasetSpec(), Page(), account
+    ) == DatasetListCacheKey.build(DatasetSpec(), Page(), other_account)
+
+    assert DatasetListCacheKey.build(
+        DatasetSpec(), Page(), account
+    ) != DatasetListCacheKey.build(DatasetSpec(), Page(), Skip())
+
+
+@pytest.mark.parametrize(
+    "spec, account_siret, restricted, expected_affected",
+    [
+        pytest.param(DatasetSpec(), None, False, True, id="public"),
+        pytest.param(DatasetSpec(), None, True, False, id="restricted"),
+        pytest.param(
+            DatasetSpec(include_all_datasets=True),
+            None,
+            True,
+            True,
+            id="restricted-all-datasets",
+        ),
+        pytest.param(DatasetSpec(), _SIRET_A, True, True, id="restricted-same-org"),
+        pytest.param(DatasetSpec(), _SIRET_B, True, False, id="restricted-other-org"),
+        pytest.param(DatasetSpec(), _SIRET_B, False, True, id="public-other-org"),
+        pytest.param(
+            DatasetSpec(organization_siret=_SIRET_B),
+            None,
+            False,
+            False,
+            id="public-filtered-other-org",
+        ),
+    ],
+)
+def test_dataset_list_cache_invalidation(
+    spec: DatasetSpec,
+    account_siret: Optional[Siret],
+    restricted: bool,
+    expected_affected: bool,
+) -> None:
+    account: Union[Account, Skip] = Skip()
+
+    if account_siret is not None:
+        account = _make_account(account_siret)
+
+    cache = DatasetListCache(max_age=dt.timedelta(seconds=10))
+    key = DatasetListCacheKey.build(spec, Page(), account)
+
+    cache.set(key, ([], 0), cache.generation)
+    cache.invalidate(_SIRET_A, restricted=restricted)
+
+    assert (cache.get(key) is None) is expected_affected
+
+
+def test_dataset_list_cache_expiry_and_concurrent_writes() -> None:
+    now = dtutil.now()
+    cache = DatasetListCache(max_age=dt.timedelta(seconds=10), nowfunc=lambda: now)
+    key = DatasetListCacheKey.build(DatasetSpec(), Page(), Skip())
+
+    # Results fetched while a dataset was written are not stored.
+    generation = cache.generation
+    cache.invalidate(_SIRET_A, restricted=False)
+    cache.set(key, ([], 0), generation)
+    assert cache.get(key) is None
+
+    cache.set(key, ([], 0), cache.generation)
+    assert cache.get(key) == ([], 0)
+
+    now += dt.timedelta(seconds=11)
+    assert cache.get(key) is None
+
+    assert cache.stats == DatasetListCacheStats(
+        hits=1, misses=2, invalidations=0, size=0
+    )
+
+
+def test_dataset_filters_cache_lru() -> None:
+    cache = DatasetFiltersCache(max_age=dt.timedelta(seconds=10), max_size=2)
+
+    for siret in (None, _SIRET_A):
+        cache.set(siret, b"{}", cache.generation)
+
+    # Reading an entry makes it the most recently used one...
+    assert cache.get(None) is not None
+
+    # ... so the least recently used one is dropped when the cache is full.
+    cache.set(_SIRET_B, b"{}", cache.generation)
+    assert cache.get(_SIRET_A) is None
+    assert cache.get(None) is not None
+    assert cache.get(_SIRET_B) is not None
+
+
+@pytest.mark.asyncio
+async def test_tag_used_by_datasets_cannot_be_deleted(
+    temp_org: OrganizationView, temp_user: TestPasswordUser
+) -> None:
+    # Otherwise cached listings and exports of these datasets would be stale.
+    bus = resolve(MessageBus)
+
+    tag_id = await bus.execute(CreateTagFactory.build())
+    await bus.execute(
+        CreateDatasetFactory.build(
+            account=temp_user.account,
+            organization_siret=temp_org.siret,
+            tag_ids=[tag_id],
+        )
+    )
+
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        await resolve(TagRepository).delete_many_by_id([tag_id])
+
+
+@pytest.mark.asyncio
+async def test_dataset_stream_all(
+    temp_org: OrganizationView, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bus = resolve(MessageBus)
+    repository = resolve(DatasetRepository)
+
+    # Fetch datasets over several batches.
+    monkeypatch.setattr(
+        "server.infrastructure.datasets.repositories._STREAM_BATCH_SIZE", 2
+    )
+
+    tag_id = await bus.execute(CreateTagFactory.build())
+
+    ids = [
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=Skip(), organization_siret=temp_org.siret, tag_ids=[tag_id]
+            )
+        )
+        for _ in range(5)
+    ]
+
+    datasets = [
+        dataset
+        async for dataset in repository.stream_all(
+            spec=DatasetSpec(organization_siret=temp_org.siret)
+        )
+    ]
+
+    # Most recent first, as in listings.
+    assert [dataset.id for dataset in datasets] == ids[::-1]
+    assert all([tag.id for tag in dataset.tags] == [tag_id] for dataset in datasets)
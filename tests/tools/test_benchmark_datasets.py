@@ -0,0 +1,33 @@
+import pytest
+
+from server.config.di import resolve
+from server.config.settings import Settings
+from tools import benchmark_datasets
+
+
+@pytest.mark.asyncio
+async def test_benchmark_datasets(capsys: pytest.CaptureFixture) -> None:
+    await benchmark_datasets.main(n=20, repeat=1, explain_plans=True)
+
+    out = capsys.readouterr().out
+
+    for scenario in benchmark_datasets.SCENARIOS:
+        assert scenario.name in out
+
+    for name in benchmark_datasets.STRATEGIES:
+        assert name in out
+
+    for q in benchmark_datasets.SUGGESTIONS:
+        assert repr(q) in out
+
+    assert "Execution Time" in out
+
+
+@pytest.mark.asyncio
+async def test_benchmark_datasets_refuses_live_database(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(resolve(Settings), "server_mode", "live")
+
+    with pytest.raises(SystemExit, match="APP_SERVER_MODE='live'"):
+        await benchmark_datasets.main(n=20, repeat=1)
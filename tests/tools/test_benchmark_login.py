@@ -0,0 +1,14 @@
+import pytest
+
+from tools import benchmark_login
+
+
+@pytest.mark.asyncio
+async def test_benchmark_login(capsys: pytest.CaptureFixture) -> None:
+    await benchmark_login.main(logins=2, probes=2)
+
+    out = capsys.readouterr().out
+
+    assert "idle" in out
+    assert "during 2 logins" in out
+    assert "p99=" in out
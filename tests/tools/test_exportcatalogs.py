@@ -0,0 +1,67 @@
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from server.api.catalogs.rendering import iter_export
+from server.application.catalogs.commands import CreateCatalog
+from server.application.catalogs.queries import GetCatalogExport
+from server.config.di import resolve
+from server.domain.catalogs.entities import ExportFormat
+from server.domain.common.types import Skip
+from server.domain.datasets.entities import PublicationRestriction
+from server.seedwork.application.messages import MessageBus
+from tools import exportcatalogs
+
+from ..factories import CreateDatasetFactory, CreateOrganizationFactory
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", list(ExportFormat))
+async def test_exportcatalogs(tmp_path: Path, fmt: ExportFormat) -> None:
+    bus = resolve(MessageBus)
+
+    titles_by_name: Dict[str, List[str]] = {
+        "Org 1": ["A", "B"],
+        "Org 2": [],
+        "Org 3": ["C"],
+    }
+    sirets = []
+
+    for name, titles in titles_by_name.items():
+        siret = await bus.execute(CreateOrganizationFactory.build(name=name))
+        await bus.execute(CreateCatalog(organization_siret=siret))
+        sirets.append(siret)
+
+        for title in titles:
+            await bus.execute(
+                CreateDatasetFactory.build(
+                    account=Skip(), organization_siret=siret, title=title
+                )
+            )
+
+        await bus.execute(
+            CreateDatasetFactory.build(
+                account=Skip(),
+                organization_siret=siret,
+                title="Restricted",
+                publication_restriction=PublicationRestriction.LEGAL_RESTRICTION,
+            )
+        )
+
+    out = tmp_path / "catalogs.zip"
+    num_catalogs = await exportcatalogs.main(out=out, fmt=fmt)
+
+    assert num_catalogs >= 3
+    assert list(tmp_path.iterdir()) == [out]
+
+    with zipfile.ZipFile(out) as zf:
+        for siret in sirets:
+            content = zf.read(f"{siret}.{fmt.value}").decode()
+
+            # Same content as the export of each catalog.
+            export = await bus.execute(GetCatalogExport(siret=siret))
+            expected = "".join([chunk async for chunk in iter_export(export, fmt)])
+            assert content == expected
+            assert "Restricted" not in content
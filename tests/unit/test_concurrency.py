@@ -0,0 +1,50 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from server.seedwork.application.concurrency import gather_bounded
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded() -> None:
+    running = 0
+    max_running = 0
+
+    async def lookup(value: int) -> int:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        # Finish in reverse order.
+        await asyncio.sleep(0.01 * (5 - value))
+        running -= 1
+        return value
+
+    results = await gather_bounded(*(lookup(value) for value in range(5)), limit=2)
+
+    assert results == [0, 1, 2, 3, 4]
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_failure() -> None:
+    cancelled: List[int] = []
+
+    async def fail() -> None:
+        raise ValueError("Failed")
+
+    async def lookup(value: int) -> int:
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(value)
+            raise
+        return value
+
+    with pytest.raises(ValueError):
+        await gather_bounded(lookup(1), fail(), lookup(2), lookup(3), limit=3)
+
+    await asyncio.sleep(0)
+
+    # Lookup 3 may not have started yet. If it did, it was cancelled as well.
+    assert cancelled[:2] == [1, 2]
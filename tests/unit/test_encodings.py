@@ -0,0 +1,26 @@
+from typing import Optional
+
+import pytest
+
+from server.api.utils.encodings import negotiate_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        pytest.param(None, "identity", id="missing"),
+        pytest.param("", "identity", id="empty"),
+        pytest.param("gzip", "gzip", id="gzip"),
+        pytest.param("gzip, deflate, br", "br", id="server-preference"),
+        pytest.param("GZIP", "gzip", id="case-insensitive"),
+        pytest.param("br;q=0.5, gzip", "gzip", id="client-preference"),
+        pytest.param("br;q=0, gzip;q=0", "identity", id="excluded"),
+        pytest.param("gzip;q=0.5, identity", "identity", id="identity-preferred"),
+        pytest.param("*", "br", id="any"),
+        pytest.param("*;q=0.5, identity;q=0.1", "br", id="any-weighted"),
+        pytest.param("deflate", "identity", id="unavailable"),
+        pytest.param("br;q=invalid, gzip", "gzip", id="invalid-weight"),
+    ],
+)
+def test_negotiate_encoding(accept_encoding: Optional[str], expected: str) -> None:
+    assert negotiate_encoding(accept_encoding, ["br", "gzip", "identity"]) == expected
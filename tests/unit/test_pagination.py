@@ -3,7 +3,13 @@ from typing import Callable, Optional
 import pytest
 from pydantic import ValidationError
 
-from server.domain.common.pagination import Page, Pagination
+from server.domain.common.exceptions import InvalidCursor
+from server.domain.common.pagination import (
+    Page,
+    Pagination,
+    decode_cursor,
+    encode_cursor,
+)
 
 
 def test_default_page() -> None:
@@ -87,3 +93,16 @@ def test_pagination_total_pages() -> None:
 
     pagination = Pagination(items=items, total_items=7, page_size=3)
     assert pagination.total_pages == 3
+
+
+def test_cursor_roundtrip() -> None:
+    values = [0.1, "2022-10-11T13:00:00+00:00", "6f9e9c3e-3a4d-4d0c-9d6b-8b2e1c0f5a7d"]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", "e30", "bnVsbA"])
+def test_cursor_invalid(cursor: str) -> None:
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
@@ -1,13 +1,16 @@
-from typing import Any
+from typing import Any, Optional, Tuple
 
 import httpx
 import pytest
 from fastapi import Depends, FastAPI
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.security.http import HTTPBearer
+from starlette.authentication import AuthCredentials
+from starlette.requests import HTTPConnection
 
 from server.api.auth.backends.token import TokenAuthBackend
 from server.api.auth.middleware import AuthMiddleware
+from server.api.auth.models import ApiUser
 from server.api.auth.permissions import (
     BasePermission,
     HasAPIKey,
@@ -39,6 +42,60 @@ async def test_is_authenticated(temp_user: TestPasswordUser) -> None:
         assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_authentication_is_lazy(temp_user: TestPasswordUser) -> None:
+    class CountingTokenAuthBackend(TokenAuthBackend):
+        calls = 0
+
+        async def authenticate(
+            self, conn: HTTPConnection
+        ) -> Optional[Tuple[AuthCredentials, ApiUser]]:
+            self.calls += 1
+            return await super().authenticate(conn)
+
+    backend = CountingTokenAuthBackend()
+
+    app = FastAPI()
+
+    app.add_middleware(AuthMiddleware, backend=backend)
+
+    @app.get("/public/")
+    async def public() -> str:
+        return "OK"
+
+    @app.get("/private/", dependencies=[Depends(IsAuthenticated())])
+    async def private(request: APIRequest) -> str:
+        return request.user.account.email
+
+    @app.get("/unprotected/")
+    async def unprotected(request: APIRequest) -> str:
+        return request.user.account.email  # pragma: no cover
+
+    async with httpx.AsyncClient(app=app, base_url="http://testserver") as client:
+        # Tokens are ignored by public routes, even invalid ones.
+        for api_token in (temp_user.account.api_token, "badtoken"):
+            headers = {"Authorization": f"Bearer {api_token}"}
+            response = await client.get("/public/", headers=headers)
+            assert response.status_code == 200
+
+        assert backend.calls == 0
+
+        headers = {"Authorization": f"Bearer {temp_user.account.api_token}"}
+        response = await client.get("/private/", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == temp_user.account.email
+        assert backend.calls == 1
+
+        response = await client.get(
+            "/private/", headers={"Authorization": "Bearer badtoken"}
+        )
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Invalid credentials"}
+
+        with pytest.raises(RuntimeError, match="IsAuthenticated"):
+            await client.get("/unprotected/", headers=headers)
+
+
 @pytest.mark.asyncio
 async def test_has_role(
     temp_user: TestPasswordUser, admin_user: TestPasswordUser
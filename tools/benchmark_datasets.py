@@ -0,0 +1,447 @@
+"""
+Benchmark dataset listing queries against a large, temporary catalog.
+
+The catalog is seeded in a transaction which is rolled back at the end, so the
+database is left untouched.
+
+WARNING: seeding disables triggers of dataset tables, which holds exclusive locks
+on them until the end of the benchmark: all reads and writes of datasets block
+meanwhile. Never run this against a shared or live database. It refuses to run
+unless APP_SERVER_MODE is "local".
+
+Usage:
+    python -m tools.benchmark_datasets [-n 100000] [--repeat 10] [--explain]
+"""
+import argparse
+import asyncio
+import functools
+import statistics
+import textwrap
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+
+import click
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from server.application.catalogs.commands import CreateCatalog
+from server.application.organizations.commands import CreateOrganization
+from server.config.di import bootstrap, resolve
+from server.config.settings import Settings
+from server.domain.common.pagination import CountStrategy, Page
+from server.domain.common.types import ID, Skip
+from server.domain.datasets.specifications import DatasetFacet, DatasetSpec
+from server.domain.extra_fields.entities import ExtraFieldValue
+from server.domain.organizations.types import Siret
+from server.infrastructure.database import Database
+from server.infrastructure.datasets.queries.get_all import GetAllQuery
+from server.infrastructure.datasets.queries.suggest import (
+    get_completions_statement,
+    get_suggestions_statement,
+    get_words,
+)
+from server.infrastructure.helpers.sqlalchemy import (
+    Explain,
+    get_estimated_count_from,
+    to_limit_offset,
+)
+from server.seedwork.application.messages import MessageBus
+
+success = functools.partial(click.style, fg="bright_green")
+info = functools.partial(click.style, fg="blue")
+
+BENCHMARK_SIRET = Siret("99999999999999")
+
+_WORDS = [
+    "forêt",
+    "cadastre",
+    "carbone",
+    "inventaire",
+    "national",
+    "région",
+    "commune",
+    "transport",
+    "santé",
+    "école",
+    "budget",
+    "eau",
+    "énergie",
+    "population",
+    "culture",
+    "monument",
+]
+
+_SEED_DATASETS = """
+WITH records AS (
+    INSERT INTO catalog_record (id, organization_siret, created_at)
+    SELECT
+        uuid_generate_v4(),
+        :siret,
+        clock_timestamp() - make_interval(secs => i)
+    FROM generate_series(1, :n) AS i
+    RETURNING id
+)
+INSERT INTO dataset (
+    id,
+    catalog_record_id,
+    title,
+    description,
+    service,
+    geographical_coverage,
+    technical_source,
+    contact_emails,
+    publication_restriction,
+    license
+)
+SELECT
+    uuid_generate_v4(),
+    records.id,
+    initcap(w.words[1 + floor(random() * w.n)::int]) || ' '
+        || w.words[1 + floor(random() * w.n)::int],
+    array_to_string(
+        ARRAY(
+            SELECT w.words[1 + floor(random() * w.n)::int]
+            FROM generate_series(1, 50)
+            WHERE records.id IS NOT NULL  -- Evaluate for each row.
+        ),
+        ' '
+    ),
+    'Service ' || (1 + floor(random() * 20)::int),
+    'Région ' || (1 + floor(random() * 13)::int),
+    'SI ' || (1 + floor(random() * 5)::int),
+    ARRAY['contact@example.org'],
+    (ARRAY['NO_RESTRICTION', 'NO_RESTRICTION', 'NO_RESTRICTION', 'DRAFT'])[
+        1 + floor(random() * 4)::int
+    ]::publication_restriction_enum,
+    (ARRAY['Licence Ouverte', 'ODbL', NULL])[1 + floor(random() * 3)::int]
+FROM records, (SELECT CAST(:words AS text[]) AS words, CAST(:n_words AS int) AS n) AS w
+"""
+
+_SEED_TAGS = """
+INSERT INTO tag (id, name)
+SELECT uuid_generate_v4(), 'Benchmark tag ' || i FROM generate_series(1, 20) AS i
+RETURNING id
+"""
+
+_SEED_DATASET_TAGS = """
+INSERT INTO dataset_tag (dataset_id, tag_id)
+SELECT DISTINCT dataset.id, tags.ids[1 + (abs(hashtext(dataset.id::text || k)) % 20)]
+FROM dataset
+JOIN catalog_record ON catalog_record.id = dataset.catalog_record_id
+CROSS JOIN generate_series(1, 2) AS k
+CROSS JOIN (
+    SELECT array_agg(id) AS ids FROM tag WHERE name LIKE 'Benchmark tag %'
+) AS tags
+WHERE catalog_record.organization_siret = :siret
+"""
+
+_SEED_FORMATS = """
+INSERT INTO dataformat (name)
+SELECT 'Benchmark format ' || i FROM generate_series(1, 10) AS i
+RETURNING id
+"""
+
+_SEED_DATASET_FORMATS = """
+INSERT INTO dataset_dataformat (dataset_id, dataformat_id)
+SELECT dataset.id, formats.ids[1 + (abs(hashtext(dataset.id::text)) % 10)]
+FROM dataset
+JOIN catalog_record ON catalog_record.id = dataset.catalog_record_id
+CROSS JOIN (
+    SELECT array_agg(id) AS ids FROM dataformat WHERE name LIKE 'Benchmark format %'
+) AS formats
+WHERE catalog_record.organization_siret = :siret
+"""
+
+_SEED_EXTRA_FIELD = """
+INSERT INTO extra_field (id, organization_siret, name, title, hint_text, type, data)
+VALUES (uuid_generate_v4(), :siret, 'referent', 'Référent', '', 'TEXT', '{}')
+RETURNING id
+"""
+
+_SEED_EXTRA_FIELD_VALUES = """
+INSERT INTO extra_field_value (dataset_id, extra_field_id, value)
+SELECT
+    dataset.id,
+    extra_field.id,
+    'Référent ' || (abs(hashtext(dataset.id::text)) % 500)
+FROM dataset
+JOIN catalog_record ON catalog_record.id = dataset.catalog_record_id
+JOIN extra_field ON extra_field.organization_siret = catalog_record.organization_siret
+WHERE catalog_record.organization_siret = :siret
+"""
+
+
+class Seed(NamedTuple):
+    tag_ids: List[ID]
+    format_ids: List[int]
+    extra_field_id: ID
+
+
+# Tables whose triggers maintain dataset search vectors.
+_SEARCH_TSV_TRIGGER_TABLES = [
+    "dataset",
+    "dataset_tag",
+    "dataset_dataformat",
+    "extra_field_value",
+]
+
+_SEED_SEARCH_TSV = """
+UPDATE dataset SET search_tsv = dataset_search_tsv(dataset)
+FROM catalog_record
+WHERE catalog_record.id = dataset.catalog_record_id
+AND catalog_record.organization_siret = :siret
+"""
+
+_SEED_TITLE_LEXEMES = """
+INSERT INTO dataset_title_lexeme (word, ndoc)
+SELECT word, ndoc FROM ts_stat(
+    format(
+        'SELECT search_tsv FROM dataset '
+        'JOIN catalog_record ON catalog_record.id = dataset.catalog_record_id '
+        'WHERE catalog_record.organization_siret = %L',
+        CAST(:siret AS text)
+    ),
+    'A'
+)
+ON CONFLICT (word) DO UPDATE SET ndoc = dataset_title_lexeme.ndoc + EXCLUDED.ndoc
+"""
+
+
+async def seed(session: AsyncSession, n: int, siret: Siret) -> Seed:
+    params = {"siret": siret}
+
+    # Triggers would refresh search vectors (and the lexicon of titles) of all
+    # datasets after each step below. Compute them once at the end instead.
+    # (This is rolled back as well.) NOTE: this locks these tables until the
+    # transaction ends, see `main()`.
+    for table in _SEARCH_TSV_TRIGGER_TABLES:
+        await session.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER"))
+
+    await session.execute(
+        text(_SEED_DATASETS),
+        {**params, "n": n, "words": _WORDS, "n_words": len(_WORDS)},
+    )
+    # Refresh planner statistics, or joins below may pick very slow plans.
+    await session.execute(text("ANALYZE catalog_record, dataset"))
+    tag_ids = (await session.execute(text(_SEED_TAGS))).scalars().all()
+    await session.execute(text(_SEED_DATASET_TAGS), params)
+    format_ids = (await session.execute(text(_SEED_FORMATS))).scalars().all()
+    await session.execute(text(_SEED_DATASET_FORMATS), params)
+    extra_field_id = (
+        await session.execute(text(_SEED_EXTRA_FIELD), params)
+    ).scalar_one()
+    await session.execute(text(_SEED_EXTRA_FIELD_VALUES), params)
+    await session.execute(text(_SEED_SEARCH_TSV), params)
+    await session.execute(text(_SEED_TITLE_LEXEMES), params)
+
+    for table in _SEARCH_TSV_TRIGGER_TABLES:
+        await session.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER"))
+
+    await session.execute(text("ANALYZE"))
+
+    return Seed(
+        tag_ids=list(tag_ids),
+        format_ids=list(format_ids),
+        extra_field_id=extra_field_id,
+    )
+
+
+class Scenario(NamedTuple):
+    name: str
+    make_spec: Callable[[Seed], DatasetSpec]
+    page: Page = Page()
+
+
+SCENARIOS = [
+    Scenario("default listing", lambda _: DatasetSpec()),
+    Scenario("default listing, page 50", lambda _: DatasetSpec(), Page(number=50)),
+    Scenario("search", lambda _: DatasetSpec(search_term="forêt")),
+    Scenario(
+        "search, filtered by service",
+        lambda _: DatasetSpec(
+            search_term="forêt", service__in=["Service 1", "Service 2"]
+        ),
+    ),
+    Scenario(
+        "filtered by tags",
+        lambda seed: DatasetSpec(tag__id__in=seed.tag_ids[:2]),
+    ),
+    Scenario(
+        "filtered by format",
+        lambda seed: DatasetSpec(format__id__in=seed.format_ids[:1]),
+    ),
+    Scenario(
+        "filtered by extra field",
+        lambda seed: DatasetSpec(
+            extra_field_values=[
+                ExtraFieldValue(extra_field_id=seed.extra_field_id, value="Référent 42")
+            ]
+        ),
+    ),
+]
+
+
+async def count_then_page(session: AsyncSession, spec: DatasetSpec, page: Page) -> None:
+    # Baseline strategy, as listings were fetched before the single statement:
+    # count rows of the full listing statement (all matching datasets, joined and
+    # with search headlines), then apply LIMIT/OFFSET to that same statement.
+    query = GetAllQuery(spec, account=Skip())
+    stmt = query.paginate(None, with_count=False)
+    await session.execute(select(func.count()).select_from(stmt.subquery()))
+    limit, offset = to_limit_offset(page)
+    result = await session.execute(stmt.limit(limit).offset(offset))
+    result.all()
+
+
+async def single_statement(
+    session: AsyncSession,
+    spec: DatasetSpec,
+    page: Page,
+    count_strategy: CountStrategy = CountStrategy.EXACT,
+) -> None:
+    query = GetAllQuery(spec, account=Skip(), count_strategy=count_strategy)
+    result = await session.execute(query.paginate(page))
+    result.all()
+
+
+async def estimated_count(session: AsyncSession, spec: DatasetSpec, page: Page) -> None:
+    await single_statement(session, spec, page, CountStrategy.ESTIMATED)
+    query = GetAllQuery(spec, account=Skip(), count_strategy=CountStrategy.ESTIMATED)
+    await get_estimated_count_from(query.estimate_statement, session)
+
+
+Strategy = Callable[[AsyncSession, DatasetSpec, Page], Awaitable[None]]
+
+# Search terms as they are typed, when making suggestions.
+SUGGESTIONS = ["f", "for", "forêt", "forêt na", "inventaire nationale", "xyz"]
+
+STRATEGIES: Dict[str, Strategy] = {
+    "count + full page": count_then_page,
+    "single statement": single_statement,
+    "capped count": functools.partial(
+        single_statement, count_strategy=CountStrategy.CAPPED
+    ),
+    "estimated count": estimated_count,
+}
+
+
+async def measure(
+    session: AsyncSession,
+    strategy: Strategy,
+    spec: DatasetSpec,
+    page: Page,
+    repeat: int,
+) -> List[float]:
+    await strategy(session, spec, page)  # Warmup
+
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await strategy(session, spec, page)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+async def facets(session: AsyncSession, spec: DatasetSpec, page: Page) -> None:
+    query = GetAllQuery(spec, account=Skip())
+    result = await session.execute(query.facets_statement(list(DatasetFacet)))
+    result.all()
+
+
+async def suggest(session: AsyncSession, q: str) -> None:
+    # Same as `SqlDatasetRepository.get_suggestions()`.
+    *words, fragment = get_words(q)
+    result = await session.execute(get_completions_statement(fragment))
+    completions = result.scalars().all()
+
+    if completions:
+        stmt = get_suggestions_statement(words, completions, Skip(), limit=10)
+        result = await session.execute(stmt)
+        result.all()
+
+
+async def explain(session: AsyncSession, spec: DatasetSpec, page: Page) -> str:
+    # Plan of the statement actually used when listing datasets.
+    query = GetAllQuery(spec, account=Skip())
+    result = await session.execute(Explain(query.paginate(page), analyze=True))
+    return "\n".join(result.scalars())
+
+
+def format_timings(timings: List[float]) -> str:
+    median = statistics.median(timings)
+    worst = max(timings)
+    return f"median={median:8.2f}ms  max={worst:8.2f}ms"
+
+
+async def main(n: int, repeat: int, explain_plans: bool = False) -> None:
+    settings = resolve(Settings)
+
+    if settings.server_mode != "local":
+        raise SystemExit(
+            "Refusing to run with APP_SERVER_MODE="
+            f"{settings.server_mode!r}: seeding locks dataset tables until the "
+            "benchmark ends. Only run it against a local database."
+        )
+
+    bus = resolve(MessageBus)
+    db = resolve(Database)
+
+    async with db.autorollback():
+        await bus.execute(
+            CreateOrganization(name="Benchmark organization", siret=BENCHMARK_SIRET)
+        )
+        await bus.execute(CreateCatalog(organization_siret=BENCHMARK_SIRET))
+
+        async with db.session() as session:
+            print(info(f"Seeding {n} datasets..."))
+            seeded = await seed(session, n, BENCHMARK_SIRET)
+
+            for scenario in SCENARIOS:
+                print(info(scenario.name))
+                spec = scenario.make_spec(seeded)
+
+                for name, strategy in STRATEGIES.items():
+                    timings = await measure(
+                        session, strategy, spec, scenario.page, repeat
+                    )
+                    print(f"  {name:<20} {format_timings(timings)}")
+
+                timings = await measure(session, facets, spec, scenario.page, repeat)
+                print(f"  {'facets (all)':<20} {format_timings(timings)}")
+
+                if explain_plans:
+                    plan = await explain(session, spec, scenario.page)
+                    print(textwrap.indent(plan, "    "))
+
+            print(info("suggestions"))
+
+            for q in SUGGESTIONS:
+                timings = await measure(
+                    session,
+                    lambda session, *_: suggest(session, q),
+                    DatasetSpec(),
+                    Page(),
+                    repeat,
+                )
+                print(f"  {q!r:<24} {format_timings(timings)}")
+
+    print(success("done"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-n", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Show EXPLAIN ANALYZE output of the listing statement for each scenario",
+    )
+    args = parser.parse_args()
+
+    bootstrap()
+    asyncio.run(main(n=args.n, repeat=args.repeat, explain_plans=args.explain))
@@ -0,0 +1,106 @@
+"""
+Measure the latency of unrelated requests during a burst of password logins.
+
+Password hashing is slow by design, and must not block other requests handled by
+the same process. Logins are made for an unknown user, whose password is hashed
+anyway (see `login_password_user()`), so the database is left untouched.
+
+Usage:
+    python -m tools.benchmark_login [--logins 50] [--probes 200]
+"""
+import argparse
+import asyncio
+import functools
+import statistics
+import time
+from typing import List
+
+import click
+import httpx
+from asgi_lifespan import LifespanManager
+
+from server.api.app import create_app
+from server.config.di import bootstrap
+
+success = functools.partial(click.style, fg="bright_green")
+info = functools.partial(click.style, fg="blue")
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    # Redirects to the docs, without any I/O.
+    response = await client.get("/")
+    assert response.status_code == 307, response.status_code
+    return (time.perf_counter() - start) * 1000
+
+
+async def login(client: httpx.AsyncClient) -> None:
+    response = await client.post(
+        "/auth/login/",
+        json={"email": "benchmark@example.org", "password": "benchmark"},
+    )
+    assert response.status_code == 401, response.status_code
+
+
+def format_timings(timings: List[float]) -> str:
+    median = statistics.median(timings)
+    worst = max(timings)
+    # At least two timings are required to compute quantiles.
+    p99 = (
+        statistics.quantiles(timings, n=100, method="inclusive")[-1]
+        if len(timings) > 1
+        else worst
+    )
+    return (
+        f"n={len(timings):<5} median={median:8.2f}ms  p99={p99:8.2f}ms  "
+        f"max={worst:8.2f}ms"
+    )
+
+
+async def main(logins: int, probes: int) -> None:
+    app = create_app()
+
+    async with LifespanManager(app):
+        transport = httpx.ASGITransport(app)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            timings = []
+
+            for _ in range(probes):
+                timings.append(await probe(client))
+                await asyncio.sleep(PROBE_INTERVAL)
+
+            print(f"{info('idle'):<30} {format_timings(timings)}")
+
+            start = time.perf_counter()
+            burst = asyncio.ensure_future(
+                asyncio.gather(*(login(client) for _ in range(logins)))
+            )
+            timings = []
+
+            while not burst.done():
+                timings.append(await probe(client))
+                await asyncio.sleep(PROBE_INTERVAL)
+
+            await burst
+            elapsed = time.perf_counter() - start
+
+            label = f"during {logins} logins"
+            print(f"{info(label):<30} {format_timings(timings)}")
+            print(f"logins took {elapsed:.2f}s ({logins / elapsed:.1f}/s)")
+
+    print(success("done"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+
+    bootstrap()
+    asyncio.run(main(logins=args.logins, probes=args.probes))
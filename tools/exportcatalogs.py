@@ -0,0 +1,71 @@
+"""
+Export all catalogs to a zip archive, with one file per catalog.
+
+Datasets of all catalogs are read in a single pass, which is much cheaper than
+requesting the export of each catalog from the API, e.g. for nightly open data
+dumps.
+
+Usage:
+    python -m tools.exportcatalogs catalogs.zip [--format csv|jsonl|jsonld]
+"""
+import argparse
+import asyncio
+import functools
+import os
+import zipfile
+from pathlib import Path
+
+import click
+
+from server.api.catalogs.rendering import iter_export
+from server.application.catalogs.queries import GetAllCatalogExports
+from server.config.di import bootstrap, resolve
+from server.domain.catalogs.entities import ExportFormat
+from server.seedwork.application.messages import MessageBus
+
+success = functools.partial(click.style, fg="bright_green")
+
+
+async def main(out: Path, fmt: ExportFormat = ExportFormat.CSV) -> int:
+    bus = resolve(MessageBus)
+
+    exports = await bus.execute(GetAllCatalogExports())
+
+    # Write to a temporary file, so that an existing archive is only replaced
+    # once the new one is complete.
+    tmp = out.with_name(f".{out.name}.tmp")
+    num_catalogs = 0
+
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            async for export in exports:
+                siret = export.catalog.organization.siret
+
+                with zf.open(f"{siret}.{fmt.value}", "w") as f:
+                    async for chunk in iter_export(export, fmt):
+                        f.write(chunk.encode())
+
+                num_catalogs += 1
+
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    print(f"{success('exported')}: {num_catalogs} catalogs to {out}")
+
+    return num_catalogs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out", type=Path)
+    parser.add_argument(
+        "--format",
+        choices=[fmt.value for fmt in ExportFormat],
+        default=ExportFormat.CSV.value,
+    )
+    args = parser.parse_args()
+
+    bootstrap()
+    asyncio.run(main(out=args.out, fmt=ExportFormat(args.format)))